@@ -13,8 +13,11 @@ from schemas.router_models import (
     BackofficeLog, 
 )
 
+import asyncio
+import hashlib
 import json
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 import os
 
 # LLMs:
@@ -24,12 +27,19 @@ load_dotenv()
 from langchain_anthropic import ChatAnthropic
 # from langchain_openai import ChatOpenAI
 
-from prompts.llm1_prompt import OPTIMIZED_ROUTER_SYSTEM_PROMPT
-from prompts.llm2_prompt import llm2_prompt_builder
+from prompts.llm1_prompt import ROUTER_PROMPT_SHA256, build_router_messages, select_examples, format_examples_block, detect_category_terms
+from prompts.llm2_prompt import llm2_system_blocks, build_dynamic_context
 
 from schemas.transactions_tool import query_transactions_lc_tool
 from schemas.trn_category_tool import search_trans_categories_lc_tool
 
+from router_cache import semantic_cache
+from router_dataset import log_router_example
+from router_resolvers import resolve_router_output
+from router_fast_path import fast_route
+from router_context import condense_history
+from router_warmup import start_router_warmup
+
 
 #############################################################################
 
@@ -45,6 +55,7 @@ def input_node(state: GraphState) -> GraphState:
 
 #############################################################################
 
+@semantic_cache(threshold=0.95, ttl=3600)
 def router_node(state: GraphState) -> GraphState:
     """
     LLM-1 Router & Clarifier with Tool Calling Support.
@@ -72,33 +83,78 @@ def router_node(state: GraphState) -> GraphState:
     Tool Calling:
     - LLM-1 can invoke search_transaction_categories to resolve category terms
     - Results are used to populate resolved_trn_categories in RouterOutput
+    
+    Fast path:
+    - router_fast_path.fast_route() answers canonical UC-01 lookups (balance,
+      last transaction, account type) without calling LLM-1
+    
+    Context budget:
+    - router_context.condense_history() summarizes older turns when the
+      history would push the call past the context-window threshold
+    
+    Caching:
+    - Wrapped by semantic_cache (router_cache.py): single-turn paraphrases of an
+      already-routed query reuse its RouterOutput without calling LLM-1
     """
-    payload = build_router_payload(state)
+    # Deterministic fast path: canonical UC-01 lookups never need LLM-1
+    fast_output = fast_route(state.user_query, state.conversation_summary, state.raw_messages)
+    if fast_output is not None:
+        print(f"⚡ LLM-1 fast path: {fast_output.router_notes}")
+        state.router_output = fast_output
+        return state
 
-    # Start with system prompt
-    messages = [{"role": "system", "content": OPTIMIZED_ROUTER_SYSTEM_PROMPT}]
+    # User text incl. earlier turns (Turn 2 answers don't repeat the category term)
+    user_text = " ".join(
+        [m["content"] for m in state.raw_messages
+         if m.get("role") == "user" and isinstance(m.get("content"), str)]
+        + [state.user_query]
+    )
     
-    # Add conversation history if available (for multi-turn clarifications)
-    if state.raw_messages:
-        messages.extend(state.raw_messages)
+    # In-process category RAG: saves the search_transaction_categories round trip
+    category_candidates = prefetch_category_candidates(user_text)
     
-    # Add current query payload
-    messages.append({"role": "user", "content": json.dumps(payload)})
+    payload = build_router_payload(state, category_candidates)
+
+    # Oversized histories: older turns condensed into one summary message
+    history = condense_history(state.raw_messages)
+
+    # Stable prefix (cached system prompt + verbatim history) → volatile suffix
+    # (payload + only the few-shot examples relevant to this query)
+    messages = build_router_messages(
+        payload,
+        raw_messages=history,
+        examples_block=format_examples_block(
+            select_examples(state.user_query, state.raw_messages)
+        ),
+    )
 
     try:
         # Iterative tool calling loop
         max_iterations = 5
         iteration = 0
         raw_content = None
+        router_output = None
+        rag_matches = list(category_candidates)  # CategoryMatch dicts seen this turn (for ID validation)
+        llm = get_router_llm(state.session_id)  # same backend for every turn of the session
         
         while iteration < max_iterations:
             iteration += 1
-            print(f"\n--- LLM-1 Router Iteration {iteration} ---")
+            print(f"\n--- LLM-1 Router Iteration {iteration} (prompt {ROUTER_PROMPT_SHA256}) ---")
             
-            response = router_llm.invoke(messages)
+            response = llm.invoke(messages)
             
             # Check if LLM wants to call tools
             if hasattr(response, 'tool_calls') and response.tool_calls:
+                # Structured output: the final decision arrives as RouterOutput tool args
+                final_call = next(
+                    (tc for tc in response.tool_calls if tc["name"] == ROUTER_OUTPUT_TOOL_NAME),
+                    None,
+                )
+                if final_call is not None:
+                    print("LLM-1 returned RouterOutput via tool call")
+                    router_output = RouterOutput.model_validate(final_call["args"])
+                    break
+                
                 print(f"LLM-1 wants to use {len(response.tool_calls)} tool(s)")
                 
                 tool_result_content = []
@@ -119,6 +175,7 @@ def router_node(state: GraphState) -> GraphState:
                         
                         # Convert CategoryMatch objects to JSON-serializable format
                         result_json = [match.model_dump() for match in result]
+                        rag_matches.extend(result_json)
                         
                         tool_result_content.append({
                             "type": "tool_result",
@@ -145,35 +202,52 @@ def router_node(state: GraphState) -> GraphState:
                 raw_content = response.content
                 break
         
-        if iteration >= max_iterations:
+        if router_output is None and raw_content is None:
             raise Exception(f"Maximum iterations ({max_iterations}) reached without final response")
         
-        # Handle response content format
-        if isinstance(raw_content, list):
-            # Extract text from content blocks
-            text_content = ""
-            for item in raw_content:
-                if isinstance(item, dict) and 'text' in item:
-                    text_content += item['text']
-                elif isinstance(item, str):
-                    text_content += item
-            raw_content = text_content
-        
-        # Strip markdown code blocks if present
-        if "```json" in raw_content:
-            raw_content = raw_content.split("```json")[1].split("```")[0]
-        elif "```" in raw_content:
-            parts = raw_content.split("```")
-            if len(parts) >= 3:
-                raw_content = parts[1]
-        
-        raw_content = raw_content.strip()
+        if router_output is None:
+            # Fallback: plain-text JSON answer (tool_choice should prevent this)
+            
+            # Handle response content format
+            if isinstance(raw_content, list):
+                # Extract text from content blocks
+                text_content = ""
+                for item in raw_content:
+                    if isinstance(item, dict) and 'text' in item:
+                        text_content += item['text']
+                    elif isinstance(item, str):
+                        text_content += item
+                raw_content = text_content
+            
+            # Strip markdown code blocks if present
+            if "```json" in raw_content:
+                raw_content = raw_content.split("```json")[1].split("```")[0]
+            elif "```" in raw_content:
+                parts = raw_content.split("```")
+                if len(parts) >= 3:
+                    raw_content = parts[1]
+            
+            raw_content = raw_content.strip()
+            
+            # Parse and validate the JSON into our typed RouterOutput model
+            router_output = RouterOutput.model_validate_json(raw_content)
         
-        # Parse and validate the JSON into our typed RouterOutput model
-        router_output = RouterOutput.model_validate_json(raw_content)
+        # Deterministic fill/validation of resolved_* fields (no LLM recall)
+        router_output = resolve_router_output(
+            router_output, state.conversation_summary, user_text, rag_matches
+        )
         
         state.router_output = router_output
         
+        # Opt-in capture of labelled examples for a future local router classifier
+        log_router_example(
+            state.user_query,
+            state.conversation_summary,
+            router_output,
+            is_multiturn=bool(state.raw_messages),
+            prompt_sha=ROUTER_PROMPT_SHA256,
+        )
+        
     except Exception as e:
         print(f"❌ Router error: {e}")
         import traceback
@@ -359,6 +433,10 @@ def build_graph() -> StateGraph:
     Construct the LangGraph for the financial AI agent with:
     input -> router -> (vague_handler | executor) -> summary_update -> END.
     """
+    # Load embedding model / vector store in the background (opt-in, see
+    # router_warmup) so the first user request does not pay the cold start
+    start_router_warmup()
+
     graph = StateGraph(GraphState)
 
     # Register nodes
@@ -388,13 +466,17 @@ def build_graph() -> StateGraph:
 # LLM-1 Router & Clarifier
 #########################################################################################
 
-def build_router_payload(state: GraphState) -> Dict[str, Any]:
+def build_router_payload(
+    state: GraphState,
+    category_candidates: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
     """
     Prepare the minimal structured input for LLM-1:
     - user_query
     - current conversation_summary (if any) as a dict.
+    - category_candidates: pre-fetched RAG matches (only when category terms were detected)
     """
-    return {
+    payload = {
         "user_query": state.user_query,
         "conversation_summary": (
             state.conversation_summary.model_dump()
@@ -402,18 +484,87 @@ def build_router_payload(state: GraphState) -> Dict[str, Any]:
             else None
         ),
     }
+    if category_candidates:
+        payload["category_candidates"] = category_candidates
+    return payload
+
+
+def prefetch_category_candidates(user_text: str) -> List[Dict[str, Any]]:
+    """
+    Run category RAG in-process BEFORE the LLM-1 call.
+    
+    Detects category terms in the user text and resolves them with the same
+    search_transaction_categories function the LLM tool uses, so the common
+    UC-04 query needs no tool-call round trip. Returns [] if nothing detected.
+    """
+    terms = list(dict.fromkeys(term for _, term, _ in detect_category_terms(user_text)))
+    if not terms:
+        return []
+    
+    from schemas.trn_category_tool import search_transaction_categories
+    try:
+        matches = search_transaction_categories(terms)
+    except Exception as e:
+        print(f"⚠️  Category prefetch failed, LLM-1 will call the tool instead: {e}")
+        return []
+    
+    print(f"Prefetched {len(matches)} category candidate(s) for terms: {terms}")
+    return [match.model_dump() for match in matches]
 
 #########################################################################################    
 
-router_llm = ChatAnthropic(
-    model="claude-sonnet-4-5-20250929",      
-    temperature=0,
-).bind_tools(
-    [
-        search_trans_categories_lc_tool,
-        # later we can add more router tools here
-    ]
-)
+# RouterOutput is bound as a tool and tool_choice="any" forces a tool call every
+# turn: either a category lookup or the final decision, which then arrives as
+# schema-shaped tool args instead of free text JSON.
+ROUTER_OUTPUT_TOOL_NAME = RouterOutput.__name__
+
+ROUTER_MODEL = "claude-sonnet-4-5-20250929"
+
+# Sticky-routing header read by a load-balancing proxy (LiteLLM session affinity,
+# vLLM session-aware scheduling) so all turns of a session hit the same warm backend
+ROUTER_SESSION_HEADER = os.getenv("ROUTER_SESSION_HEADER", "x-session-affinity")
+
+
+def _build_router_llm(**client_kwargs):
+    return ChatAnthropic(
+        model=ROUTER_MODEL,
+        temperature=0,
+        **client_kwargs,
+    ).bind_tools(
+        [
+            search_trans_categories_lc_tool,
+            RouterOutput,
+            # later we can add more router tools here
+        ],
+        tool_choice="any",
+    )
+
+
+# Shared client: first turn of a new conversation (no session yet) - any backend
+router_llm = _build_router_llm()
+
+
+@lru_cache(maxsize=256)
+def _session_router_llm(affinity_key: str):
+    return _build_router_llm(
+        default_headers={ROUTER_SESSION_HEADER: affinity_key},
+        model_kwargs={"metadata": {"user_id": affinity_key}},
+    )
+
+
+def get_router_llm(session_id: Optional[str] = None):
+    """
+    Router client pinned to one conversation.
+    
+    All turns with the same session_id carry the same opaque affinity key
+    (sha256 of the session_id - never the raw ID), so a multi-backend proxy
+    keeps them on the backend that already holds their prompt cache.
+    Without a session_id the shared router_llm is used.
+    """
+    if not session_id:
+        return router_llm
+    return _session_router_llm(hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32])
+
 # router_llm = ChatOpenAI(model="gpt-4o", temperature=0
 #                        ).bind_tools(
 #     [
@@ -423,6 +574,23 @@ router_llm = ChatAnthropic(
 # )
 
 
+def _transaction_rows(payload) -> list:
+    """Row dicts from a list of transactions or a column-oriented TransactionColumns payload."""
+    # Whole query_transactions result -> its matched transactions
+    if isinstance(payload, dict) and "transactions" in payload:
+        payload = payload["transactions"] or {}
+    if not isinstance(payload, dict):
+        return payload
+    
+    # Column lists (possibly only some fields): index i across the lists = row i
+    columns = {name: values for name, values in payload.items() if isinstance(values, list)}
+    n_rows = payload.get("n_rows", max((len(values) for values in columns.values()), default=0))
+    return [
+        {name: values[i] for name, values in columns.items() if i < len(values)}
+        for i in range(n_rows)
+    ]
+
+
 def aggregation_calculator(
     operation: str,
     field: str, 
@@ -434,7 +602,9 @@ def aggregation_calculator(
     Args:
         operation: SUM, AVG, COUNT, MIN, MAX
         field: amount, transaction_count
-        transactions_json: JSON string of transaction data
+        transactions_json: JSON string of transaction data - a list of transaction
+            objects, the column-oriented `transactions` of a query_transactions
+            result, or the whole result
         filters: Additional filter criteria    
     Returns:
         JSON string with aggregation result
@@ -442,7 +612,7 @@ def aggregation_calculator(
     import json
     
     try:
-        transactions = json.loads(transactions_json)
+        transactions = _transaction_rows(json.loads(transactions_json))
         
         if operation == "SUM":
             result = sum(float(t.get(field, 0)) for t in transactions)
@@ -547,6 +717,36 @@ def build_executor_payload(state: GraphState) -> Dict[str, Any]:
 
 ########################################################################################################
 
+def _run_transaction_queries(tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Execute every query_transactions call of one LLM-2 response as a single QueryPlan.
+
+    Returns {tool_call_id: TransactionQueryResult}.
+    """
+    from schemas.executor_models_llm2 import QueryPlan, TransactionQuerySpec
+
+    call_ids, specs = [], []
+    for tool_call in tool_calls:
+        if tool_call["name"] != "query_transactions":
+            continue
+        tool_args = tool_call["args"]
+        if 'spec' in tool_args:
+            spec_data = tool_args['spec']
+        elif 'request' in tool_args:
+            spec_data = tool_args['request']
+        else:
+            spec_data = tool_args
+        call_ids.append(tool_call["id"])
+        specs.append(TransactionQuerySpec(**spec_data))
+
+    if not specs:
+        return {}
+    if len(specs) == 1:
+        return {call_ids[0]: query_transactions_lc_tool.func(specs[0])}
+    print(f"⚡ Running {len(specs)} query_transactions calls as one plan")
+    return dict(zip(call_ids, QueryPlan(specs=specs).execute()))
+
+
 def executor_node(state: GraphState) -> GraphState:
     """
     LLM-2 Executor node with iterative tool calling.
@@ -564,21 +764,26 @@ def executor_node(state: GraphState) -> GraphState:
     # Build the JSON payload for the user message
     payload = build_executor_payload(state)
 
+    # Static system prompt (cacheable per routing shape) + per-query user message
+    execution_summary = build_dynamic_context(
+        user_query=state.user_query,
+        router_output=state.router_output,
+        conversation_summary=state.conversation_summary,
+    )
     messages = [
         {
             "role": "system",
-            "content": llm2_prompt_builder(
-                user_query=state.user_query,
-                router_output=state.router_output,
-                conversation_summary=state.conversation_summary
-            ),
+            "content": llm2_system_blocks(state.router_output),
         },
         {
             "role": "user",
-            "content": json.dumps(payload, ensure_ascii=False),
+            "content": execution_summary + "\n" + json.dumps(payload, ensure_ascii=False),
         },
     ]
 
+    # Last query_transactions result - sample + digest go into the back-office log
+    last_tx_result = None
+
     try:
         # Iterative tool calling loop
         max_iterations = 8
@@ -595,6 +800,9 @@ def executor_node(state: GraphState) -> GraphState:
                 
                 tool_result_content = []
                 
+                # All query_transactions calls of this response run as ONE plan
+                tx_results = _run_transaction_queries(response.tool_calls)
+                
                 for tool_call in response.tool_calls:
                     tool_name = tool_call["name"] 
                     tool_args = tool_call["args"]
@@ -618,21 +826,13 @@ def executor_node(state: GraphState) -> GraphState:
                         })
                         
                     elif tool_name == "query_transactions":
-                        if 'spec' in tool_args:
-                            spec_data = tool_args['spec'] 
-                        elif 'request' in tool_args:
-                            spec_data = tool_args['request']
-                        else:
-                            spec_data = tool_args
-                            
-                        from schemas.executor_models_llm2 import TransactionQuerySpec
-                        spec_obj = TransactionQuerySpec(**spec_data)
-                        result = query_transactions_lc_tool.func(spec_obj)
+                        result = tx_results[tool_call["id"]]
+                        last_tx_result = result
                         
                         tool_result_content.append({
                             "type": "tool_result",
                             "tool_use_id": tool_call["id"],
-                            "content": json.dumps(result.model_dump() if hasattr(result, 'model_dump') else result, indent=2, default=str)
+                            "content": result.tool_json
                         })
                     
                     elif tool_name == "aggregation_calculator":
@@ -748,6 +948,8 @@ def executor_node(state: GraphState) -> GraphState:
                 # Data provenance
                 data_sources=data_sources,
                 transactions_analyzed=llm2_output.get("transactions_analyzed", 0),
+                sample_transactions=last_tx_result.sample_records if last_tx_result else [],
+                transactions_digest=last_tx_result.transactions_digest() if last_tx_result else None,
                 
                 # Preferences used (from conversation_summary)
                 preferences_used=preferences_used_dict,
@@ -822,6 +1024,34 @@ def executor_node(state: GraphState) -> GraphState:
         state.messages_to_user = [state.execution_result.final_answer]
 
     return state
+
+
+# Max concurrent LLM-2 executions in a batch (OLLAMA_NUM_PARALLEL is honoured
+# for self-hosted backends)
+LLM2_NUM_PARALLEL = int(os.getenv("LLM2_NUM_PARALLEL", os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+
+
+async def executor_node_batch(
+    states: List[GraphState],
+    max_parallel: int = LLM2_NUM_PARALLEL,
+) -> List[GraphState]:
+    """
+    Run executor_node for several CLEAR states concurrently.
+    
+    Each execution (prompt build + LLM-2 tool loop) runs in a worker thread
+    and the batch is awaited with asyncio.gather, so N executions take about
+    as long as the slowest one instead of the sum of all of them.
+    
+    Usage:
+        states = asyncio.run(executor_node_batch([state_1, state_2]))
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def run(state: GraphState) -> GraphState:
+        async with semaphore:
+            return await asyncio.to_thread(executor_node, state)
+    
+    return list(await asyncio.gather(*(run(state) for state in states)))
       
 # # LLM-2: executor_node function with proper tool calling support
 # def executor_node(state: GraphState) -> GraphState:
@@ -2,11 +2,30 @@
 Prompt modules for LLM-1 (Router & Clarifier) and LLM-2 (Executor)
 """
 
-from .llm1_prompt import OPTIMIZED_ROUTER_SYSTEM_PROMPT
-from .llm2_prompt import llm2_prompt_builder, BASE_LLM2_SYSTEM_PROMPT
+from .llm1_prompt import (
+    OPTIMIZED_ROUTER_SYSTEM_PROMPT,
+    ROUTER_PROMPT_SHA256,
+    ROUTER_SYSTEM_BLOCKS,
+    detect_category_terms,
+)
+from .llm2_prompt import (
+    llm2_prompt_builder,
+    llm2_prompt_builder_batch,
+    llm2_system_blocks,
+    build_static_system,
+    build_dynamic_context,
+    BASE_LLM2_SYSTEM_PROMPT,
+)
 
 __all__ = [
     'OPTIMIZED_ROUTER_SYSTEM_PROMPT',
+    'ROUTER_PROMPT_SHA256',
+    'ROUTER_SYSTEM_BLOCKS',
+    'detect_category_terms',
     'llm2_prompt_builder',
+    'llm2_prompt_builder_batch',
+    'llm2_system_blocks',
+    'build_static_system',
+    'build_dynamic_context',
     'BASE_LLM2_SYSTEM_PROMPT',
 ]
@@ -2,17 +2,18 @@
 # LLM-1 - PROMPT 
 #########################################################################
 from datetime import date
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Final, List, Optional, Tuple
 
 
-def inject_incomplete_context_handling():
-    """
-    Fix: "Last 30 days" should be CLEAR/UC-03
-    Problem: LLM asks what user wants to know about last 30 days
-    """
-    return """
-================================
-SPECIAL RULE: INCOMPLETE CONTEXT TEMPORAL QUERIES
-================================
+# Fix: "Last 30 days" should be CLEAR/UC-03
+# Problem: LLM asks what user wants to know about last 30 days
+_INJECT_INCOMPLETE_CONTEXT_HANDLING: Final[str] = """
+## SPECIAL RULE: INCOMPLETE CONTEXT TEMPORAL QUERIES
 
 When user provides ONLY a time period without explicit action:
 - Examples: "Last 30 days", "This month", "This week"
@@ -27,17 +28,12 @@ Pattern recognition:
 """
 
 
-def inject_show_vs_aggregation_logic():
-    """
-    Fix: "Show dining transactions" should be UC-04, not UC-02
-    Problem: LLM confuses listing with aggregation
-    """
-    return """
-================================
-CRITICAL RULE: SHOW/LIST vs AGGREGATION DISTINCTION
-================================
+# Fix: "Show dining transactions" should be UC-04, not UC-02
+# Problem: LLM confuses listing with aggregation
+_INJECT_SHOW_VS_AGGREGATION_LOGIC: Final[str] = """
+## CRITICAL RULE: SHOW/LIST vs AGGREGATION DISTINCTION
 
-*** MEMORIZE: "SHOW" or "LIST" = UC-04 or UC-01, NEVER UC-02 ***
+### MEMORIZE: "SHOW" or "LIST" = UC-04 or UC-01, NEVER UC-02
 
 UC-04 (Category-Based Listing):
 - "Show dining transactions" → UC-04 (list transactions by category)
@@ -58,15 +54,10 @@ Key distinction:
 """
 
 
-def inject_temporal_vs_direct_listing():
-    """
-    Fix: "Transactions from March" should be UC-03, not UC-01
-    Problem: LLM sees time filtering as simple listing
-    """
-    return """
-================================
-RULE: TEMPORAL FILTERING vs DIRECT RETRIEVAL
-================================
+# Fix: "Transactions from March" should be UC-03, not UC-01
+# Problem: LLM sees time filtering as simple listing
+_INJECT_TEMPORAL_VS_DIRECT_LISTING: Final[str] = """
+## RULE: TEMPORAL FILTERING vs DIRECT RETRIEVAL
 
 When query involves TIME-BASED FILTERING of transactions:
 
@@ -86,39 +77,34 @@ Key distinction:
 """
 
 
-def inject_refined_vagueness_detection():
-    """
-    Enhanced vagueness detection rules.
-    
-    Critical for distinguishing CLEAR vs VAGUE queries, especially for:
-    - Aggregation queries without timeframes
-    - Queries with subjective terms (recent, large)
-    - Queries with ambiguous category scope
-    """
-    return """
-================================
-REFINED VAGUENESS DETECTION
-================================
+# Enhanced vagueness detection rules.
+#
+# Critical for distinguishing CLEAR vs VAGUE queries, especially for:
+# - Aggregation queries without timeframes
+# - Queries with subjective terms (recent, large)
+# - Queries with ambiguous category scope
+_INJECT_REFINED_VAGUENESS_DETECTION: Final[str] = """
+## REFINED VAGUENESS DETECTION
 
-*** CRITICAL: When to Mark a Query as VAGUE ***
+### CRITICAL: When to Mark a Query as VAGUE
 
 A query is VAGUE if it's missing information that is:
 1. User-preference dependent (cannot be inferred from deterministic rules)
 2. Required to execute the query correctly
 3. Has multiple valid interpretations
 
-*** RULE 1: Aggregation Without Timeframe = VAGUE ***
+### RULE 1: Aggregation Without Timeframe = VAGUE
 
 When user asks for aggregation/totals WITHOUT specifying a time period, the query is VAGUE:
 
-❌ VAGUE Examples (missing timeframe):
+VAGUE Examples (missing timeframe):
 - "What are my total dining expenses"
 - "How much did I spend on groceries"
 - "Show me my coffee spending"
 - "What are my transportation costs"
 - "Sum of all entertainment expenses"
 
-✅ CLEAR Examples (has timeframe):
+CLEAR Examples (has timeframe):
 - "What are my total dining expenses this year"
 - "How much did I spend on groceries last month"
 - "Show me my coffee spending in October"
@@ -128,32 +114,32 @@ Exception: Queries with "current" or "latest" are CLEAR:
 - "What's my current balance" = CLEAR (current = now)
 - "Show me my latest transaction" = CLEAR (latest = most recent one)
 
-*** RULE 2: Subjective Terms = VAGUE ***
+### RULE 2: Subjective Terms = VAGUE
 
 Terms that are inherently user-specific require clarification:
 
-❌ VAGUE Terms:
+VAGUE Terms:
 - "recent" - could mean 7 days, 30 days, this month, etc.
 - "large" - could mean >$50, >$100, >$500, etc.
 - "small" - threshold is user-dependent
 - "frequently" - how often is frequent?
 - "unusual" - what's unusual for this user?
 
-*** RULE 3: Ambiguous Category Scope = VAGUE ***
+### RULE 3: Ambiguous Category Scope = VAGUE
 
 When category boundaries are unclear:
 
-❌ VAGUE Examples:
+VAGUE Examples:
 - "coffee spending" - cafes only vs all coffee purchases?
 - "transportation" - does it include gas, parking, both?
 - "food" - dining out vs groceries vs both?
 
-✅ CLEAR Examples:
+CLEAR Examples:
 - "coffee shop spending" - clearly refers to cafes/coffee shops
 - "grocery spending" - clearly refers to supermarkets
 - "restaurant spending" - clearly refers to dining establishments
 
-*** RULE 4: Multiple Ambiguities = VAGUE ***
+### RULE 4: Multiple Ambiguities = VAGUE
 
 If a query has MORE THAN ONE missing piece of information, it's VAGUE:
 
@@ -163,11 +149,11 @@ Example: "Show me recent large purchases at coffee shops"
 - Possibly missing: category scope (coffee shops)
 → VAGUE, ask for clarifications
 
-*** RULE 5: Deterministic Temporal References = CLEAR ***
+### RULE 5: Deterministic Temporal References = CLEAR
 
 These time references have clear, unambiguous meanings:
 
-✅ CLEAR Temporal Terms:
+CLEAR Temporal Terms:
 - "last month" - previous calendar month
 - "this month" - current calendar month
 - "this year" - current calendar year
@@ -176,19 +162,19 @@ These time references have clear, unambiguous meanings:
 - "yesterday" - previous day
 - "today" - current day
 
-*** RULE 6: Explicit vs Implicit Timeframes ***
+### RULE 6: Explicit vs Implicit Timeframes
 
 EXPLICIT timeframes make queries CLEAR:
-✅ "Show dining transactions from March" = CLEAR
-✅ "How much did I spend last month?" = CLEAR
-✅ "Transactions this week" = CLEAR
+"Show dining transactions from March" = CLEAR
+"How much did I spend last month?" = CLEAR
+"Transactions this week" = CLEAR
 
 IMPLICIT/MISSING timeframes make queries VAGUE:
-❌ "Show dining transactions" = VAGUE (all time? recent?)
-❌ "How much did I spend on groceries?" = VAGUE (what period?)
-❌ "What are my total expenses?" = VAGUE (lifetime? recent?)
+"Show dining transactions" = VAGUE (all time? recent?)
+"How much did I spend on groceries?" = VAGUE (what period?)
+"What are my total expenses?" = VAGUE (lifetime? recent?)
 
-*** DECISION FRAMEWORK ***
+### DECISION FRAMEWORK
 
 For each query, ask:
 
@@ -209,7 +195,7 @@ For each query, ask:
    - YES → CLEAR
    - NO → VAGUE
 
-*** EXAMPLES OF CORRECT CLASSIFICATION ***
+### EXAMPLES OF CORRECT CLASSIFICATION
 
 Example 1:
 Query: "How much on groceries?"
@@ -256,7 +242,7 @@ Analysis:
 - Decision: VAGUE
 - Clarifying question: "For what time period, and do you mean coffee shops only or all coffee purchases?"
 
-*** CRITICAL REMINDER ***
+### CRITICAL REMINDER
 
 When in doubt, prefer VAGUE over CLEAR:
 - It's better to ask for clarification than to make wrong assumptions
@@ -270,27 +256,22 @@ When in doubt, prefer VAGUE over CLEAR:
 # NEW INJECTION #1: MULTI-FILTER PRIMARY CATEGORY LOGIC
 #########################################################################
 
-def inject_show_me_multifilter_primary_logic():
-    """
-    NEW APPROVED INJECTION #1
-    
-    Fix: "Show me recent large purchases at coffee shops" should have UC-01 as primary
-    Problem: LLM returns UC-04 as primary (category-focused instead of retrieval-focused)
-    
-    Solution: Teach LLM the decision framework for single-focus vs multi-filter queries
-    """
-    return """
-================================
-PRIMARY CATEGORY LOGIC: SINGLE FOCUS vs MULTI-FILTER QUERIES
-================================
+# NEW APPROVED INJECTION #1
+#
+# Fix: "Show me recent large purchases at coffee shops" should have UC-01 as primary
+# Problem: LLM returns UC-04 as primary (category-focused instead of retrieval-focused)
+#
+# Solution: Teach LLM the decision framework for single-focus vs multi-filter queries
+_INJECT_SHOW_ME_MULTIFILTER_PRIMARY_LOGIC: Final[str] = """
+## PRIMARY CATEGORY LOGIC: SINGLE FOCUS vs MULTI-FILTER QUERIES
 
-*** CORE PRINCIPLE ***
+### CORE PRINCIPLE
 
 When determining which UC should be PRIMARY, consider whether the query has:
 1. SINGLE FOCUS - one dominant filter/aspect
 2. MULTI-FILTER - multiple equal conditions
 
-*** DECISION FRAMEWORK ***
+### DECISION FRAMEWORK
 
 SINGLE FOCUS QUERIES → Primary is the focus:
 
@@ -313,7 +294,7 @@ Example 3: "How much did I spend last month?"
 - Supporting: UC-03 (provides time filter)
 - Reasoning: Mathematical operation drives the query
 
-*** MULTI-FILTER QUERIES → UC-01 becomes primary ***
+### MULTI-FILTER QUERIES → UC-01 becomes primary
 
 When query combines MULTIPLE filter conditions (2 or more of: time, amount, category, account), 
 the PRIMARY intent shifts to COMPLEX RETRIEVAL (UC-01).
@@ -331,7 +312,7 @@ Example 5: "Show transactions above $100 from last week"
 - Supporting: UC-03 (time filter)
 - Reasoning: TWO conditions = retrieval with filtering
 
-*** KEY INSIGHT ***
+### KEY INSIGHT
 
 Single filter → that filter's UC is primary
 - "Show dining transactions" → UC-04 primary (category is the only filter)
@@ -341,7 +322,7 @@ Multiple filters → UC-01 (retrieval) becomes primary
 - "Show me recent large purchases at coffee shops" → UC-01 primary (retrieval with 3 filters)
 - Other UCs provide the filtering logic (UC-03 time, UC-04 category)
 
-*** WHY THIS MATTERS ***
+### WHY THIS MATTERS
 
 Primary category determines which UC drives the EXECUTION logic:
 
@@ -352,7 +333,7 @@ If UC-02 is primary → System focuses on aggregation calculations
 For multi-filter queries, retrieval with filtering (UC-01) is the dominant operation,
 while category/temporal logic are supporting filters.
 
-*** COMPARATIVE EXAMPLES ***
+### COMPARATIVE EXAMPLES
 
 | Query | Primary | Reasoning |
 |-------|---------|-----------|
@@ -362,7 +343,7 @@ while category/temporal logic are supporting filters.
 | "How much on groceries last month?" | UC-02 | Single focus: aggregation |
 | "Show transactions above $50 from last week at restaurants" | UC-01 | Multi-filter: retrieval |
 
-*** WHEN TO USE UC-01 AS PRIMARY ***
+### WHEN TO USE UC-01 AS PRIMARY
 
 Use UC-01 as primary when:
 1. Query uses "Show me" + multiple filter conditions
@@ -381,30 +362,25 @@ Do NOT use UC-01 as primary when:
 # NEW INJECTION #2: "THIS QUARTER" AMBIGUITY DETECTION
 #########################################################################
 
-def inject_quarter_ambiguity_detection():
-    """
-    NEW APPROVED INJECTION #2
-    
-    Fix: "This quarter" should be VAGUE, not CLEAR
-    Problem: LLM treats "this quarter" as deterministic (like "this month")
-    
-    Solution: Teach LLM that quarters have legitimate business ambiguity (calendar vs fiscal)
-    """
-    return """
-================================
-TEMPORAL AMBIGUITY: CALENDAR vs FISCAL QUARTERS
-================================
+# NEW APPROVED INJECTION #2
+#
+# Fix: "This quarter" should be VAGUE, not CLEAR
+# Problem: LLM treats "this quarter" as deterministic (like "this month")
+#
+# Solution: Teach LLM that quarters have legitimate business ambiguity (calendar vs fiscal)
+_INJECT_QUARTER_AMBIGUITY_DETECTION: Final[str] = """
+## TEMPORAL AMBIGUITY: CALENDAR vs FISCAL QUARTERS
 
-*** CORE PRINCIPLE ***
+### CORE PRINCIPLE
 
 Not all temporal references are deterministic. Some have MULTIPLE LEGITIMATE 
 business interpretations that different users genuinely mean differently.
 
-*** DETERMINISTIC TEMPORAL TERMS (CLEAR) ***
+### DETERMINISTIC TEMPORAL TERMS (CLEAR)
 
 These terms have ONE standard meaning:
 
-✅ CLEAR Terms:
+CLEAR Terms:
 - "this month" → Always current calendar month (Jan, Feb, Mar, etc.)
 - "last month" → Always previous calendar month
 - "this year" → Always current calendar year (Jan 1 - Dec 31)
@@ -415,11 +391,11 @@ These terms have ONE standard meaning:
 
 Why CLEAR: These terms have universal, standard definitions that don't vary by context.
 
-*** AMBIGUOUS TEMPORAL TERMS (VAGUE) ***
+### AMBIGUOUS TEMPORAL TERMS (VAGUE)
 
 These terms have MULTIPLE valid business interpretations:
 
-❌ VAGUE Term: "this quarter"
+VAGUE Term: "this quarter"
 
 Why VAGUE: "Quarter" has TWO legitimate business meanings:
 
@@ -440,7 +416,7 @@ Why VAGUE: "Quarter" has TWO legitimate business meanings:
      - Fiscal Q4 = April - June
    - Used by: Finance teams, corporate planning, earnings reports
 
-*** REAL-WORLD BUSINESS CONTEXT ***
+### REAL-WORLD BUSINESS CONTEXT
 
 This ambiguity is REAL and COMMON:
 
@@ -457,17 +433,17 @@ Scenario 2: Retail Customer
 Both interpretations are CORRECT in their contexts.
 The system CANNOT assume which one the user means.
 
-*** DECISION FRAMEWORK ***
+### DECISION FRAMEWORK
 
 Ask yourself: "Does this temporal reference have multiple LEGITIMATE business interpretations?"
 
-✅ Single interpretation → CLEAR
+Single interpretation → CLEAR
 - "this month" → Only one meaning → CLEAR
 
-❌ Multiple interpretations → VAGUE
+Multiple interpretations → VAGUE
 - "this quarter" → Calendar OR fiscal → VAGUE
 
-*** PATTERN RECOGNITION ***
+### PATTERN RECOGNITION
 
 CLEAR temporal references (deterministic):
 - Based on calendar (month, year, day, week)
@@ -480,7 +456,7 @@ VAGUE temporal references (require clarification):
 - "lately" → subjective timeframe
 - "soon" → subjective future timeframe
 
-*** HOW TO HANDLE "THIS QUARTER" ***
+### HOW TO HANDLE "THIS QUARTER"
 
 When user says "this quarter" WITHOUT additional context:
 
@@ -497,7 +473,7 @@ Step 4: After clarification
 - If user says "calendar quarter" → treat as deterministic temporal reference
 - If user says "fiscal quarter" → may need company's fiscal year start (but assume known)
 
-*** COMPARATIVE EXAMPLES ***
+### COMPARATIVE EXAMPLES
 
 | Term | Clarity | Reasoning |
 |------|---------|-----------|
@@ -508,7 +484,7 @@ Step 4: After clarification
 | "last 30 days" | CLEAR | Deterministic rolling window |
 | "recently" | VAGUE | Subjective, no standard definition |
 
-*** CRITICAL DISTINCTION ***
+### CRITICAL DISTINCTION
 
 "This quarter" vs "This month":
 
@@ -524,7 +500,7 @@ Step 4: After clarification
 - Genuine ambiguity
 → VAGUE
 
-*** WHY THIS MATTERS ***
+### WHY THIS MATTERS
 
 If system assumes wrong quarter definition:
 - User asks for fiscal Q1 (Jul-Sep)
@@ -541,30 +517,25 @@ Better to ask ONE clarifying question than to give wrong answer.
 # TEMPORAL RESOLUTION - LLM-1 CALCULATES EXACT DATES
 #########################################################################
 
-def inject_temporal_resolution():
-  # current_date = date.today().isoformat()   # PRODUCTION: Use real system date
-    current_date = "2025-12-01"                # For DEMO ONLY (with frozen data)! 
-    
-    
-    """
-    NEW APPROVED INJECTION #3
-    
-    Teach LLM-1 to calculate exact dates for temporal queries.
-    LLM-2 will use these pre-calculated dates directly (no temporal tool needed).
-    """
-    return f"""
-================================
-TEMPORAL RESOLUTION: CALCULATE EXACT DATES
-================================
+# Reference "today" for relative date resolution.
+# REFERENCE_DATE = date.today().isoformat()   # PRODUCTION: Use real system date
+REFERENCE_DATE: Final[str] = "2025-12-01"      # For DEMO ONLY (with frozen data)!
+
+# NEW APPROVED INJECTION #3
+#
+# Teach LLM-1 to calculate exact dates for temporal queries.
+# LLM-2 will use these pre-calculated dates directly (no temporal tool needed).
+_INJECT_TEMPORAL_RESOLUTION: Final[str] = f"""
+## TEMPORAL RESOLUTION: CALCULATE EXACT DATES
 
-*** CRITICAL NEW RESPONSIBILITY: YOU MUST CALCULATE EXACT DATES ***
+### CRITICAL NEW RESPONSIBILITY: YOU MUST CALCULATE EXACT DATES
 
 When a query involves temporal filtering, YOU MUST calculate exact start_date and end_date
 and populate the resolved_dates field in your output.
 
-Current date for calculations: {current_date}
+Current date for calculations: {REFERENCE_DATE}
 
-*** CALCULATION RULES ***
+### CALCULATION RULES
 
 1. "last X days":
    - Calculate X days before today
@@ -592,11 +563,11 @@ Current date for calculations: {current_date}
    - Example: "March" (today = Nov 22, 2025) → start: Mar 1 2025, end: Mar 31 2025
 
 7. VAGUE terms like "recent":
-   - Check conversation_summary.time_window
-   - If present, use its value (e.g., "last_7_days") and calculate dates
+   - If conversation_summary.time_window is set (e.g., "last_7_days") → CLEAR;
+     resolved_dates may be left null, the stored window is resolved automatically
    - If NOT present, mark query as VAGUE and ask for clarification
 
-*** RESOLVED_DATES FIELD ***
+### RESOLVED_DATES FIELD
 
 When temporal filtering is involved, populate this field:
 
@@ -608,7 +579,7 @@ When temporal filtering is involved, populate this field:
   }}
 }}
 
-*** EXAMPLES ***
+### EXAMPLES
 
 Example 1: Explicit temporal phrase
 Query: "Show me transactions from last 14 days"
@@ -622,20 +593,7 @@ Output:
   }}
 }}
 
-Example 2: Vague term WITH conversation_summary
-Query: "Show me recent transactions"
-conversation_summary.time_window.value = "last_7_days"
-Output:
-{{
-  "clarity": "CLEAR",
-  "resolved_dates": {{
-    "start_date": "2025-11-16",
-    "end_date": "2025-11-22",
-    "interpretation": "recent resolved as last_7_days from conversation_summary → Nov 16-22, 2025"
-  }}
-}}
-
-Example 3: Vague term WITHOUT conversation_summary
+Example 2: Vague term WITHOUT conversation_summary
 Query: "Show me recent transactions"
 conversation_summary = None or time_window not set
 Output:
@@ -646,7 +604,7 @@ Output:
   "resolved_dates": null
 }}
 
-*** WHEN TO POPULATE resolved_dates ***
+### WHEN TO POPULATE resolved_dates
 
 Populate resolved_dates when:
 - Query involves temporal filtering (UC-03 in core_use_cases)
@@ -658,7 +616,7 @@ Do NOT populate resolved_dates when:
 - Query has no temporal filtering (e.g., "What is my current balance?")
 - Temporal phrase is ambiguous and not in conversation_summary
 
-*** CRITICAL REMINDERS ***
+### CRITICAL REMINDERS
 
 - Date format: YYYY-MM-DD (ISO format)
 - Always include interpretation field explaining your calculation
@@ -677,24 +635,19 @@ Do NOT populate resolved_dates when:
 # CATEGORY RESOLUTION - LLM-1 RESOLVES CATEGORY IDs VIA RAG
 #########################################################################
 
-def inject_category_resolution():
-    """
-    Teach LLM-1 to resolve transaction category IDs via RAG lookup.
-    LLM-2 will use these pre-resolved category IDs directly.
-    """
-    return """
-================================
-CATEGORY RESOLUTION: RESOLVE TRANSACTION CATEGORY IDs
-================================
+# Teach LLM-1 to resolve transaction category IDs via RAG lookup.
+# LLM-2 will use these pre-resolved category IDs directly.
+_INJECT_CATEGORY_RESOLUTION: Final[str] = """
+## CATEGORY RESOLUTION: RESOLVE TRANSACTION CATEGORY IDs
 
-*** CRITICAL RESPONSIBILITY: RESOLVE CATEGORY TERMS TO IDs ***
+### CRITICAL RESPONSIBILITY: RESOLVE CATEGORY TERMS TO IDs
 
 When a query involves transaction categories (UC-04), YOU MUST:
 1. Call search_transaction_categories tool to resolve category terms
 2. Select the appropriate category level (GROUP vs SUBCATEGORY) based on user's term
 3. Populate the resolved_trn_categories field with your selection
 
-*** TOOL: search_transaction_categories ***
+### TOOL: search_transaction_categories
 
 Input format:
 {
@@ -725,7 +678,7 @@ Output format (CategoryMatch objects):
   }
 ]
 
-*** UNDERSTANDING TOOL OUTPUT ***
+### UNDERSTANDING TOOL OUTPUT
 
 - category_type: "group" = top-level category (e.g., CG800 Dining)
                  "subcategory" = specific category (e.g., C806 Cafes & Coffee Shops)
@@ -733,7 +686,7 @@ Output format (CategoryMatch objects):
 - distance: Lower = better match (0.0-0.4: excellent, 0.4-0.6: good)
 - confidence: "high" (distance < 0.4), "medium" (0.4-0.6), "low" (> 0.6)
 
-*** GROUP vs SUBCATEGORY SELECTION RULE ***
+### GROUP vs SUBCATEGORY SELECTION RULE
 
 When RAG returns BOTH a category group (CG*) AND subcategories (C*), you must choose the appropriate level based on the USER'S TERM:
 
@@ -767,7 +720,7 @@ Specific terms (use SUBCATEGORY):
 
 WHY: Specific terms target ONE type of merchant, not the whole group.
 
-*** DECISION PROCESS ***
+### DECISION PROCESS
 
 When RAG returns multiple results:
 
@@ -778,7 +731,7 @@ When RAG returns multiple results:
 3. Ignore distance ranking for this decision - semantic meaning matters more
 4. Include ONLY your selected category in resolved_trn_categories (not all RAG results)
 
-*** RESOLVED_TRN_CATEGORIES FIELD ***
+### RESOLVED_TRN_CATEGORIES FIELD
 
 Include only your SELECTED category (after applying GROUP vs SUBCATEGORY rule):
 
@@ -797,7 +750,164 @@ Include only your SELECTED category (after applying GROUP vs SUBCATEGORY rule):
   ]
 }
 
-*** EXAMPLES ***
+### WHEN TO POPULATE resolved_trn_categories
+
+POPULATE when:
+- Query involves category filtering (UC-04 in core_use_cases)
+- Tool returns matches with "high" or "medium" confidence
+- Clarity = CLEAR
+
+DO NOT POPULATE when:
+- Clarity = VAGUE (ambiguous category)
+- Query has no category filtering (e.g., "What is my balance?")
+- Tool returns "low" confidence matches only
+- Tool returns empty list (no matches)
+
+### CRITICAL REMINDERS
+
+- Call search_transaction_categories for EVERY category term in the query
+- Pass terms as a list: {"terms": ["term1", "term2"]}
+- Apply GROUP vs SUBCATEGORY rule BEFORE populating resolved_trn_categories
+- If confidence is "low", mark query as VAGUE and ask for clarification
+- LLM-2 will use category_id to filter transactions
+
+"""
+
+
+    
+
+# CRITICAL FIX: Enforce mandatory RAG call for UC-04 queries.
+# Prevents LLM-1 from hallucinating category IDs without RAG lookup.
+_INJECT_MANDATORY_RAG_ENFORCEMENT: Final[str] = """
+## MANDATORY RAG ENFORCEMENT (NON-NEGOTIABLE)
+
+When the user query contains ANY category-related term, you MUST take category IDs
+from RAG results:
+
+1. If the payload has category_candidates (RAG results pre-fetched for the detected
+   terms) covering every category term in the query → use them directly, no tool call
+2. Otherwise call search_transaction_categories for the terms not covered
+3. Use the category_id from RAG results in resolved_trn_categories
+4. ONLY THEN call the RouterOutput tool with your final decision
+
+### Category terms that trigger mandatory RAG
+
+ANY of these terms (or synonyms) in the query → MUST CALL RAG:
+- Food categories: dining, groceries, restaurants, coffee, fast food, cafes, food delivery
+- Health categories: healthcare, pharmacy, medical, gym, fitness, doctor
+- Transport categories: transportation, gas, parking, taxi, uber, lyft, transit
+- Bills categories: utilities, bills, electric, water, internet, phone
+- Shopping categories: shopping, retail, online shopping, electronics, clothing
+- Entertainment categories: entertainment, movies, streaming, games
+- ANY other spending category term
+
+### Never guess category IDs
+
+You do NOT know category IDs from memory. A RouterOutput for a category query
+without RAG results is INVALID (e.g., guessing "pharmacy" = C803 is wrong - C803 is
+Restaurants; RAG returns C302). Before calling RouterOutput: if a category term has no
+RAG result (category_candidates or tool call), call search_transaction_categories first.
+
+"""
+    
+#########################################################################
+# AMOUNT THRESHOLD RESOLUTION - LLM-1 RESOLVES AMOUNT THRESHOLDS
+#########################################################################
+
+# Teach LLM-1 to resolve amount thresholds from conversation_summary.
+# LLM-2 will use the pre-resolved threshold directly.
+_INJECT_AMOUNT_THRESHOLD_RESOLUTION: Final[str] = """
+## AMOUNT THRESHOLD RESOLUTION
+
+resolved_amount_threshold is a number (e.g., 100.0). Stored thresholds are copied in
+automatically after you respond, so you only decide clarity:
+- Explicit amount in the query ("above $200") → CLEAR, set resolved_amount_threshold to it
+- "large"/"big"/"small" AND conversation_summary.amount_threshold_large is set → CLEAR
+  (resolved_amount_threshold may be left null)
+- "large"/"big"/"small" with no threshold anywhere → VAGUE, missing_info ["amount_threshold"]
+- Query has no amount filtering → resolved_amount_threshold null
+
+"""
+    
+#########################################################################
+# MULTITURN CLARIFICATION HANDLING
+#########################################################################
+
+# Guide LLM-1 on how to handle Turn 2 responses where user answers clarification questions.
+#
+# Critical for properly:
+# - Understanding short user answers in context
+# - Extracting preferences from clarification responses
+# - Generating summary_update objects
+# - Reclassifying the ORIGINAL query as CLEAR with complete information
+_INJECT_MULTITURN_CLARIFICATION_HANDLING: Final[str] = """
+## MULTI-TURN CLARIFICATION HANDLING (TURN 2 RESPONSES)
+
+### CONTEXT
+
+In multi-turn conversations, you'll receive conversation history showing:
+- Turn 1: Original user query (VAGUE)
+- Turn 1: Your clarifying question
+- Turn 2: User's answer to your clarifying question
+
+Your job in Turn 2:
+1. Understand the user's short answer in context
+2. Extract the preference/value from their answer
+3. Reclassify the ORIGINAL Turn 1 query as CLEAR with complete information
+4. Generate summary_update to store the preference
+
+### TURN 2 PROCESSING STEPS
+
+1. UNDERSTAND THE CONTEXT:
+   - Look at conversation history
+   - Identify what you asked in Turn 1
+   - Interpret Turn 2 answer in that context
+
+2. EXTRACT THE PREFERENCE VALUE:
+   - User answer: "Last month" → Extract: time_window = "last_month"
+   - User answer: "Above $100" → Extract: amount_threshold_large = 100
+   - User answer: "Just cafes" → Extract: category_preferences["coffee_spending"] = "cafes_only"
+
+3. RECLASSIFY THE ORIGINAL QUERY AS CLEAR:
+   - Set clarity = "CLEAR"
+   - Classify the ORIGINAL Turn 1 query with the now-complete information
+   - Use appropriate UC categories (UC-02, UC-03, UC-04, etc.)
+
+4. GENERATE summary_update:
+   
+   MANDATORY: YOU MUST ALWAYS GENERATE summary_update IN TURN 2
+   
+   Structure (simple values - RECOMMENDED):
+   {
+     "time_window": "last_month",
+     "amount_threshold_large": 100,
+     "category_preferences": {
+       "coffee_spending": "cafes_only"
+     }
+   }
+
+5. SET APPROPRIATE METADATA:
+   - clarity_reason: Explain that user clarified the missing information
+   - router_notes: Note that this continues from the previous conversation
+
+### CRITICAL REMINDER
+- ALWAYS generate summary_update when user answers a clarification question
+- Use simple values in summary_update (the system will add metadata automatically)
+- Never return null for summary_update in Turn 2 clarification responses
+
+"""
+
+
+#########################################################################
+# FEW-SHOT EXAMPLE BANK - SELECTED PER QUERY, NOT PART OF THE SYSTEM PROMPT
+#########################################################################
+
+# Worked examples cost tokens on every router call, so they live outside the
+# system prompt and are attached to the user message only when their trigger
+# fires (see select_examples()).
+
+_CATEGORY_RESOLUTION_EXAMPLES: Final[str] = """
+### EXAMPLES
 
 Example 1: BROAD term - select GROUP
 Query: "How much did I spend on dining last month?"
@@ -947,78 +1057,10 @@ Output:
   "missing_info": ["trn_category_scope"],
   "resolved_trn_categories": null
 }
-
-*** WHEN TO POPULATE resolved_trn_categories ***
-
-POPULATE when:
-- Query involves category filtering (UC-04 in core_use_cases)
-- Tool returns matches with "high" or "medium" confidence
-- Clarity = CLEAR
-
-DO NOT POPULATE when:
-- Clarity = VAGUE (ambiguous category)
-- Query has no category filtering (e.g., "What is my balance?")
-- Tool returns "low" confidence matches only
-- Tool returns empty list (no matches)
-
-*** CRITICAL REMINDERS ***
-
-- Call search_transaction_categories for EVERY category term in the query
-- Pass terms as a list: {"terms": ["term1", "term2"]}
-- Apply GROUP vs SUBCATEGORY rule BEFORE populating resolved_trn_categories
-- Distance score tells you SIMILARITY, not CORRECTNESS - semantic meaning matters more
-- If confidence is "low", mark query as VAGUE and ask for clarification
-- LLM-2 will use category_id to filter transactions
-
 """
 
-
-    
-# Add this new function after inject_category_resolution() (around line 878)
-
-def inject_mandatory_rag_enforcement():
-    """
-    CRITICAL FIX: Enforce mandatory RAG call for UC-04 queries.
-    Prevents LLM-1 from hallucinating category IDs without RAG lookup.
-    """
-    return """
-================================
-🚨 MANDATORY RAG ENFORCEMENT - CRITICAL RULE 🚨
-================================
-
-*** THIS RULE IS NON-NEGOTIABLE ***
-
-When the user query contains ANY category-related term, you MUST:
-
-1. FIRST call search_transaction_categories tool
-2. THEN use the category_id from RAG results in resolved_trn_categories
-3. ONLY THEN produce your final RouterOutput JSON
-
-*** CATEGORY TERMS THAT TRIGGER MANDATORY RAG ***
-
-ANY of these terms (or synonyms) in the query → MUST CALL RAG:
-- Food categories: dining, groceries, restaurants, coffee, fast food, cafes, food delivery
-- Health categories: healthcare, pharmacy, medical, gym, fitness, doctor
-- Transport categories: transportation, gas, parking, taxi, uber, lyft, transit
-- Bills categories: utilities, bills, electric, water, internet, phone
-- Shopping categories: shopping, retail, online shopping, electronics, clothing
-- Entertainment categories: entertainment, movies, streaming, games
-- ANY other spending category term
-
-*** WHAT HAPPENS IF YOU SKIP RAG ***
-
-❌ If you produce RouterOutput without calling RAG when a category term is present:
-   - Your response is INVALID
-   - You will return wrong category IDs
-   - The user will get incorrect results
-
-✅ Correct behavior:
-   1. Detect category term in query (e.g., "pharmacy", "dining", "gym")
-   2. Call search_transaction_categories({"terms": ["pharmacy"]})
-   3. Use the returned category_id in resolved_trn_categories
-   4. Produce final RouterOutput with accurate category mapping
-
-*** EXAMPLES OF MANDATORY RAG CALLS ***
+_MANDATORY_RAG_EXAMPLES: Final[str] = """
+### EXAMPLES OF MANDATORY RAG CALLS
 
 Query: "Show me my last pharmacy transaction"
 Step 1: Detect "pharmacy" → category term present → MUST call RAG
@@ -1035,53 +1077,10 @@ Step 4: Produce RouterOutput
 Query: "What is my current balance?"
 Step 1: No category term detected → RAG not required
 Step 2: Produce RouterOutput directly
-
-*** NEVER GUESS CATEGORY IDs ***
-
-You do NOT know category IDs from memory. Always verify via RAG:
-- ❌ WRONG: Assume "pharmacy" = C803 (this is Restaurants!)
-- ✅ RIGHT: Call RAG → RAG returns C302 → use C302
-
-*** SELF-CHECK BEFORE PRODUCING ROUTEROUTPUT ***
-
-Before outputting your final JSON, verify:
-□ Did the query contain a category term?
-□ If YES, did I call search_transaction_categories?
-□ If YES, did I use the RAG result in resolved_trn_categories?
-
-If any answer is NO for a category query → GO BACK AND CALL RAG FIRST.
-
 """
-    
-#########################################################################
-# AMOUNT THRESHOLD RESOLUTION - LLM-1 RESOLVES AMOUNT THRESHOLDS
-#########################################################################
-
-def inject_amount_threshold_resolution():
-    """
-    Teach LLM-1 to resolve amount thresholds from conversation_summary.
-    LLM-2 will use the pre-resolved threshold directly.
-    """
-    return """
-================================
-AMOUNT THRESHOLD RESOLUTION
-================================
-
-*** CRITICAL RESPONSIBILITY: RESOLVE AMOUNT THRESHOLDS ***
-
-When a query involves amount filtering (e.g., "large purchases"), YOU MUST:
-1. Check conversation_summary.amount_threshold_large
-2. Populate the resolved_amount_threshold field with the value
-
-*** RESOLVED_AMOUNT_THRESHOLD FIELD ***
-
-When amount filtering is involved, populate this field:
-
-{
-  "resolved_amount_threshold": 100.0
-}
 
-*** EXAMPLES ***
+_AMOUNT_THRESHOLD_EXAMPLES: Final[str] = """
+### EXAMPLES
 
 Example 1: Amount threshold from conversation_summary
 Query: "Show me large purchases"
@@ -1102,184 +1101,227 @@ Output:
   "missing_info": ["amount_threshold"],
   "resolved_amount_threshold": null
 }
-
-*** WHEN TO POPULATE resolved_amount_threshold ***
-
-Populate resolved_amount_threshold when:
-- Query involves amount filtering ("large", "big", "small", "above $X")
-- Threshold is explicit in query OR available in conversation_summary
-- Clarity = CLEAR
-
-Do NOT populate resolved_amount_threshold when:
-- Clarity = VAGUE (missing threshold)
-- Query has no amount filtering
-
 """
-    
-#########################################################################
-# MULTITURN CLARIFICATION HANDLING
-#########################################################################
 
-def inject_multiturn_clarification_handling():
-    """
-    Guide LLM-1 on how to handle Turn 2 responses where user answers clarification questions.
-    
-    Critical for properly:
-    - Understanding short user answers in context
-    - Extracting preferences from clarification responses
-    - Generating summary_update objects
-    - Reclassifying the ORIGINAL query as CLEAR with complete information
-    """
-    return """
-================================
-MULTI-TURN CLARIFICATION HANDLING (TURN 2 RESPONSES)
-================================
-
-*** CONTEXT ***
-
-In multi-turn conversations, you'll receive conversation history showing:
-- Turn 1: Original user query (VAGUE)
-- Turn 1: Your clarifying question
-- Turn 2: User's answer to your clarifying question
-
-Your job in Turn 2:
-1. Understand the user's short answer in context
-2. Extract the preference/value from their answer
-3. Reclassify the ORIGINAL Turn 1 query as CLEAR with complete information
-4. Generate summary_update to store the preference
-
-*** TURN 2 PROCESSING STEPS ***
-
-1. UNDERSTAND THE CONTEXT:
-   - Look at conversation history
-   - Identify what you asked in Turn 1
-   - Interpret Turn 2 answer in that context
-
-2. EXTRACT THE PREFERENCE VALUE:
-   - User answer: "Last month" → Extract: time_window = "last_month"
-   - User answer: "Above $100" → Extract: amount_threshold_large = 100
-   - User answer: "Just cafes" → Extract: category_preferences["coffee_spending"] = "cafes_only"
-
-3. RECLASSIFY THE ORIGINAL QUERY AS CLEAR:
-   - Set clarity = "CLEAR"
-   - Classify the ORIGINAL Turn 1 query with the now-complete information
-   - Use appropriate UC categories (UC-02, UC-03, UC-04, etc.)
-
-4. GENERATE summary_update:
-   
-   *** THIS IS MANDATORY - YOU MUST ALWAYS GENERATE summary_update IN TURN 2 ***
-   
-   Structure (simple values - RECOMMENDED):
-   {
-     "time_window": "last_month",
-     "amount_threshold_large": 100,
-     "category_preferences": {
-       "coffee_spending": "cafes_only"
-     }
-   }
-
-5. SET APPROPRIATE METADATA:
-   - clarity_reason: Explain that user clarified the missing information
-   - router_notes: Note that this continues from the previous conversation
-
-*** EXAMPLES OF TURN 2 RESPONSES ***
-
-Example 1: Time Window Clarification
+# Turn-2 examples share one RouterOutput shape; only the values below differ.
+_TURN_2_EXAMPLE_SKELETON: Final[str] = """Example {n}: {title}
 Conversation History:
-- User: "Show me recent transactions"
-- Assistant: "What timeframe do you mean by 'recent'?"
-- User: "Last 30 days"
+- User: "{turn1_query}"
+- Assistant: "{clarifying_question}"
+- User: "{user_answer}"
 
 YOUR TURN 2 RESPONSE:
-{
+{{
   "clarity": "CLEAR",
-  "core_use_cases": ["UC-03", "UC-01"],
-  "uc_operations": {
-    "UC-01": ["list_transactions"],
-    "UC-02": [],
-    "UC-03": ["temporal_filter_last_30_days"],
-    "UC-04": [],
+  "core_use_cases": {core_use_cases},
+  "uc_operations": {{
+    "UC-01": {uc01},
+    "UC-02": {uc02},
+    "UC-03": {uc03},
+    "UC-04": {uc04},
     "UC-05": []
-  },
-  "primary_use_case": "UC-03",
-  "complexity_axes": ["temporal"],
-  "needed_tools": ["query_transactions", "get_date_range"],
+  }},
+  "primary_use_case": "{primary_use_case}",
+  "complexity_axes": {complexity_axes},
+  "needed_tools": {needed_tools},
   "clarifying_question": null,
   "missing_info": [],
-  "summary_update": {
-    "time_window": "last_30_days"
-  },
+  "summary_update": {{
+    {summary_update}
+  }},
   "uc_confidence": "high",
-  "clarity_reason": "User clarified 'recent' means last 30 days",
-  "router_notes": "Continuing from clarification - user defined time window preference"
-}
+  "clarity_reason": "{clarity_reason}",
+  "router_notes": "{router_notes}"
+}}"""
 
-Example 2: Amount Threshold Clarification
-Conversation History:
-- User: "Show me large purchases"
-- Assistant: "What amount would you consider a 'large' purchase?"
-- User: "Above $100"
+_TURN_2_EXAMPLE_VARIANTS: Final[List[Dict[str, Any]]] = [
+    {
+        "title": "Time Window Clarification",
+        "turn1_query": "Show me recent transactions",
+        "clarifying_question": "What timeframe do you mean by 'recent'?",
+        "user_answer": "Last 30 days",
+        "core_use_cases": ["UC-03", "UC-01"],
+        "uc_operations": {"UC-01": ["list_transactions"], "UC-03": ["temporal_filter_last_30_days"]},
+        "primary_use_case": "UC-03",
+        "complexity_axes": ["temporal"],
+        "needed_tools": ["query_transactions", "get_date_range"],
+        "summary_update": {"time_window": "last_30_days"},
+        "clarity_reason": "User clarified 'recent' means last 30 days",
+        "router_notes": "Continuing from clarification - user defined time window preference",
+    },
+    {
+        "title": "Amount Threshold Clarification",
+        "turn1_query": "Show me large purchases",
+        "clarifying_question": "What amount would you consider a 'large' purchase?",
+        "user_answer": "Above $100",
+        "core_use_cases": ["UC-01"],
+        "uc_operations": {"UC-01": ["list_transactions_with_filter"]},
+        "primary_use_case": "UC-01",
+        "complexity_axes": [],
+        "needed_tools": ["query_transactions"],
+        "summary_update": {"amount_threshold_large": 100},
+        "clarity_reason": "User defined 'large' as purchases above $100",
+        "router_notes": "Continuing from clarification - user defined threshold preference",
+    },
+    {
+        "title": 'Timeframe for Aggregation (like "How much on groceries?" → "Last month")',
+        "turn1_query": "How much on groceries?",
+        "clarifying_question": "For what time period would you like to know your grocery spending?",
+        "user_answer": "Last month",
+        "core_use_cases": ["UC-02", "UC-03", "UC-04"],
+        "uc_operations": {
+            "UC-02": ["sum_spending_single_period_by_category"],
+            "UC-03": ["temporal_interpretation"],
+            "UC-04": ["category_mapping"],
+        },
+        "primary_use_case": "UC-02",
+        "complexity_axes": ["temporal", "category"],
+        "needed_tools": ["query_transactions", "get_date_range", "search_transaction_categories"],
+        "summary_update": {"time_window": "last_month"},
+        "clarity_reason": "User specified timeframe as 'last month' for grocery spending query",
+        "router_notes": "Continuing from clarification - original VAGUE query now CLEAR with timeframe",
+    },
+]
 
-YOUR TURN 2 RESPONSE:
-{
-  "clarity": "CLEAR",
-  "core_use_cases": ["UC-01"],
-  "uc_operations": {
-    "UC-01": ["list_transactions_with_filter"],
-    "UC-02": [],
-    "UC-03": [],
-    "UC-04": [],
-    "UC-05": []
-  },
-  "primary_use_case": "UC-01",
-  "complexity_axes": [],
-  "needed_tools": ["query_transactions"],
-  "clarifying_question": null,
-  "missing_info": [],
-  "summary_update": {
-    "amount_threshold_large": 100
-  },
-  "uc_confidence": "high",
-  "clarity_reason": "User defined 'large' as purchases above $100",
-  "router_notes": "Continuing from clarification - user defined threshold preference"
-}
 
-Example 3: Timeframe for Aggregation (like "How much on groceries?" → "Last month")
-Conversation History:
-- User: "How much on groceries?"
-- Assistant: "For what time period would you like to know your grocery spending?"
-- User: "Last month"
+def _render_turn_2_example(n: int, variant: Dict[str, Any]) -> str:
+    """Fill the Turn-2 skeleton with one variant (lists/values JSON-encoded)."""
+    ops = variant["uc_operations"]
+    return _TURN_2_EXAMPLE_SKELETON.format_map({
+        **variant,
+        "n": n,
+        "core_use_cases": json.dumps(variant["core_use_cases"]),
+        "uc01": json.dumps(ops.get("UC-01", [])),
+        "uc02": json.dumps(ops.get("UC-02", [])),
+        "uc03": json.dumps(ops.get("UC-03", [])),
+        "uc04": json.dumps(ops.get("UC-04", [])),
+        "complexity_axes": json.dumps(variant["complexity_axes"]),
+        "needed_tools": json.dumps(variant["needed_tools"]),
+        "summary_update": ",\n    ".join(
+            f"{json.dumps(k)}: {json.dumps(v)}" for k, v in variant["summary_update"].items()
+        ),
+    })
+
+
+_TURN_2_EXAMPLES: Final[str] = (
+    "\n### EXAMPLES OF TURN 2 RESPONSES\n\n"
+    + "\n\n".join(_render_turn_2_example(n, v) for n, v in enumerate(_TURN_2_EXAMPLE_VARIANTS, 1))
+    + "\n"
+)
+
+_EXAMPLE_BANK: Final[Dict[str, List[str]]] = {
+    "turn_2": [_TURN_2_EXAMPLES],
+    "category_term_present": [_MANDATORY_RAG_EXAMPLES, _CATEGORY_RESOLUTION_EXAMPLES],
+    "amount_threshold": [_AMOUNT_THRESHOLD_EXAMPLES],
+}
 
-YOUR TURN 2 RESPONSE:
-{
-  "clarity": "CLEAR",
-  "core_use_cases": ["UC-02", "UC-03", "UC-04"],
-  "uc_operations": {
-    "UC-01": [],
-    "UC-02": ["sum_spending_single_period_by_category"],
-    "UC-03": ["temporal_interpretation"],
-    "UC-04": ["category_mapping"],
-    "UC-05": []
-  },
-  "primary_use_case": "UC-02",
-  "complexity_axes": ["temporal", "category"],
-  "needed_tools": ["query_transactions", "get_date_range", "search_transaction_categories"],
-  "clarifying_question": null,
-  "missing_info": [],
-  "summary_update": {
-    "time_window": "last_month"
-  },
-  "uc_confidence": "high",
-  "clarity_reason": "User specified timeframe as 'last month' for grocery spending query",
-  "router_notes": "Continuing from clarification - original VAGUE query now CLEAR with timeframe"
+# Category vocabulary from the MANDATORY RAG ENFORCEMENT section: term -> group.
+# Synonyms go here too; the detector below is rebuilt from this table at import.
+CATEGORY_TERMS: Final[Dict[str, str]] = {
+    # Food
+    "dining": "food", "groceries": "food", "grocery": "food", "restaurant": "food",
+    "restaurants": "food", "coffee": "food", "coffee shop": "food", "coffee shops": "food",
+    "fast food": "food", "cafe": "food", "cafes": "food", "food delivery": "food",
+    # Health
+    "healthcare": "health", "pharmacy": "health", "medical": "health", "gym": "health",
+    "fitness": "health", "doctor": "health",
+    # Transport
+    "transportation": "transport", "gas": "transport", "gas station": "transport",
+    "parking": "transport", "taxi": "transport", "uber": "transport", "lyft": "transport",
+    "transit": "transport",
+    # Bills
+    "utilities": "bills", "bill": "bills", "bills": "bills", "electric": "bills",
+    "water": "bills", "internet": "bills", "phone": "bills",
+    # Shopping
+    "shopping": "shopping", "retail": "shopping", "online shopping": "shopping",
+    "electronics": "shopping", "clothing": "shopping",
+    # Entertainment
+    "entertainment": "entertainment", "movies": "entertainment", "streaming": "entertainment",
+    "games": "entertainment",
 }
 
-*** CRITICAL REMINDER ***
-- ALWAYS generate summary_update when user answers a clarification question
-- Use simple values in summary_update (the system will add metadata automatically)
-- Never return null for summary_update in Turn 2 clarification responses
+# One alternation over all terms, longest first, so a single left-to-right scan
+# prefers "coffee shops" over "coffee" and "online shopping" over "shopping"
+_CATEGORY_TERM_RE = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(t) for t in sorted(CATEGORY_TERMS, key=len, reverse=True))
+    + r")\b",
+    re.IGNORECASE,
+)
 
-"""
+
+def detect_category_terms(query: str) -> List[Tuple[int, str, str]]:
+    """
+    Find category terms in a query in one pass.
+    
+    Returns:
+        List of (start_offset, matched_term, category_group), in query order.
+        Example: "Show coffee shop spending" -> [(5, "coffee shop", "food")]
+    """
+    return [
+        (m.start(), m.group(0).lower(), CATEGORY_TERMS[m.group(0).lower()])
+        for m in _CATEGORY_TERM_RE.finditer(query)
+    ]
+
+
+_AMOUNT_TERM_RE = re.compile(
+    r"\b(large|big|small|expensive|cheap|above|over|under|below|more than|less than)\b|\$\s?\d",
+    re.IGNORECASE,
+)
+
+
+def mentions_amount_qualifier(text: str) -> bool:
+    """True if text has an amount qualifier ("large", "above $100", ...)."""
+    return _AMOUNT_TERM_RE.search(text) is not None
+
+
+def select_examples(
+    user_query: str,
+    raw_messages: Optional[List[Dict[str, Any]]] = None,
+) -> List[str]:
+    """
+    Pick the few-shot examples relevant to this router call.
+    
+    Cheap heuristic gate before the LLM call:
+    - "turn_2": history contains an assistant turn (user is answering a clarifying question)
+    - "category_term_present": query mentions a spending category
+    - "amount_threshold": query mentions an amount qualifier ("large", "above $100")
+    
+    Returns:
+        List of example blocks (empty for plain queries like "What is my balance?")
+    """
+    raw_messages = raw_messages or []
+    
+    # In Turn 2 the user_query is the short answer; the category/amount terms
+    # usually live in the original Turn 1 question, so scan user history too
+    user_text = " ".join(
+        [m["content"] for m in raw_messages
+         if m.get("role") == "user" and isinstance(m.get("content"), str)]
+        + [user_query]
+    )
+    
+    triggers = []
+    if any(m.get("role") == "assistant" for m in raw_messages):
+        triggers.append("turn_2")
+    if detect_category_terms(user_text):
+        triggers.append("category_term_present")
+    if mentions_amount_qualifier(user_text):
+        triggers.append("amount_threshold")
+    
+    examples = []
+    for trigger in triggers:
+        examples.extend(_EXAMPLE_BANK[trigger])
+    return examples
+
+
+def format_examples_block(examples: List[str]) -> str:
+    """Render selected examples as a text block appended after the router payload."""
+    if not examples:
+        return ""
+    return (
+        "## RELEVANT EXAMPLES (reference only - classify the user_query above)\n\n"
+        + "\n".join(examples)
+    )
 
 
 #########################################################################
@@ -1292,6 +1334,8 @@ You are LLM-1: Router & Clarifier for a personal financial assistant.
 You receive:
 - user_query: the user's natural-language question about their personal finances.
 - conversation_summary: optional session-scoped preferences (time_window, amount_threshold_large, account_scope, category_preferences).
+- category_candidates: optional RAG results (search_transaction_categories output) pre-fetched for category terms detected in the query.
+- Optionally, RELEVANT EXAMPLES after the JSON payload: worked examples for this kind of query (reference only).
 
 Your job is to:
 1) Decide whether the query is CLEAR or VAGUE.
@@ -1301,11 +1345,9 @@ Your job is to:
 5) For VAGUE queries, ask ONE clarifying question and list what information is missing.
 6) When the user clearly sets or overrides a preference, produce a summary_update object that describes the new preference value.
 
-================================
-CRITICAL: UC-01 vs UC-02 DISTINCTION
-================================
+## CRITICAL: UC-01 vs UC-02 DISTINCTION
 
-*** MEMORIZE THESE RULES ***
+### MEMORIZE THESE RULES
 
 UC-01 = DIRECT LOOKUP (no aggregation):
 - "What is my current balance?" → SINGLE value from account
@@ -1318,28 +1360,24 @@ UC-02 = AGGREGATION (sum/count/average over multiple transactions):
 - "What's my average..." → AVERAGE of amounts
 - "What's my total income..." → SUM of income transactions
 
-*** IF THE QUERY ASKS "HOW MUCH DID I SPEND" OR "HOW MUCH DID I EARN" OR "WHAT'S MY TOTAL" → IT IS ALWAYS UC-02, NEVER UC-01 ***
+### IF THE QUERY ASKS "HOW MUCH DID I SPEND" OR "HOW MUCH DID I EARN" OR "WHAT'S MY TOTAL" → IT IS ALWAYS UC-02, NEVER UC-01
 
-================================
-HARD CONSTRAINTS - TOOL VOCABULARY
-================================
+## HARD CONSTRAINTS - TOOL VOCABULARY
 
-*** YOU MUST ONLY USE THESE EXACT TOOL NAMES ***
+### YOU MUST ONLY USE THESE EXACT TOOL NAMES
 
 Allowed tools (copy exactly):
 - "query_transactions"
 - "search_transaction_categories"
 
-*** NEVER USE: get_date_range, get_categories_kb, transaction_search, date_parser, category_matcher, sum_calculator, account_lookup, or ANY other names ***
+### NEVER USE: get_date_range, get_categories_kb, transaction_search, date_parser, category_matcher, sum_calculator, account_lookup, or ANY other names
 IMPORTANT: You do NOT need get_date_range anymore because you calculate dates yourself and populate resolved_dates field!
 
 If no tools needed → empty list []
 
-================================
-MULTI-CATEGORY DETECTION RULES
-================================
+## MULTI-CATEGORY DETECTION RULES
 
-*** CRITICAL: Many queries involve MULTIPLE UC categories ***
+### CRITICAL: Many queries involve MULTIPLE UC categories
 
 Examples of Multi-Category Queries:
 
@@ -1355,7 +1393,7 @@ Examples of Multi-Category Queries:
    → UC-02 (aggregation) + UC-03 (temporal)
    → Primary: UC-02 (aggregation drives execution)
 
-*** HOW TO DETERMINE PRIMARY CATEGORY ***
+### HOW TO DETERMINE PRIMARY CATEGORY
 
 The primary_use_case is the UC that drives the MAIN execution logic:
 
@@ -1365,93 +1403,190 @@ The primary_use_case is the UC that drives the MAIN execution logic:
 - If query is direct lookup → UC-01 is primary
 - If query is ambiguous → UC-05 is primary (clarification needed)
 
-================================
-OUTPUT FORMAT
-================================
+## OUTPUT FORMAT
 
-You MUST return a valid JSON object with this EXACT structure:
+Return your decision by calling the RouterOutput tool; its input schema is the output contract.
+Call search_transaction_categories first whenever category resolution is needed.
+"""
 
-{
-  "clarity": "CLEAR" or "VAGUE",
-  "core_use_cases": ["UC-01", "UC-02", ...],
-  "uc_operations": {
-    "UC-01": ["subtype1", "subtype2"],
-    "UC-02": ["subtype1"],
-    "UC-03": [],
-    "UC-04": [],
-    "UC-05": []
-  },
-  "primary_use_case": "UC-01" or "UC-02" or "UC-03" or "UC-04" or "UC-05" or null,
-  "complexity_axes": ["temporal", "category", "ambiguity"],
-  "needed_tools": ["query_transactions", "get_date_range"],
-  "clarifying_question": "Question text here" or null,
-  "missing_info": ["time_window", "amount_threshold_large"],
-  "summary_update": {
-    "time_window": "last_month",
-    "amount_threshold_large": 100
-  } or null,
-  "uc_confidence": "high" or "medium" or "low",
-  "clarity_reason": "Explanation of clarity decision",
-  "router_notes": "Internal notes for debugging"
-}
 
-CRITICAL RULES:
-- Return ONLY valid JSON, nothing else
-- No markdown, no code blocks, no extra text
-- All fields must be present
-- Use exact field names and types as shown
-"""
+# Insertion point for the injections, resolved once at import.
+# BASE_ROUTER_SYSTEM_PROMPT has no FEW-SHOT EXAMPLES section (examples are
+# selected per query), so the injections go right before OUTPUT FORMAT.
+_INSERTION_ANCHOR: Final[str] = "## OUTPUT FORMAT"
+_INSERTION_POINT: Final[int] = BASE_ROUTER_SYSTEM_PROMPT.find(_INSERTION_ANCHOR)
+assert _INSERTION_POINT != -1, f"Router prompt anchor not found: {_INSERTION_ANCHOR!r}"
 
 
-def create_optimized_router_prompt():
+@lru_cache(maxsize=1)
+def create_optimized_router_prompt() -> str:
     """
-    Inject all optimization functions into the main prompt.
+    Inject all optimization blocks into the main prompt.
     
-    UPDATED: Now includes TWO NEW APPROVED injections:
-    - inject_show_me_multifilter_primary_logic() for multi-filter queries
-    - inject_quarter_ambiguity_detection() for "this quarter" ambiguity
+    The injections are module-level constants, so this is pure string assembly:
+    one join over [base prefix, *injections, base suffix] at the precomputed
+    _INSERTION_POINT. Memoized: built once at import, later calls return the
+    same string object.
     """
-    base_prompt = BASE_ROUTER_SYSTEM_PROMPT
-    
-    # Insert optimizations after the main rules but before examples
-    optimizations = [
-        inject_incomplete_context_handling(),
-        inject_show_vs_aggregation_logic(),
-        inject_temporal_vs_direct_listing(),
-        inject_refined_vagueness_detection(),
-        inject_show_me_multifilter_primary_logic(),  # ← NEW APPROVED INJECTION #1
-        inject_quarter_ambiguity_detection(),        # ← NEW APPROVED INJECTION #2
-        inject_temporal_resolution(),                # ← NEW APPROVED INJECTION #3
-        inject_category_resolution(),
-        inject_mandatory_rag_enforcement(),
-        inject_amount_threshold_resolution(),        # ← NEW
-        inject_multiturn_clarification_handling(),
-    ]
+    optimizations = (
+        _INJECT_INCOMPLETE_CONTEXT_HANDLING,
+        _INJECT_SHOW_VS_AGGREGATION_LOGIC,
+        _INJECT_TEMPORAL_VS_DIRECT_LISTING,
+        _INJECT_REFINED_VAGUENESS_DETECTION,
+        _INJECT_SHOW_ME_MULTIFILTER_PRIMARY_LOGIC,
+        _INJECT_QUARTER_AMBIGUITY_DETECTION,
+        _INJECT_TEMPORAL_RESOLUTION,
+        _INJECT_CATEGORY_RESOLUTION,
+        _INJECT_MANDATORY_RAG_ENFORCEMENT,
+        _INJECT_AMOUNT_THRESHOLD_RESOLUTION,
+        _INJECT_MULTITURN_CLARIFICATION_HANDLING,
+    )
     
-    # Find insertion point (before FEW-SHOT EXAMPLES)
-    insertion_point = base_prompt.find("================================\nFEW-SHOT EXAMPLES")
+    # Injections are "\n"-separated and followed by "\n" before the suffix
+    parts = [BASE_ROUTER_SYSTEM_PROMPT[:_INSERTION_POINT]]
+    for block in optimizations:
+        parts.append(block)
+        parts.append("\n")
+    parts.append(BASE_ROUTER_SYSTEM_PROMPT[_INSERTION_POINT:])
     
-    if insertion_point == -1:
-        # Fallback: insert before OUTPUT FORMAT
-        insertion_point = base_prompt.find("================================\nOUTPUT FORMAT")
+    return "".join(parts)
+
+
+############################################################################################
+# TERSE RENDERING
+############################################################################################
+# Explanatory / worked-example subsections: frontier models follow the rules
+# without them. Every "##" rule section and its decision rules are kept.
+_TERSE_DROP_SECTIONS: Final[frozenset] = frozenset({
+    "EXAMPLES",
+    "EXAMPLES OF CORRECT CLASSIFICATION",
+    "COMPARATIVE EXAMPLES",
+    "KEY INSIGHT",
+    "WHY THIS MATTERS",
+    "REAL-WORLD BUSINESS CONTEXT",
+    "CRITICAL REMINDER",
+})
+
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+
+@lru_cache(maxsize=2)
+def render_router_prompt(verbosity: str = "verbose") -> str:
+    """
+    Render the router system prompt at the requested verbosity.
     
-    if insertion_point == -1:
-        # Last fallback: append to end
-        return base_prompt + "\n".join(optimizations)
+    - "verbose": full prose prompt (create_optimized_router_prompt()), for
+      weaker / local models
+    - "terse": same rules, without the example and rationale subsections
+      listed in _TERSE_DROP_SECTIONS, for Claude / GPT-4-class models
+    """
+    prompt = create_optimized_router_prompt()
+    if verbosity == "verbose":
+        return prompt
+    if verbosity != "terse":
+        raise ValueError(f"Unknown router prompt verbosity: {verbosity!r}")
     
-    # Insert optimizations
-    optimized_prompt = (
-        base_prompt[:insertion_point] + 
-        "\n".join(optimizations) + 
-        "\n" + 
-        base_prompt[insertion_point:]
-    )
+    kept: List[str] = []
+    dropping = False
+    for line in prompt.split("\n"):
+        if line.startswith("#"):
+            dropping = line.startswith("### ") and line[4:].strip() in _TERSE_DROP_SECTIONS
+        if not dropping:
+            kept.append(line)
     
-    return optimized_prompt
+    return _BLANK_RUN_RE.sub("\n\n", "\n".join(kept))
 
 
 ############################################################################################
 # FINAL OPTIMIZED LLM-1 PROMPT
 ############################################################################################
-# Apply the optimizations
-OPTIMIZED_ROUTER_SYSTEM_PROMPT = create_optimized_router_prompt()
\ No newline at end of file
+# ROUTER_PROMPT_VERBOSITY=terse sends the compact form (default: full prose)
+ROUTER_PROMPT_VERBOSITY: Final[str] = os.getenv("ROUTER_PROMPT_VERBOSITY", "verbose")
+
+# Built exactly once at import; treat as read-only
+OPTIMIZED_ROUTER_SYSTEM_PROMPT: Final[str] = render_router_prompt(ROUTER_PROMPT_VERBOSITY)
+
+# UTF-8 bytes, encoded once - for hashing / cache namespacing without re-encoding ~30KB per use
+OPTIMIZED_ROUTER_SYSTEM_PROMPT_UTF8: Final[bytes] = OPTIMIZED_ROUTER_SYSTEM_PROMPT.encode("utf-8")
+
+# Prompt version marker: salt for every cache / log that depends on the router prompt.
+# Any injector edit changes it, so downstream caches are invalidated on deploy.
+# Always the full sha256 (computed once at import) - identical across deployments.
+ROUTER_PROMPT_SHA256: Final[str] = hashlib.sha256(OPTIMIZED_ROUTER_SYSTEM_PROMPT_UTF8).hexdigest()
+
+try:
+    import tiktoken
+    _TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _TOKEN_ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken (cl100k_base) when installed, else the ~4 chars/token estimate."""
+    if _TOKEN_ENCODING is None:
+        return len(text) // 4
+    return len(_TOKEN_ENCODING.encode(text))
+
+
+# Counted once - the router context budget check adds only history tokens per call
+ROUTER_PROMPT_TOKENS: Final[int] = count_tokens(OPTIMIZED_ROUTER_SYSTEM_PROMPT)
+
+# Anthropic system blocks: the prompt is byte-identical on every call, so mark it
+# as a cacheable prefix. Only the trailing user payload (user_query +
+# conversation_summary) changes between router calls.
+ROUTER_SYSTEM_BLOCKS: Final[list] = [
+    {
+        "type": "text",
+        "text": OPTIMIZED_ROUTER_SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"},
+    }
+]
+
+
+def build_router_messages(
+    payload: Dict[str, Any],
+    raw_messages: Optional[List[Dict[str, Any]]] = None,
+    examples_block: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    Assemble the LLM-1 message list as stable prefix + volatile suffix.
+    
+    Layout:
+        [system (cached)] → [conversation history, verbatim] → [user: payload + examples]
+    
+    Everything that changes per call (user_query, conversation_summary, selected
+    examples) lives in the LAST message only, so the system prompt and history
+    bytes are identical between calls of the same conversation and stay
+    prefix-cacheable. The last history message carries a second cache breakpoint.
+    
+    Args:
+        payload: Router payload (user_query + conversation_summary)
+        raw_messages: Prior conversation turns ({"role", "content"}); never mutated
+        examples_block: Output of format_examples_block() ("" for none)
+    
+    Returns:
+        Message list for router_llm.invoke()
+    """
+    messages: List[Dict[str, Any]] = [{"role": "system", "content": ROUTER_SYSTEM_BLOCKS}]
+    
+    if raw_messages:
+        history = list(raw_messages)
+        last = history[-1]
+        if isinstance(last.get("content"), str):
+            history[-1] = {
+                **last,
+                "content": [{
+                    "type": "text",
+                    "text": last["content"],
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            }
+        messages.extend(history)
+    
+    # sort_keys: identical payloads serialize to identical bytes
+    user_content = json.dumps(payload, sort_keys=True)
+    if examples_block:
+        user_content += "\n\n" + examples_block
+    messages.append({"role": "user", "content": user_content})
+    
+    return messages
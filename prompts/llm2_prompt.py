@@ -1,446 +1,101 @@
 #########################################################################
 # LLM-2 - PROMPT (CORRECT ARCHITECTURE)
 # - BASE_LLM2_SYSTEM_PROMPT: Minimal static base (general instructions only)
-# - Injection functions: Return UC-specific logic as strings
+# - UC templates: .txt files in llm2_templates/; injection functions only fill in subtypes
 # - llm2_prompt_builder(): Main function that dynamically builds prompt by calling injections
+# - build_static_system() / build_dynamic_context(): cacheable system prompt vs per-query summary
+# - llm2_prompt_builder_batch(): many prompts at once, grouped by routing shape (evals)
+# - llm2_system_blocks(): Static system prompt as Anthropic system blocks (cacheable prefix)
 #########################################################################
 
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from functools import cache, lru_cache
+from hashlib import blake2b
+from importlib.resources import files
+from io import StringIO
+from itertools import chain, combinations
+from typing import List, Dict, Any, Optional, Tuple
 from schemas.router_models import RouterOutput, ConversationSummary
 
 
 #########################################################################
-# BASE LLM-2 SYSTEM PROMPT (MINIMAL - GENERAL INSTRUCTIONS ONLY)
+# PROMPT TEMPLATES (prompts/llm2_templates/*.txt, loaded lazily)
 #########################################################################
+# base.txt              - BASE_LLM2_SYSTEM_PROMPT (general instructions only)
+# uc01..uc04.txt        - UC injections with {{PRIMARY_MARKER}} / {{SUBTYPES}} placeholders
+# uc05_error.txt        - UC-05 fallback error message
+# exec_instructions.txt - static execution instructions (end of system prompt)
+# exec_summary.txt      - per-query execution summary (str.format_map fields)
 
-BASE_LLM2_SYSTEM_PROMPT = """
-You are LLM-2: Executor for a personal financial assistant.
-
-================================
-⛔ STRICT EXECUTOR - READ FIRST!
-================================
-
-You are a STRICT EXECUTOR, not a thinker or decision-maker.
-You receive pre-resolved parameters from LLM-1 and execute tool calls using EXACTLY those parameters.
-Any deviation from the provided parameters is an ARCHITECTURE VIOLATION.
-
-⛔ FORBIDDEN ACTIONS (Architecture Violations):
-- Do NOT interpret the user's query yourself
-- Do NOT decide which category to use (LLM-1 already decided)
-- Do NOT change category IDs (use exactly what you receive)
-- Do NOT calculate or interpret dates (use exactly what's in resolved_dates)
-- Do NOT guess amount thresholds (use exactly what's in resolved_amount_threshold)
-- Do NOT add filters that weren't provided by LLM-1
-- Do NOT substitute subcategory ID for group ID or vice versa
-
-✅ REQUIRED ACTIONS (Correct Behavior):
-- Use EXACTLY the category_id from resolved_trn_categories[0].category_id
-- Use EXACTLY the dates from resolved_dates.start_date and resolved_dates.end_date
-- Use EXACTLY the threshold from resolved_amount_threshold
-- Build tool calls with ONLY these pre-resolved values
-- Execute the tool calls
-- Format the results for the customer
-- Log everything for back-office
-
-CATEGORY ID FORMAT RULES:
-- If category_id starts with "CG" (e.g., "CG100", "CG500") → it's a GROUP → use category_group_ids=[...]
-- If category_id starts with "C" but NOT "CG" (e.g., "C101", "C502") → it's a SUBCATEGORY → use sub_category_ids=[...]
-- NEVER convert between them. Use exactly what you receive.
-
-VIOLATION EXAMPLE (WRONG):
-  You receive: category_id = "C101" (a subcategory)
-  You use: category_group_ids = ["CG100"] (the parent group)
-  ❌ VIOLATION - You changed the category! You must use sub_category_ids = ["C101"]
-
-CORRECT EXAMPLE:
-  You receive: category_id = "C101" (a subcategory)
-  You use: sub_category_ids = ["C101"]
-  ✅ CORRECT - You used exactly what you received
-
-================================
-WHAT YOU RECEIVE
-================================
-
-You receive:
-- user_query: the user's natural-language question about their finances
-- router_output: structured routing decision from LLM-1 including:
-  * clarity: "CLEAR" (you should only receive CLEAR queries)
-  * core_use_cases: list of involved UC categories
-  * uc_operations: specific operations for each UC
-  * primary_use_case: the dominant UC that drives execution
-  * needed_tools: exact tools you should use
-  * resolved_dates: pre-calculated date range (start_date, end_date) - USE THESE EXACT VALUES
-  * resolved_trn_categories: pre-resolved transaction category IDs - USE THESE EXACT VALUES
-  * resolved_amount_threshold: pre-resolved amount threshold - USE THIS EXACT VALUE
-- conversation_summary: session preferences (for reference/logging only)
-
-Your job is to:
-1) Execute the query using the provided tools with EXACTLY the pre-resolved parameters
-2) Do NOT recalculate or reinterpret any values - just use what LLM-1 provided
-3) Let the PRIMARY CATEGORY drive the main execution flow
-4) Produce TWO outputs:
-   a) Simple, conversational answer for the customer
-   b) Rich back-office log for compliance and observability
-
-================================
-AVAILABLE TOOLS
-================================
-
-You have access to this tool (use ONLY this name):
-
-1. query_transactions(filters: Dict) -> List[Transaction]
-   - Executes filtered queries against transaction database
-   - Input: filters dict with keys:
-     * category_group_ids: LIST of group IDs (for IDs starting with "CG")
-     * sub_category_ids: LIST of subcategory IDs (for IDs starting with "C" but not "CG")
-     * start_date, end_date: date range (USE EXACT VALUES FROM router_output.resolved_dates)
-     * min_amount: minimum transaction amount
-     * direction: 'D' for debit, 'C' for credit
-     * account_id: specific account
-   - Output: list of matching transactions
-
-================================
-CRITICAL: USE PRE-RESOLVED VALUES
-================================
-
-LLM-1 has already resolved ALL parameters for you. DO NOT CHANGE THEM!
-
-DATES (router_output.resolved_dates):
-- Use resolved_dates.start_date and resolved_dates.end_date EXACTLY as provided
-- These are CONCRETE dates (e.g., "2024-10-01") - just copy them to your tool call
-- Do NOT interpret or recalculate - just USE them
-
-CATEGORIES (router_output.resolved_trn_categories):
-- Use the category_id field EXACTLY as provided
-- Check if it starts with "CG" → use category_group_ids parameter
-- Check if it starts with "C" (not "CG") → use sub_category_ids parameter
-- Do NOT substitute group for subcategory or vice versa
-
-AMOUNT THRESHOLD (router_output.resolved_amount_threshold):
-- Use resolved_amount_threshold EXACTLY as provided as min_amount filter
-- This is a CONCRETE number (e.g., 100.0) - just copy it to your tool call
-
-================================
-EXECUTION PRINCIPLES
-================================
-
-1. PRIMARY CATEGORY DRIVES:
-   - The primary_use_case determines the main execution logic
-   - Other categories provide supporting operations
-   
-2. USE PRE-RESOLVED VALUES FROM router_output (NO CHANGES ALLOWED):
-   - Dates (UC-03) → Copy router_output.resolved_dates directly to tool call
-   - Categories (UC-04) → Copy router_output.resolved_trn_categories directly to tool call
-   - Amount threshold → Copy router_output.resolved_amount_threshold directly to tool call
-   - Then call query_transactions with these EXACT pre-resolved filters
-
-3. CONVERSATION SUMMARY:
-   - For reference and logging only
-   - All resolutions already applied by LLM-1
-
-4. STRUCTURED OUTPUT FORMAT:
-   You MUST produce EXACTLY this structure:
-   {
-     "answer": "Simple, conversational answer for the customer (natural language)",
-     
-     "resolved_query": {
-       "original": "Copy of the original user_query exactly as received",
-       "resolved_intent": "Human-readable explanation of what you executed",
-       "parameters_used": {
-         "dates": "EXACT dates from router_output.resolved_dates that you used",
-         "category": "EXACT category_id from router_output.resolved_trn_categories that you used",
-         "threshold": "EXACT threshold from router_output.resolved_amount_threshold that you used (if any)"
-       }
-     },
-     
-     "analysis": {
-       "key_metrics": "Computed values, trends, comparisons from the query results"
-     },
-     "reasoning_steps": [
-       "Step 1: Received query and pre-resolved parameters from LLM-1",
-       "Step 2: Copied EXACT values: category_id=X, start_date=Y, end_date=Z",
-       "Step 3: Called query_transactions with these EXACT filters",
-       "Step 4: Received N transactions from database",
-       "Step 5: Calculated result and formatted answer"
-     ],
-     "data_sources": {
-       "tables_used": ["transactions"],
-       "fields_accessed": ["amount", "categoryGroupId", "date"],
-       "filters_applied": ["EXACT filters with values copied from router_output"],
-       "joins_performed": ["how tables were connected"],
-       "aggregations_used": ["SUM, AVG, COUNT, etc."]
-     },
-     "transactions_analyzed": 58,
-     "confidence": "high/medium/low"
-   }
-   
-   CRITICAL OUTPUT RULES:
-   - "answer" field: Simple, friendly text that the CUSTOMER will see
-   - "resolved_query.parameters_used": Must show EXACT values you copied from router_output
-   - "filters_applied": Must show EXACT values copied from router_output (not reinterpreted)
-   - All other fields: Back-office logging for compliance and observability
-   
-   ⚠️  CRITICAL JSON OUTPUT FORMAT:
-   - Your response MUST start with "{" and end with "}"
-   - Do NOT add ANY text before the JSON (no "Here is...", "Now I...", etc.)
-   - Do NOT add ANY text after the JSON
-   - Do NOT wrap in markdown code blocks (no ```json or ```)
-   - Return PURE, VALID JSON ONLY
-
-
-================================
-EXECUTION EXAMPLES
-================================
-
-Example 1 - Using a category GROUP ID:
-router_output.resolved_trn_categories: [{"category_id": "CG500", "category_name": "Entertainment"}]
-router_output.resolved_dates: {"start_date": "2024-10-01", "end_date": "2024-10-31"}
-→ query_transactions(category_group_ids=["CG500"], start_date="2024-10-01", end_date="2024-10-31")
-Note: "CG500" starts with "CG" so we use category_group_ids parameter
-parameters_used: {
-  "dates": "start_date=2024-10-01, end_date=2024-10-31 (copied from router_output.resolved_dates)",
-  "category": "CG500 (copied from router_output.resolved_trn_categories)"
-}
-
-Example 2 - Using a SUBCATEGORY ID:
-router_output.resolved_trn_categories: [{"category_id": "C502", "category_name": "Movie Theaters"}]
-router_output.resolved_dates: {"start_date": "2024-10-01", "end_date": "2024-10-31"}
-→ query_transactions(sub_category_ids=["C502"], start_date="2024-10-01", end_date="2024-10-31")
-Note: "C502" starts with "C" (not "CG") so we use sub_category_ids parameter
-parameters_used: {
-  "dates": "start_date=2024-10-01, end_date=2024-10-31 (copied from router_output.resolved_dates)",
-  "category": "C502 (copied from router_output.resolved_trn_categories)"
-}
-
-Example 3 - Query with amount threshold:
-router_output.resolved_amount_threshold: 100.0
-router_output.resolved_dates: {"start_date": "2024-10-23", "end_date": "2024-11-22"}
-→ query_transactions(min_amount=100.0, start_date="2024-10-23", end_date="2024-11-22")
-parameters_used: {
-  "dates": "start_date=2024-10-23, end_date=2024-11-22 (copied from router_output.resolved_dates)",
-  "threshold": "100.0 (copied from router_output.resolved_amount_threshold)"
-}
-
-CRITICAL: You are copying values, not interpreting them!
+@cache
+def _tmpl(name: str) -> str:
+    """Template text, read from the package once per process."""
+    return (files("prompts") / "llm2_templates" / name).read_text(encoding="utf-8")
 
-================================
-CRITICAL RULES
-================================
-
-- NEVER make up data or hallucinate transaction details
-- ALWAYS use query_transactions tool to retrieve real data
-- ALWAYS copy pre-resolved values from router_output EXACTLY (do NOT change them)
-- ALWAYS check if category_id starts with "CG" (group) or "C" (subcategory) to pick correct parameter
-- ALWAYS log the EXACT parameters you used in reasoning_steps and parameters_used
-- If you lack information to answer, say so clearly
-- Return ONLY valid JSON, no markdown, no extra text
-"""
 
+def __getattr__(name: str) -> str:
+    # BASE_LLM2_SYSTEM_PROMPT stays importable, but is only read on first access
+    if name == "BASE_LLM2_SYSTEM_PROMPT":
+        return _tmpl("base.txt")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 #########################################################################
 # UC-01: DIRECT DATA RETRIEVAL INJECTION
 #########################################################################
 
+@lru_cache(maxsize=256)
 def inject_uc01_direct_retrieval(
-    subtypes: List[str],
-    all_tools: List[str],
+    subtypes: Tuple[str, ...],
     is_primary: bool
 ) -> str:
     """
     UC-01: Direct data retrieval logic
     Returns a string with UC-01 specific instructions
     """
-    
-    tool_guidance = """
-TOOL FOR UC-01:
-- query_transactions: Fetch specific records or field values
-  Example: query_transactions({"limit": 1, "sort_by": "date_desc"}) for last transaction
-"""
-    
-    primary_marker = "🎯 PRIMARY EXECUTION MODE" if is_primary else "⚙️ SUPPORTING MODE"
-    
-    return f"""
-================================
-UC-01: DIRECT DATA RETRIEVAL
-================================
-
-{primary_marker}
-
-SUBTYPES TO HANDLE: {', '.join(subtypes) if subtypes else 'None'}
-
-PURPOSE:
-Retrieve existing field values directly from data - NO calculations or aggregations.
-
-COMMON SUBTYPES:
-- current_balance: Fetch current account balance
-- last_transaction: Retrieve most recent transaction
-- account_type_lookup: Get account type/metadata
-
-{tool_guidance}
-
-EXECUTION STEPS:
-1. Identify which field/record to retrieve
-2. Use query_transactions with appropriate filters/limits
-3. Extract the specific field value
-4. Return value directly to user
-
-EXAMPLE:
-Query: "What was my last transaction?"
-→ query_transactions({{"limit": 1, "sort_by": "date_desc", "user_id": "USER_001"}})
-→ Answer: "Your last transaction was $45.50 at Starbucks on Nov 20"
-
-REASONING LOG MUST INCLUDE:
-- Step 1: Identified query as last_transaction lookup
-- Step 2: Called query_transactions with limit=1, sort_by=date_desc
-- Step 3: Retrieved transaction: $45.50 at Starbucks
-"""
+    return _render_uc_injection("UC-01", subtypes, is_primary)
 
 
 #########################################################################
 # UC-02: AGGREGATION INJECTION
 #########################################################################
 
+@lru_cache(maxsize=256)
 def inject_uc02_aggregation(
-    subtypes: List[str],
-    all_tools: List[str],
+    subtypes: Tuple[str, ...],
     is_primary: bool
 ) -> str:
     """
     UC-02: Mathematical aggregation logic
     Returns a string with UC-02 specific instructions
     """
-    
-    tool_guidance = """
-TOOL FOR UC-02:
-- query_transactions: Execute filtered aggregation with pre-resolved parameters
-"""
-    
-    primary_marker = "🎯 PRIMARY EXECUTION MODE - DRIVE THE QUERY" if is_primary else "⚙️ SUPPORTING MODE"
-    
-    return f"""
-================================
-UC-02: MATHEMATICAL AGGREGATION
-================================
-
-{primary_marker}
-
-SUBTYPES TO HANDLE: {', '.join(subtypes) if subtypes else 'None'}
-
-PURPOSE:
-Perform mathematical operations (SUM, AVG, COUNT, MIN/MAX) over multiple transactions.
-
-COMMON SUBTYPES:
-- sum_spending_single_period: SUM over one time period
-- sum_spending_single_period_by_category: SUM filtered by category + time
-- total_income_single_period: SUM of income transactions
-- average_transaction_amount: AVG of transaction amounts
-- count_transactions_single_period: COUNT transactions in period
-- compare_aggregates_two_periods: Compare metrics between two periods
-
-{tool_guidance}
-
-EXECUTION PATTERN (PRIMARY MODE):
-1. Read router_output.resolved_trn_categories for category IDs
-2. Read router_output.resolved_dates for date range
-3. Read router_output.resolved_amount_threshold if amount filtering needed
-4. Call query_transactions with pre-resolved filters
-5. Compute aggregation (SUM/AVG/COUNT)
-6. Format result for customer
-
-EXECUTION PATTERN (SUPPORTING MODE):
-- Provide aggregation support to primary UC
-- Example: UC-03 needs total spending → UC-02 provides SUM
-
-EXAMPLE (PRIMARY):
-Query: "How much did I spend on groceries last month?"
-router_output contains:
-  resolved_trn_categories: [{{"categoryGroupId": "CG10000"}}]
-  resolved_dates: {{"start_date": "2024-10-01", "end_date": "2024-10-31"}}
-→ query_transactions(category_group_ids=["CG10000"], start_date="2024-10-01", end_date="2024-10-31")
-→ 23 transactions returned
-→ SUM(amounts) → $415.50
-→ Answer: "You spent $415.50 on groceries last month"
-
-REASONING LOG MUST INCLUDE:
-- Step 1: Identified aggregation type (SUM spending)
-- Step 2: Used pre-resolved category CG10000 from router_output.resolved_trn_categories
-- Step 3: Used pre-resolved dates 2024-10-01 to 2024-10-31 from router_output.resolved_dates
-- Step 4: Called query_transactions, retrieved 23 transactions
-- Step 5: Computed SUM: $415.50
-"""
+    return _render_uc_injection("UC-02", subtypes, is_primary)
 
 
 #########################################################################
 # UC-03: TEMPORAL QUERIES INJECTION
 #########################################################################
 
+@lru_cache(maxsize=256)
 def inject_uc03_temporal(
-    subtypes: List[str],
-    all_tools: List[str],
+    subtypes: Tuple[str, ...],
     is_primary: bool
 ) -> str:
     """
     UC-03: Temporal query logic
     Returns a string with UC-03 specific instructions
     """
-    
-    # No tools needed - LLM-1 pre-resolved dates
-    
-    primary_marker = "🎯 PRIMARY EXECUTION MODE" if is_primary else "⚙️ SUPPORTING MODE"
-    
-    return f"""
-================================
-UC-03: TEMPORAL QUERIES
-================================
-
-{primary_marker}
-
-SUBTYPES TO HANDLE: {', '.join(subtypes) if subtypes else 'None'}
-
-PURPOSE:
-Use pre-resolved dates from router_output.resolved_dates for date-based filtering.
-LLM-1 has already interpreted all temporal references.
-
-COMMON SUBTYPES:
-- temporal_filter_last_month: Filter for previous calendar month
-- temporal_filter_this_week: Filter for current week
-- temporal_filter_last_30_days: Rolling 30-day window
-- temporal_comparison: Compare two time periods
-
-PRE-RESOLVED DATES:
-LLM-1 has already converted temporal phrases to exact dates.
-Use router_output.resolved_dates directly:
-- resolved_dates.start_date: Start of date range
-- resolved_dates.end_date: End of date range
-- resolved_dates.interpretation: How LLM-1 interpreted the phrase
-
-EXECUTION PATTERN:
-1. Read router_output.resolved_dates.start_date
-2. Read router_output.resolved_dates.end_date
-3. Pass dates to query_transactions(start_date=..., end_date=...)
-
-EXAMPLE:
-Query: "Show me recent transactions"
-router_output contains:
-  resolved_dates: {{"start_date": "2024-10-23", "end_date": "2024-11-22", "interpretation": "last 30 days"}}
-→ query_transactions(start_date="2024-10-23", end_date="2024-11-22")
-→ Answer with filtered results
-
-REASONING LOG MUST INCLUDE:
-- Step 1: Used pre-resolved dates from router_output.resolved_dates
-- Step 2: Date range: 2024-10-23 to 2024-11-22 (interpretation: "last 30 days")
-- Step 3: Called query_transactions with date filters
-"""
+    return _render_uc_injection("UC-03", subtypes, is_primary)
 
 
 #########################################################################
 # UC-04: CATEGORY-BASED QUERIES INJECTION
 #########################################################################
 
+@lru_cache(maxsize=256)
 def inject_uc04_category(
-    subtypes: List[str],
-    all_tools: List[str],
+    subtypes: Tuple[str, ...],
     is_primary: bool
 ) -> str:
     """
@@ -450,68 +105,47 @@ def inject_uc04_category(
     IMPORTANT: LLM-2 must use EXACTLY the category_id it receives.
     It must NOT substitute subcategory for group or vice versa.
     """
-    
-    primary_marker = "🎯 PRIMARY EXECUTION MODE" if is_primary else "⚙️ SUPPORTING MODE"
-    
-    return f"""
-================================
-UC-04: CATEGORY-BASED QUERIES
-================================
-
-{primary_marker}
-
-SUBTYPES TO HANDLE: {', '.join(subtypes) if subtypes else 'None'}
-
-PURPOSE:
-Use EXACTLY the category_id from router_output.resolved_trn_categories.
-LLM-1 has already resolved the category via RAG lookup. DO NOT CHANGE IT.
-
-⛔ FORBIDDEN:
-- Do NOT substitute a subcategory ID for a group ID
-- Do NOT substitute a group ID for a subcategory ID
-- Do NOT interpret what category "should" be used
-- Just USE the category_id you received
-
-✅ REQUIRED:
-- Copy the category_id EXACTLY from router_output.resolved_trn_categories[0].category_id
-- Check if it starts with "CG" → use category_group_ids parameter
-- Check if it starts with "C" (not "CG") → use sub_category_ids parameter
-
-CATEGORY ID FORMAT:
-- "CG..." (e.g., CG100, CG500, CG800) = Category GROUP → use category_group_ids=[...]
-- "C..." but not "CG" (e.g., C101, C502, C803) = SUBCATEGORY → use sub_category_ids=[...]
-
-EXECUTION PATTERN:
-1. Read router_output.resolved_trn_categories[0].category_id
-2. Check prefix: "CG" = group, "C" (not "CG") = subcategory
-3. Build tool call with correct parameter name:
-   - If "CG...": query_transactions(category_group_ids=["CG..."], ...)
-   - If "C..." (not "CG"): query_transactions(sub_category_ids=["C..."], ...)
-4. Copy dates from router_output.resolved_dates
-5. Execute query_transactions
-
-EXAMPLE 1 - GROUP ID (starts with "CG"):
-router_output.resolved_trn_categories: [{{"category_id": "CG500", "category_name": "Entertainment"}}]
-router_output.resolved_dates: {{"start_date": "2024-10-01", "end_date": "2024-10-31"}}
-→ "CG500" starts with "CG" → use category_group_ids
-→ query_transactions(category_group_ids=["CG500"], start_date="2024-10-01", end_date="2024-10-31")
-
-EXAMPLE 2 - SUBCATEGORY ID (starts with "C" but not "CG"):
-router_output.resolved_trn_categories: [{{"category_id": "C502", "category_name": "Movie Theaters"}}]
-router_output.resolved_dates: {{"start_date": "2024-10-01", "end_date": "2024-10-31"}}
-→ "C502" starts with "C" (not "CG") → use sub_category_ids
-→ query_transactions(sub_category_ids=["C502"], start_date="2024-10-01", end_date="2024-10-31")
-
-⚠️ VIOLATION EXAMPLE (WRONG):
-router_output.resolved_trn_categories: [{{"category_id": "C502"}}]
-→ You use: category_group_ids=["CG500"] (the parent group)
-❌ ARCHITECTURE VIOLATION - You changed the category!
-
-REASONING LOG MUST INCLUDE:
-- Step 1: Received category_id from router_output.resolved_trn_categories
-- Step 2: Category ID: [exact ID] - checked prefix to determine group vs subcategory
-- Step 3: Called query_transactions with [category_group_ids or sub_category_ids]=[exact ID]
-"""
+    return _render_uc_injection("UC-04", subtypes, is_primary)
+
+
+#########################################################################
+# UC INJECTION RENDERING (each (UC, is_primary) variant built once)
+#########################################################################
+
+_PRIMARY_MARKER = "🎯 PRIMARY EXECUTION MODE"
+_UC02_PRIMARY_MARKER = "🎯 PRIMARY EXECUTION MODE - DRIVE THE QUERY"
+_SUPPORTING_MARKER = "⚙️ SUPPORTING MODE"
+
+# Execution-mode marker per (UC, is_primary)
+_MARKERS: Dict[Tuple[str, bool], str] = {
+    ("UC-01", True): _PRIMARY_MARKER,
+    ("UC-02", True): _UC02_PRIMARY_MARKER,
+    ("UC-03", True): _PRIMARY_MARKER,
+    ("UC-04", True): _PRIMARY_MARKER,
+    ("UC-01", False): _SUPPORTING_MARKER,
+    ("UC-02", False): _SUPPORTING_MARKER,
+    ("UC-03", False): _SUPPORTING_MARKER,
+    ("UC-04", False): _SUPPORTING_MARKER,
+}
+
+_UC_TEMPLATE_FILES = {
+    "UC-01": "uc01.txt",
+    "UC-02": "uc02.txt",
+    "UC-03": "uc03.txt",
+    "UC-04": "uc04.txt",
+}
+
+
+@cache
+def _uc_injection(uc: str, is_primary: bool) -> str:
+    """UC template with its marker filled in: only {{SUBTYPES}} is left per request."""
+    return _tmpl(_UC_TEMPLATE_FILES[uc]).replace("{{PRIMARY_MARKER}}", _MARKERS[(uc, is_primary)])
+
+
+def _render_uc_injection(uc: str, subtypes: Tuple[str, ...], is_primary: bool) -> str:
+    return _uc_injection(uc, is_primary).replace(
+        "{{SUBTYPES}}", ", ".join(subtypes) if subtypes else "None"
+    )
 
 
 #########################################################################
@@ -523,54 +157,44 @@ def inject_uc05_error_message() -> str:
     UC-05 should be handled by LLM-1 and never reach LLM-2.
     This is a fallback error message.
     """
-    return """
-================================
-❌ ERROR: UC-05 REACHED EXECUTOR
-================================
-
-UC-05 (Ambiguity Handling) should be resolved by LLM-1 (Router) before execution.
-If you see this message, the routing logic has a bug.
-
-IMMEDIATE ACTIONS:
-1. Return an error to the user
-2. Log this incident in backoffice_log
-3. Set confidence to "low"
-
-ERROR RESPONSE:
-{
-  "answer": "I need more information to answer your question. Please try rephrasing with more specific details.",
-  "confidence": "low",
-  "error": "UC-05 incorrectly routed to executor"
-}
-"""
+    return _tmpl("uc05_error.txt")
 
 
 #########################################################################
 # HELPER FUNCTIONS FOR PROMPT BUILDING
 #########################################################################
 
-def _format_subtypes_summary(uc_operations: Dict[str, List[str]], involved_ucs: List[str]) -> str:
-    """Format subtypes for execution summary"""
-    lines = []
-    for uc in involved_ucs:
-        subtypes = uc_operations.get(uc, [])
-        if subtypes:
-            lines.append(f"  {uc}: {', '.join(subtypes)}")
-        else:
-            lines.append(f"  {uc}: (no specific subtypes)")
-    return "\n".join(lines) if lines else "  None"
+@lru_cache(maxsize=256)
+def _format_subtypes_summary(uc_operations: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> str:
+    """Format subtypes for execution summary ((uc, subtypes) pairs in involved-UC order)"""
+    if not uc_operations:
+        return "  None"
+    return "\n".join(
+        f"  {uc}: {', '.join(subtypes)}" if subtypes else f"  {uc}: (no specific subtypes)"
+        for uc, subtypes in uc_operations
+    )
+
+
+_PRIMARY_EXEC_DESC = {
+    "UC-01": "Direct data retrieval (fetch field values)",
+    "UC-02": "Aggregation operation (SUM/AVG/COUNT with pre-resolved filters)",
+    "UC-03": "Temporal filtering (use pre-resolved date range)",
+    "UC-04": "Category filtering (use pre-resolved category IDs)",
+    "UC-05": "ERROR - Should not reach executor",
+}
 
 
 def _get_primary_execution_description(primary_use_case: str) -> str:
     """Get execution description for primary category"""
-    descriptions = {
-        "UC-01": "Direct data retrieval (fetch field values)",
-        "UC-02": "Aggregation operation (SUM/AVG/COUNT with pre-resolved filters)",
-        "UC-03": "Temporal filtering (use pre-resolved date range)",
-        "UC-04": "Category filtering (use pre-resolved category IDs)",
-        "UC-05": "ERROR - Should not reach executor"
-    }
-    return descriptions.get(primary_use_case, "Unknown primary category")
+    return _PRIMARY_EXEC_DESC.get(primary_use_case, "Unknown primary category")
+
+
+# Rendered preferences keyed by blake2b(summary JSON): the same session summary
+# flows through every LLM-2 call of a conversation
+_SUMMARY_CACHE_SIZE = 64
+_summary_cache: "OrderedDict[bytes, str]" = OrderedDict()
+# executor_node_batch builds prompts from several threads
+_summary_cache_lock = threading.Lock()
 
 
 def _format_conversation_summary(summary: Optional[ConversationSummary]) -> str:
@@ -578,28 +202,182 @@ def _format_conversation_summary(summary: Optional[ConversationSummary]) -> str:
     if not summary:
         return "No preferences stored"
     
+    key = blake2b(summary.model_dump_json().encode("utf-8"), digest_size=16).digest()
+    with _summary_cache_lock:
+        cached = _summary_cache.get(key)
+        if cached is not None:
+            _summary_cache.move_to_end(key)
+            return cached
+    
+    rendered = _render_conversation_summary(summary)
+    with _summary_cache_lock:
+        _summary_cache[key] = rendered
+        _summary_cache.move_to_end(key)
+        if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    return rendered
+
+
+def _render_conversation_summary(summary: ConversationSummary) -> str:
     lines = []
     
-    if summary.time_window:
-        lines.append(f"  Time window: {summary.time_window.value} (source: {summary.time_window.source})")
+    time_window = summary.time_window
+    if time_window:
+        lines.append(f"  Time window: {time_window.value} (source: {time_window.source})")
     
-    if summary.amount_threshold_large:
-        lines.append(f"  Large purchase threshold: ${summary.amount_threshold_large.value} (source: {summary.amount_threshold_large.source})")
+    amount_threshold = summary.amount_threshold_large
+    if amount_threshold:
+        lines.append(f"  Large purchase threshold: ${amount_threshold.value} (source: {amount_threshold.source})")
     
-    if summary.account_scope:
-        lines.append(f"  Account scope: {summary.account_scope.value} (source: {summary.account_scope.source})")
+    account_scope = summary.account_scope
+    if account_scope:
+        lines.append(f"  Account scope: {account_scope.value} (source: {account_scope.source})")
     
-    if summary.category_preferences:
-        for key, pref in summary.category_preferences.items():
+    category_preferences = summary.category_preferences
+    if category_preferences:
+        for key, pref in category_preferences.items():
             lines.append(f"  {key}: {pref.value} (source: {pref.source})")
     
-    return "\n".join(lines) if lines else "No preferences stored"
+    if not lines:
+        return "No preferences stored"
+    return "\n".join(lines)
 
 
 #########################################################################
 # MAIN LLM-2 PROMPT BUILDER FUNCTION
 #########################################################################
 
+# UC-01..UC-04 injections in prompt order (UC-05 is handled separately)
+_UC_ORDER = ("UC-01", "UC-02", "UC-03", "UC-04")
+_UC_DISPATCH = {
+    "UC-01": inject_uc01_direct_retrieval,
+    "UC-02": inject_uc02_aggregation,
+    "UC-03": inject_uc03_temporal,
+    "UC-04": inject_uc04_category,
+}
+
+# Separator between prompt parts: appended when a part is built, so the final
+# prompt is a single "".join with no intermediate "\n\n".join passes
+_PART_SEP = "\n\n"
+
+
+@cache
+def _base_prompt() -> str:
+    """Base prompt + separator, built once per process; every call shares this one object."""
+    return _tmpl("base.txt") + _PART_SEP
+
+
+def _build_uc_block(
+    core_use_cases: frozenset,
+    primary_use_case: str,
+    uc_operations: Tuple[Tuple[str, Tuple[str, ...]], ...],
+) -> str:
+    """
+    Joined UC injections for one routing shape (memoized via build_static_system).
+    
+    Each injection is followed by its "\n\n" separator ("" if no UC).
+    """
+    operations = dict(uc_operations)
+    
+    # DYNAMICALLY build UC-specific injections by CALLING injection functions;
+    # parts stream into one buffer instead of a list of KB-sized strings
+    buf = StringIO()
+    
+    for uc in _UC_ORDER:
+        if uc in core_use_cases:
+            buf.write(_UC_DISPATCH[uc](operations.get(uc, ()), primary_use_case == uc))
+            buf.write(_PART_SEP)
+    
+    if "UC-05" in core_use_cases:
+        # This should never happen, but handle gracefully
+        buf.write(inject_uc05_error_message())
+        buf.write(_PART_SEP)
+    
+    return buf.getvalue()
+
+
+# (step if UC involved / condition holds, step otherwise)
+_CATEGORY_STEP = ("Use pre-resolved categories from router_output.resolved_trn_categories", "No category filtering")
+_DATE_STEP = ("Use pre-resolved dates from router_output.resolved_dates", "No date filtering")
+_AMOUNT_STEP = ("Use pre-resolved amount threshold from router_output.resolved_amount_threshold", "No amount filtering")
+
+# EXECUTION ORDER steps 1-3 for every (UC-01..UC-04 subset, has amount threshold)
+_EXEC_ORDER_LINES: Dict[Tuple[frozenset, bool], Tuple[str, str, str]] = {
+    (frozenset(ucs), has_threshold): (
+        _CATEGORY_STEP[0 if "UC-04" in ucs else 1],
+        _DATE_STEP[0 if "UC-03" in ucs else 1],
+        _AMOUNT_STEP[0 if has_threshold else 1],
+    )
+    for ucs in chain.from_iterable(combinations(_UC_ORDER, r) for r in range(len(_UC_ORDER) + 1))
+    for has_threshold in (True, False)
+}
+
+
+def _routing_shape(router_output: RouterOutput) -> Tuple[Tuple[str, ...], str, Tuple[Tuple[str, Tuple[str, ...]], ...]]:
+    """Hashable (core_use_cases, primary_use_case, uc_operations) for build_static_system."""
+    core_use_cases, uc_operations, primary_use_case = (
+        router_output.core_use_cases, router_output.uc_operations, router_output.primary_use_case
+    )
+    core = tuple(sorted(set(core_use_cases)))
+    operations = tuple(sorted(
+        (uc, tuple(sorted(ops))) for uc, ops in uc_operations.items() if uc in core
+    ))
+    return core, primary_use_case, operations
+
+
+@lru_cache(maxsize=128)
+def build_static_system(
+    core_use_cases: Tuple[str, ...],
+    primary_use_case: str,
+    uc_operations: Tuple[Tuple[str, Tuple[str, ...]], ...],
+) -> str:
+    """
+    Static LLM-2 system prompt for one routing shape: base + UC injections + execution instructions.
+    
+    Contains no per-request data, so it is byte-identical for every query with
+    the same (UCs, primary UC, subtypes) and stays provider prompt-cacheable.
+    """
+    uc_block = _build_uc_block(frozenset(core_use_cases), primary_use_case, uc_operations)
+    return "".join((_base_prompt(), uc_block, _tmpl("exec_instructions.txt")))
+
+
+def build_dynamic_context(
+    user_query: str,
+    router_output: RouterOutput,
+    conversation_summary: Optional[ConversationSummary] = None,
+) -> str:
+    """Per-query execution summary (the only prompt text that changes on every call)."""
+    # Extract router data once; everything below reads locals
+    core_categories = tuple(router_output.core_use_cases)
+    primary_use_case = router_output.primary_use_case
+    operations_by_uc = router_output.uc_operations
+    amount_threshold = router_output.resolved_amount_threshold
+    
+    uc_operations = tuple((uc, tuple(operations_by_uc.get(uc, ()))) for uc in core_categories)
+    category_step, date_step, amount_step = _EXEC_ORDER_LINES[
+        (frozenset(core_categories).intersection(_UC_ORDER), bool(amount_threshold))
+    ]
+    
+    # Per-query section; all conditional text is precomputed and passed as named fields
+    return _tmpl("exec_summary.txt").format_map({
+        "user_query": user_query,
+        "involved": ", ".join(core_categories),
+        "primary_use_case": primary_use_case,
+        "subtypes_summary": _format_subtypes_summary(uc_operations),
+        "category_step": category_step,
+        "date_step": date_step,
+        "amount_step": amount_step,
+        "primary_description": _get_primary_execution_description(primary_use_case),
+        "preferences": _format_conversation_summary(conversation_summary),
+    })
+
+
+@cache
+def _uc05_only_prompt() -> str:
+    """Base prompt + UC-05 error message, for routing that reached LLM-2 with UC-05 only."""
+    return _base_prompt() + inject_uc05_error_message()
+
+
 def llm2_prompt_builder(
     user_query: str,
     router_output: RouterOutput,
@@ -616,139 +394,63 @@ def llm2_prompt_builder(
         executor_context: Additional execution context (e.g., user_id)
     
     Returns:
-        Complete LLM-2 system prompt with dynamically injected UC-specific logic
+        Complete LLM-2 prompt as one string: static system prompt + per-query
+        execution summary (executor_node sends these as separate messages)
     """
+    if router_output.core_use_cases == ["UC-05"]:
+        # Misrouted VAGUE query: nothing to execute, only the error instructions
+        return _uc05_only_prompt()
     
-    # Start with base prompt (minimal general instructions)
-    prompt_parts = [BASE_LLM2_SYSTEM_PROMPT]
-    
-    # Extract router data
-    core_categories = router_output.core_use_cases
-    uc_operations = router_output.uc_operations
-    primary_use_case = router_output.primary_use_case
-    needed_tools = router_output.needed_tools
-    
-    # DYNAMICALLY build UC-specific injections by CALLING injection functions
-    uc_injections = []
-    
-    if "UC-01" in core_categories:
-        uc_injections.append(
-            inject_uc01_direct_retrieval(
-                subtypes=uc_operations.get("UC-01", []),
-                all_tools=needed_tools,
-                is_primary=(primary_use_case == "UC-01")
-            )
-        )
-    
-    if "UC-02" in core_categories:
-        uc_injections.append(
-            inject_uc02_aggregation(
-                subtypes=uc_operations.get("UC-02", []),
-                all_tools=needed_tools,
-                is_primary=(primary_use_case == "UC-02")
-            )
-        )
+    return "".join((
+        build_static_system(*_routing_shape(router_output)),
+        _PART_SEP,
+        build_dynamic_context(user_query, router_output, conversation_summary),
+    ))
+
+
+def llm2_prompt_builder_batch(
+    items: List[Tuple[str, RouterOutput, Optional[ConversationSummary]]],
+) -> List[str]:
+    """
+    Build LLM-2 prompts for many (user_query, router_output, conversation_summary) items.
     
-    if "UC-03" in core_categories:
-        uc_injections.append(
-            inject_uc03_temporal(
-                subtypes=uc_operations.get("UC-03", []),
-                all_tools=needed_tools,
-                is_primary=(primary_use_case == "UC-03")
-            )
-        )
+    For eval workloads: items are grouped by routing shape so the static system
+    prompt is looked up once per shape; only the per-query summary is built per item.
+    Output order matches input order; each prompt equals llm2_prompt_builder()'s.
+    """
+    prompts: List[str] = [""] * len(items)
     
-    if "UC-04" in core_categories:
-        uc_injections.append(
-            inject_uc04_category(
-                subtypes=uc_operations.get("UC-04", []),
-                all_tools=needed_tools,
-                is_primary=(primary_use_case == "UC-04")
-            )
-        )
+    # Grouped by hashing, not sorting: shapes need no ordering (primary_use_case may be None)
+    groups: Dict[Tuple, List[int]] = {}
+    for i, (_, router_output, _) in enumerate(items):
+        groups.setdefault(_routing_shape(router_output), []).append(i)
     
-    if "UC-05" in core_categories:
-        # This should never happen, but handle gracefully
-        uc_injections.append(inject_uc05_error_message())
+    for shape, group in groups.items():
+        static_prefix = build_static_system(*shape) + _PART_SEP
+        for i in group:
+            user_query, router_output, conversation_summary = items[i]
+            if router_output.core_use_cases == ["UC-05"]:
+                prompts[i] = _uc05_only_prompt()
+                continue
+            prompts[i] = static_prefix + build_dynamic_context(user_query, router_output, conversation_summary)
     
-    # Add all UC injections to prompt
-    prompt_parts.extend(uc_injections)
-    
-    # Add execution summary section
-    execution_summary = f"""
-================================
-EXECUTION SUMMARY FOR THIS QUERY
-================================
-
-USER QUERY: {user_query}
-
-INVOLVED UC CATEGORIES: {', '.join(core_categories)}
-
-PRIMARY CATEGORY: {primary_use_case} (drives main execution)
-
-SUBTYPES:
-{_format_subtypes_summary(uc_operations, core_categories)}
-
-TOOLS AVAILABLE: query_transactions
-
-PRE-RESOLVED VALUES FROM router_output:
-- resolved_dates: Use for date filtering (UC-03)
-- resolved_trn_categories: Use for category filtering (UC-04) - pass as LIST: category_group_ids=[...]
-- resolved_amount_threshold: Use for amount filtering (if applicable)
-
-EXECUTION ORDER:
-1. {"Use pre-resolved categories from router_output.resolved_trn_categories" if "UC-04" in core_categories else "No category filtering"}
-2. {"Use pre-resolved dates from router_output.resolved_dates" if "UC-03" in core_categories else "No date filtering"}
-3. {"Use pre-resolved amount threshold from router_output.resolved_amount_threshold" if router_output.resolved_amount_threshold else "No amount filtering"}
-4. Call query_transactions with pre-resolved filters
-5. {_get_primary_execution_description(primary_use_case)}
-
-CONVERSATION PREFERENCES (for reference/logging):
-{_format_conversation_summary(conversation_summary)}
-
-================================
-BEGIN EXECUTION
-================================
-
-Now execute the query following the guidance above.
-
-OUTPUT STRUCTURE:
-You MUST produce a JSON object with these exact fields:
-- "answer": Customer-facing simple text
-- "resolved_query": Object with original, resolved_intent, and parameters_used
-- "analysis": Key metrics and computed values
-- "reasoning_steps": Array of step-by-step explanations
-- "data_sources": Object with tables, fields, filters, joins, aggregations
-- "transactions_analyzed": Integer count
-- "confidence": "high", "medium", or "low"
-
-CRITICAL: Always populate "resolved_query" showing how you used pre-resolved values!
-
-⚠️  FINAL OUTPUT REQUIREMENTS - READ CAREFULLY:
-1. Your ENTIRE response must be PURE JSON
-2. Start IMMEDIATELY with '{{' (opening brace)
-3. End with '}}' (closing brace)
-4. NO explanatory text before the JSON (forbidden: 'Here is...', 'Now I...', 'The response is...')
-5. NO text after the JSON
-6. NO markdown formatting (forbidden: ```json or ```)
-7. ONLY output the JSON object itself
-
-INCORRECT (will fail parsing):
-Now I have the data:
-{{
-  'answer': '...'
-}}
-
-CORRECT:
-{{
-  'answer': '...'
-}}
-
-"""
+    return prompts
+
+
+def llm2_system_blocks(router_output: RouterOutput) -> List[Dict[str, Any]]:
+    """
+    Static LLM-2 system prompt as Anthropic system content blocks.
     
-    prompt_parts.append(execution_summary)
+    Block layout:
+        0. BASE_LLM2_SYSTEM_PROMPT                        - identical on every call (cache_control)
+        1. UC injections + execution instructions for this routing shape (cache_control)
     
-    # JOIN all parts together
-    final_prompt = "\n\n".join(prompt_parts)
+    The per-query part comes from build_dynamic_context() and goes in the user message.
+    """
+    static_system = build_static_system(*_routing_shape(router_output))
+    base = _base_prompt()
     
-    return final_prompt
\ No newline at end of file
+    return [
+        {"type": "text", "text": base, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": static_system[len(base):], "cache_control": {"type": "ephemeral"}},
+    ]
@@ -6,6 +6,9 @@ Provides simple, reusable functions to query the category vector store.
 Core functions:
 - load_category_vector_store() - Load ChromaDB collection
 - query_categories() - Search for categories by natural language term
+- query_categories_batch() - Same search for many terms (one encode + one matmul)
+- embed_terms() - Normalized query vectors for many terms (embedding-cached)
+- reload_category_index() - Re-read vectors after rebuilding the store
 - test_rag_queries() - Comprehensive test of all 60 categories
 
 Usage:
@@ -43,10 +46,15 @@ Summary - Caching:
     - Essential for production ML systems 
 """
 
-from functools import lru_cache
-from typing import List, Dict, Any, Optional
+import atexit
+import os
+import threading
+from functools import lru_cache, wraps
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
 import chromadb
 from chromadb.config import Settings
 from chromadb.api.models.Collection import Collection
@@ -59,6 +67,9 @@ from sentence_transformers import SentenceTransformer
 
 # CRITICAL: Must match build_category_vectorstore.py
 EMBEDDING_MODEL_NAME = "intfloat/multilingual-e5-base"  # ✅ CORRECT MODEL
+# No e5 "query: " / "passage: " prefixes: build_category_vectorstore.py embeds raw
+# text, so query terms are embedded raw too (distance thresholds are calibrated
+# on that). Adding a prefix means rebuilding the store and re-tuning thresholds.
 CHROMA_PERSIST_DIR = "data/chroma_trn_categories"
 COLLECTION_NAME = "transaction_categories"
 
@@ -80,20 +91,31 @@ DEFAULT_MIN_CONFIDENCE = 0.6  # Distance threshold (lower is better)
                               # 0.0-0.4: Excellent, 0.4-0.6: Good, 0.6-0.75: Acceptable
                               # 0.6 threshold = Keep excellent + good matches
 
+# Embedding backend for QUERY vectors (the stored vectors are built in FP32)
+#   "torch"     - SentenceTransformer / PyTorch FP32 (default)
+#   "torch-bf16" - PyTorch with bfloat16 weights, FP32 pooling/normalization
+#   "onnx-int8" - ONNX Runtime, dynamic int8 quantization (needs `optimum[onnxruntime]`)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+ONNX_INT8_MODEL_DIR = "data/e5-base-int8"
 
-# ═══════════════════════════════════════════════════════════════════
-# CHROMADB GLOBAL REGISTRY FIX - NUCLEAR OPTION
-# ═══════════════════════════════════════════════════════════════════
+# CPU threads for query encoding - tiny 2-3 word inputs gain nothing from more
+# threads, oversubscription only thrashes caches
+TORCH_NUM_THREADS = int(os.getenv("RAG_TORCH_THREADS", str(min(4, os.cpu_count() or 1))))
+
+# Terms per forward pass when embedding many terms (inputs are length-sorted first)
+ENCODE_BATCH_SIZE = 32
+
+# Persistent term → query-embedding cache (survives process restarts)
+EMBEDDING_CACHE_PATH = Path("data/query_embedding_cache.npz")
+
+# RAG_EAGER_LOAD=1 loads the model + index in a background thread at import,
+# so the first query doesn't pay the 2-5s load (off by default for tests/CI)
+RAG_EAGER_LOAD = os.getenv("RAG_EAGER_LOAD", "0") == "1"
+
+# Serializes the cached loaders so a background warm-up and the first request
+# never load the model / open ChromaDB twice (re-entrant: loaders call each other)
+_LOAD_LOCK = threading.RLock()
 
-# CRITICAL: Clear ALL ChromaDB global state at module import time
-# This prevents "An instance of Chroma already exists" errors
-# NUCLEAR approach: Clear the ENTIRE registry, not just one identifier
-try:
-    from chromadb.api.shared_system_client import SharedSystemClient
-    # Clear ALL registered systems (nuclear option)
-    SharedSystemClient._identifier_to_system.clear()
-except Exception:
-    pass  # If clearing fails, continue anyway
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -103,25 +125,142 @@ except Exception:
 # ═══════════════════════════════════════════════════════════════════
 
 
+def _load_once(fn):
+    """lru_cache(maxsize=1) whose calls run under _LOAD_LOCK."""
+    cached = lru_cache(maxsize=1)(fn)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _LOAD_LOCK:
+            return cached(*args, **kwargs)
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+
+def _drop_chroma_system(persist_dir: str = CHROMA_PERSIST_DIR) -> bool:
+    """
+    Remove ONLY this store's entry from ChromaDB's global client registry.
+    
+    Other Chroma clients in the process (other RAG modules) are left intact.
+    
+    Returns:
+        True if an entry was removed
+    """
+    from chromadb.api.shared_system_client import SharedSystemClient
+    
+    registry = SharedSystemClient._identifier_to_system
+    removed = False
+    for key in {str(persist_dir), str(Path(persist_dir).resolve())}:
+        removed = registry.pop(key, None) is not None or removed
+    return removed
+
+
 def reset_chromadb_registry():
     """
-    EMERGENCY: Manually clear ChromaDB's global registry.
+    EMERGENCY: Drop this store's ChromaDB client and the cached collection/index.
     
     Call this if you get "An instance of Chroma already exists" errors.
+    Only the category store's registry entry is removed, not other clients.
     
     Usage:
         from rag.trn_category_rag import reset_chromadb_registry
         reset_chromadb_registry()
     """
     try:
-        from chromadb.api.shared_system_client import SharedSystemClient
-        SharedSystemClient._identifier_to_system.clear()
-        print("✅ ChromaDB registry cleared successfully")
+        _drop_chroma_system()
+        load_category_vector_store.cache_clear()
+        _load_category_index.cache_clear()
+        print("✅ ChromaDB registry entry cleared successfully")
     except Exception as e:
         print(f"❌ Failed to clear registry: {e}")
 
 
-@lru_cache(maxsize=1)  # Remember 1 result
+class _OnnxInt8Embedder:
+    """
+    Minimal SentenceTransformer stand-in backed by an int8 ONNX Runtime session.
+    
+    encode() = tokenizer → ORT session → mean pooling → L2 normalize (NumPy),
+    which is what the e5 SentenceTransformer pipeline computes.
+    """
+    
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+    
+    def encode(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            enc = self.tokenizer(
+                list(sentences[start:start + batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=512,
+                return_tensors="np",
+            )
+            hidden = self.model(**enc).last_hidden_state
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.linalg.norm(pooled, axis=1, keepdims=True)
+            batches.append(pooled.astype(np.float32))
+        
+        return np.concatenate(batches, axis=0)
+
+
+def _load_onnx_int8_model() -> _OnnxInt8Embedder:
+    """Load the int8 ONNX model, exporting + quantizing it once if missing."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    
+    model_dir = Path(ONNX_INT8_MODEL_DIR)
+    
+    if not (model_dir / "model_quantized.onnx").exists():
+        print(f"⚡ Exporting {EMBEDDING_MODEL_NAME} to int8 ONNX (one-time) → {model_dir}")
+        fp32_dir = model_dir / "fp32"
+        ORTModelForFeatureExtraction.from_pretrained(EMBEDDING_MODEL_NAME, export=True).save_pretrained(fp32_dir)
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+        quantizer.quantize(
+            save_dir=model_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+        )
+        AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME).save_pretrained(model_dir)
+    
+    model = ORTModelForFeatureExtraction.from_pretrained(model_dir, file_name="model_quantized.onnx")
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return _OnnxInt8Embedder(model, tokenizer)
+
+
+def _load_bf16_model() -> SentenceTransformer:
+    """
+    Load the model with bfloat16 weights (no autocast).
+    
+    Pooling and normalization are upcast to FP32: summing token embeddings in
+    bf16 loses enough precision to shift distances near the thresholds.
+    """
+    import torch
+    
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, model_kwargs={"torch_dtype": torch.bfloat16})
+    
+    pooling = model[1]
+    pooling_forward = pooling.forward
+    
+    def _fp32_pooling_forward(features):
+        features["token_embeddings"] = features["token_embeddings"].float()
+        return pooling_forward(features)
+    
+    pooling.forward = _fp32_pooling_forward
+    
+    # Smoke test - raises on hardware/kernels without bf16 support
+    model.encode(["warmup"], show_progress_bar=False)
+    return model
+
+
+@_load_once  # Remember 1 result, loaded under _LOAD_LOCK
 def _get_embedding_model() -> SentenceTransformer:
     """
     Load and cache the embedding model.
@@ -129,19 +268,189 @@ def _get_embedding_model() -> SentenceTransformer:
     Uses LRU cache to ensure model is loaded only once per session.
     Subsequent calls return the cached instance.
     
+    With RAG_EMBEDDING_BACKEND=torch-bf16 the weights are loaded in bfloat16;
+    with RAG_EMBEDDING_BACKEND=onnx-int8 an int8 ONNX Runtime model with the
+    same encode() interface is returned instead. Both fall back to PyTorch
+    FP32 when unsupported.
+    
     Returns:
         SentenceTransformer: Cached embedding model
     """
+    if EMBEDDING_BACKEND == "torch-bf16":
+        try:
+            return _load_bf16_model()
+        except Exception as e:
+            print(f"⚠️  bf16 embedder unavailable, using PyTorch FP32: {e}")
+    
+    if EMBEDDING_BACKEND == "onnx-int8":
+        try:
+            return _load_onnx_int8_model()
+        except Exception as e:
+            print(f"⚠️  int8 ONNX embedder unavailable, using PyTorch FP32: {e}")
+    
     return SentenceTransformer(EMBEDDING_MODEL_NAME)
 
 
-@lru_cache(maxsize=1)  # Remember 1 result
+@_load_once  # Remember 1 result, loaded under _LOAD_LOCK
+def _get_fast_encoder():
+    """
+    (tokenizer, transformer) of the SentenceTransformer model, or None.
+    
+    Also caps torch's intra-op threads at TORCH_NUM_THREADS (once).
+    
+    None for backends that are not SentenceTransformer (ONNX); those go
+    through their own encode().
+    """
+    model = _get_embedding_model()
+    if not isinstance(model, SentenceTransformer):
+        return None
+    
+    import torch
+    torch.set_num_threads(TORCH_NUM_THREADS)
+    
+    return model.tokenizer, model[0].auto_model.eval()
+
+
+def _encode_fast(terms: List[str]) -> np.ndarray:
+    """
+    Embed short query terms: tokenizer → transformer → mean pool → L2 normalize.
+    
+    Same vectors as SentenceTransformer.encode() for e5 (Transformer + mean
+    Pooling + Normalize), without its per-call Python overhead (sorting,
+    batching, progress bar, feature dicts) that dominates on 2-3 word terms.
+    
+    No "query: " prefix is added (see EMBEDDING_MODEL_NAME).
+    """
+    fast_encoder = _get_fast_encoder()
+    if fast_encoder is None:
+        return np.ascontiguousarray(
+            _get_embedding_model().encode(terms, show_progress_bar=False, normalize_embeddings=True),
+            dtype=np.float32,
+        )
+    
+    import torch
+    
+    tokenizer, transformer = fast_encoder
+    
+    # Smart batching: similar-length terms share a mini-batch → less padding
+    order = np.argsort([len(t) for t in terms], kind="stable")
+    
+    pooled_batches = []
+    with torch.inference_mode():
+        for start in range(0, len(order), ENCODE_BATCH_SIZE):
+            batch = [terms[i] for i in order[start:start + ENCODE_BATCH_SIZE]]
+            enc = tokenizer(batch, padding=True, truncation=True, max_length=64, return_tensors="pt")
+            enc = {k: v.to(transformer.device) for k, v in enc.items()}
+            
+            token_embeddings = transformer(**enc).last_hidden_state.float()
+            mask = enc["attention_mask"].unsqueeze(-1).float()
+            pooled = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled_batches.append(torch.nn.functional.normalize(pooled, p=2, dim=1).cpu().numpy())
+    
+    # Restore input order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    
+    # float32 + C-contiguous regardless of model dtype (bf16 weights etc.)
+    return np.ascontiguousarray(np.concatenate(pooled_batches)[inverse], dtype=np.float32)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# PERSISTENT EMBEDDING CACHE
+# ═══════════════════════════════════════════════════════════════════
+
+# Tagged with model + backend: vectors from another model/backend are ignored
+_EMB_CACHE_TAG = f"{EMBEDDING_MODEL_NAME}|{EMBEDDING_BACKEND}"
+_EMB_CACHE: Dict[str, np.ndarray] = {}
+_emb_cache_dirty = False
+
+
+def _load_embedding_cache(path: Path = EMBEDDING_CACHE_PATH) -> None:
+    if not path.exists():
+        return
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["tag"]) != _EMB_CACHE_TAG:
+                return
+            vecs = np.ascontiguousarray(data["vecs"], dtype=np.float32)
+            vecs.flags.writeable = False
+            _EMB_CACHE.update(zip(data["terms"].tolist(), vecs))
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable embedding cache {path}: {e}")
+
+
+def _save_embedding_cache(path: Path = EMBEDDING_CACHE_PATH) -> None:
+    if not _emb_cache_dirty or not _EMB_CACHE:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = list(_EMB_CACHE)
+        np.savez(
+            path,
+            tag=np.array(_EMB_CACHE_TAG),
+            terms=np.array(terms),
+            vecs=np.stack([_EMB_CACHE[t] for t in terms]),
+        )
+    except Exception as e:
+        print(f"⚠️  Could not save embedding cache {path}: {e}")
+
+
+_load_embedding_cache()
+atexit.register(_save_embedding_cache)
+
+
+@lru_cache(maxsize=1024)  # Remember 1024 recent terms
+def _embed_term(term: str) -> np.ndarray:
+    """
+    Embed one (already stripped/lowercased) query term, memoized.
+    
+    The same terms recur across tool calls and test runs; a cache hit skips
+    tokenization and the transformer forward pass. Terms embedded in earlier
+    processes come from the on-disk cache (data/query_embedding_cache.npz).
+    The cached vector is kept as a read-only float32 array (no per-element
+    Python float boxing), so callers can pass it straight to NumPy but
+    cannot mutate the cache.
+    """
+    global _emb_cache_dirty
+    
+    vector = _EMB_CACHE.get(term)
+    if vector is not None:
+        return vector
+    
+    vector = np.ascontiguousarray(_encode_fast([term])[0], dtype=np.float32)
+    vector.flags.writeable = False
+    _EMB_CACHE[term] = vector
+    _emb_cache_dirty = True
+    return vector
+
+
+def embed_terms(terms: List[str]) -> np.ndarray:
+    """
+    Embed many (already stripped/lowercased) query terms → (N, D) float32.
+    
+    Vectors are L2-normalized, so a dot product is the cosine similarity.
+    Vectors already in the embedding cache are reused; all remaining terms
+    go through ONE encode() call and are added to the cache.
+    """
+    global _emb_cache_dirty
+    
+    missing = [t for t in dict.fromkeys(terms) if t not in _EMB_CACHE]
+    if missing:
+        vectors = _encode_fast(missing)
+        vectors.flags.writeable = False
+        _EMB_CACHE.update(zip(missing, vectors))
+        _emb_cache_dirty = True
+    
+    return np.stack([_EMB_CACHE[t] for t in terms])
+
+
+@_load_once  # Remember 1 result, loaded under _LOAD_LOCK
 def load_category_vector_store() -> Collection:
     """
     Load and cache the category vector store ChromaDB collection.
     
     Uses LRU cache to ensure ChromaDB client is created only once per session.
-    ChromaDB's global registry is cleared at module import to prevent conflicts.
+    On an "already exists" registry conflict, only this store's entry is dropped.
     
     This function loads the persistent vector store created by
     build_category_vectorstore.py. The vector store must exist
@@ -161,11 +470,21 @@ def load_category_vector_store() -> Collection:
             f"Run 'python build_category_vectorstore.py' first to create it."
         )
     
-    # Initialize ChromaDB client (registry already cleared at module level)
-    client = chromadb.PersistentClient(
-        path=str(persist_dir),
-        settings=CHROMA_SETTINGS  # ← Use pre-defined settings constant
-    )
+    # Initialize ChromaDB client
+    try:
+        client = chromadb.PersistentClient(
+            path=str(persist_dir),
+            settings=CHROMA_SETTINGS  # ← Use pre-defined settings constant
+        )
+    except ValueError as e:
+        if "already exists" not in str(e):
+            raise
+        # Stale registry entry for THIS path (e.g. different settings) - drop it and retry
+        _drop_chroma_system(str(persist_dir))
+        client = chromadb.PersistentClient(
+            path=str(persist_dir),
+            settings=CHROMA_SETTINGS
+        )
     
     # Load collection
     try:
@@ -185,9 +504,108 @@ def load_category_vector_store() -> Collection:
             f"Run 'python build_category_vectorstore.py' first."
         )
     
+    # Verify stored vectors are L2-normalized (search relies on ||x|| = 1)
+    sample = collection.peek(1).get("embeddings")
+    if sample is not None and len(sample) > 0:
+        norm = float(np.linalg.norm(np.asarray(sample[0], dtype=np.float32)))
+        if abs(norm - 1.0) >= 1e-3:
+            raise ValueError(
+                f"Collection '{COLLECTION_NAME}' holds non-normalized vectors (norm={norm:.4f}).\n"
+                f"Rebuild with 'python build_category_vectorstore.py' (normalize_embeddings=True)."
+            )
+    
     return collection
 
 
+# ═══════════════════════════════════════════════════════════════════
+# IN-PROCESS VECTOR INDEX
+# ═══════════════════════════════════════════════════════════════════
+
+# The store holds ~111 category vectors. Brute-force search over a NumPy
+# matrix (one matmul) is far cheaper than a Chroma query (HNSW + SQLite
+# metadata + client overhead). Chroma is read once, at load time; metadata
+# is unpacked into row-aligned match fields, so a query is a list lookup.
+
+
+def _match_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Match dict for one stored category (score filled in per query)."""
+    cid = metadata.get(METADATA_ID)
+    cnm = metadata.get(METADATA_NAME)
+    return {
+        'type': metadata.get(METADATA_TYPE),
+        'score': None,
+        'description': metadata.get(METADATA_DESCRIPTION, ''),
+        'id': cid,
+        'name': cnm,
+        'group_id': metadata.get(METADATA_GROUP_ID, cid),       # Use own ID if group
+        'group_name': metadata.get(METADATA_GROUP_NAME, cnm),   # Use own name if group
+    }
+
+
+@_load_once  # Remember 1 result, loaded under _LOAD_LOCK
+def _load_category_index() -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Load all category vectors and metadatas from ChromaDB once.
+    
+    Returns:
+        (L2-normalized embeddings (N, D) float32, match fields per row)
+    """
+    collection = load_category_vector_store()
+    data = collection.get(include=["embeddings", "metadatas"])
+    
+    embeddings = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+    return embeddings, [_match_fields(meta) for meta in data["metadatas"]]
+
+
+def _search_index(
+    query_embeddings: np.ndarray,
+    top_k: int,
+) -> List[Tuple[List[Dict[str, Any]], List[float]]]:
+    """
+    Return (match fields, distances) of the top_k neighbours for each query row.
+    
+    Distances are squared L2, same as ChromaDB's default space, so thresholds
+    calibrated on Chroma results keep their meaning. Stored vectors are unit
+    length, so ||x - q/|q|||² = 2 - 2·(x·q)/|q|. Query normalization is folded
+    into the scores (N divisions) instead of building a normalized copy of q
+    (D = 768 divisions + a temporary).
+    """
+    embeddings, rows = _load_category_index()
+    queries = np.atleast_2d(np.ascontiguousarray(query_embeddings, dtype=np.float32))
+    
+    distances = queries @ embeddings.T
+    distances /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    distances *= -2.0
+    distances += 2.0
+    np.maximum(distances, 0.0, out=distances)
+    
+    k = min(top_k, embeddings.shape[0])
+    results = []
+    for row in distances:
+        top = np.argpartition(row, k - 1)[:k] if k < row.shape[0] else np.arange(row.shape[0])
+        top = top[np.argsort(row[top])]
+        results.append(([rows[i] for i in top], [float(row[i]) for i in top]))
+    return results
+
+
+def reload_category_index() -> None:
+    """Drop the in-process index (e.g. after rebuilding the vector store)."""
+    _load_category_index.cache_clear()
+
+
+def _eager_load() -> None:
+    """Load embedding model + category index (both lru_cached) off the request path."""
+    try:
+        _get_fast_encoder()
+        _load_category_index()
+    except Exception as e:
+        print(f"⚠️  RAG eager load failed (will load on first query): {e}")
+
+
+if RAG_EAGER_LOAD:
+    threading.Thread(target=_eager_load, name="rag-eager-load", daemon=True).start()
+
+
 # ═══════════════════════════════════════════════════════════════════
 # MAIN QUERY FUNCTION
 # ═══════════════════════════════════════════════════════════════════
@@ -242,47 +660,78 @@ def query_categories(
     # Use provided threshold or default
     active_threshold = min_confidence if min_confidence is not None else DEFAULT_MIN_CONFIDENCE
     
-    # Load embedding model and vector store
-    embedding_model = _get_embedding_model()
-    collection = load_category_vector_store()
+    # Generate query embedding (cached per normalized term)
+    query_embedding = _embed_term(term.lower())
     
-    # Generate query embedding
-    query_embedding = embedding_model.encode([term])[0]
+    # Search the in-process index
+    rows, distances = _search_index(query_embedding, top_k)[0]
     
-    # Search vector store
-    results = collection.query(
-        query_embeddings=[query_embedding.tolist()],
-        n_results=top_k
-    )
+    return _parse_matches(rows, distances, active_threshold)
+
+
+def query_categories_batch(
+    terms: List[str],
+    top_k: int = DEFAULT_TOP_K,
+    min_confidence: Optional[float] = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    Query the category vector store for many terms at once.
     
-    # Parse results into structured format
-    matches = []
+    Same results as calling query_categories() per term, but all terms not
+    in the embedding cache are embedded in ONE encode() call (shared
+    tokenizer/model setup, batched padding) and scored with ONE matmul
+    against the in-process index.
     
-    if results['metadatas'] and len(results['metadatas'][0]) > 0:
-        for i, metadata in enumerate(results['metadatas'][0]):
-            distance = results['distances'][0][i] if 'distances' in results else None
-            
-            # Skip if above distance threshold
-            if active_threshold is not None and distance is not None:
-                if distance > active_threshold:
-                    continue
-            
-            # Build match object using metadata constants
-            match = {
-                'type': metadata.get(METADATA_TYPE),
-                'score': float(distance) if distance is not None else None,
-                'description': metadata.get(METADATA_DESCRIPTION, ''),
-            }
-            
-            # Add ID and name (same keys for both groups and subcategories)
-            match.update({
-                'id': metadata.get(METADATA_ID),
-                'name': metadata.get(METADATA_NAME),
-                'group_id': metadata.get(METADATA_GROUP_ID, metadata.get(METADATA_ID)),  # Use own ID if group
-                'group_name': metadata.get(METADATA_GROUP_NAME, metadata.get(METADATA_NAME)),  # Use own name if group
-            })
-            
-            matches.append(match)
+    Args:
+        terms: Natural language category terms
+        top_k: Number of results per term (default: 3)
+        min_confidence: Maximum distance threshold (None = use DEFAULT_MIN_CONFIDENCE)
+    
+    Returns:
+        One list of matches per term, in the same order as `terms`
+        (same match format as query_categories())
+    
+    Raises:
+        ValueError: If vector store doesn't exist or any term is empty
+    """
+    if not terms:
+        return []
+    
+    cleaned = []
+    for term in terms:
+        if not term or not term.strip():
+            raise ValueError("Category term cannot be empty")
+        cleaned.append(term.strip().lower())
+    
+    active_threshold = min_confidence if min_confidence is not None else DEFAULT_MIN_CONFIDENCE
+    
+    # At most one forward pass for all terms → (N, D)
+    query_embeddings = embed_terms(cleaned)
+    
+    # One matmul for all query vectors
+    return [
+        _parse_matches(rows, distances, active_threshold)
+        for rows, distances in _search_index(query_embeddings, top_k)
+    ]
+
+
+def _parse_matches(
+    rows: List[Dict[str, Any]],
+    distances: List[float],
+    active_threshold: Optional[float],
+) -> List[Dict[str, Any]]:
+    """Copy one query's match fields with their scores (threshold applied)."""
+    thr = active_threshold
+    
+    matches = []
+    for fields, dist in zip(rows, distances):
+        # Skip if above distance threshold
+        if thr is not None and dist > thr:
+            continue
+        
+        match = fields.copy()   # Never hand out the index's own dicts
+        match['score'] = dist
+        matches.append(match)
     
     return matches
 
@@ -307,16 +756,14 @@ def get_best_match(
     Returns:
         Best matching category dict, or None if no good matches
     """
-    matches = query_categories(term, top_k=5)
+    matches = query_categories(term, top_k=DEFAULT_TOP_K)
     
     if not matches:
         return None
     
-    # If preferring subcategories, prioritize them
+    # If preferring subcategories, take the first one (matches are already sorted)
     if prefer_subcategory:
-        subcats = [m for m in matches if m['type'] == 'subcategory']
-        if subcats:
-            return subcats[0]
+        return next((m for m in matches if m['type'] == 'subcategory'), matches[0])
     
     # Return best match overall
     return matches[0]
@@ -528,11 +975,18 @@ def format_match_for_display(match: Dict[str, Any]) -> str:
     
 #     results = {"passed": 0, "failed": 0, "errors": []}
     
+#     # One encode() + one collection.query() for all 60 terms
+#     batch_matches = query_categories_batch(
+#         [term for term, _, _ in all_test_queries],
+#         top_k=3,
+#         min_confidence=active_threshold,
+#     )
+    
 #     for i, (term, expected_id, query_type) in enumerate(all_test_queries, 1):
 #         print(f"{i}. Query: '{term}' (Type: {query_type}, Expected: {expected_id})")
         
 #         try:
-#             matches = query_categories(term, top_k=3, min_confidence=active_threshold)
+#             matches = batch_matches[i - 1]
             
 #             if matches:
 #                 # Check if expected category is in top 3
@@ -607,7 +1061,7 @@ def format_match_for_display(match: Dict[str, Any]) -> str:
 HOW TO USE IN JUPYTER:
 
 1. Import functions:
-   from rag.trn_category_rag import query_categories, test_rag_queries
+   from rag.trn_category_rag import query_categories, query_categories_batch, test_rag_queries
 
 2. Manual query:
    results = query_categories("coffee shops", top_k=3, min_confidence=0.6)
@@ -0,0 +1,288 @@
+"""
+Semantic response cache for LLM-1 (Router & Clarifier).
+
+LLM-1 is effectively a classifier: paraphrases of the same request
+("show my recent transactions" / "list recent purchases") map to the same
+RouterOutput. This cache sits in front of router_node and returns a stored
+RouterOutput when a new query is close enough to a previously routed one.
+
+Cache key:
+    - query embedding (cosine similarity >= threshold, 1-NN)
+    - user id from the "I am USER_xxx." prefix (exact match) - never shared across users
+    - the current day (exact match): resolved_dates are absolute, so "last month"
+      routed yesterday must not be served today
+    - conversation_summary preference values (hash, exact match)
+    - salient tokens (exact match), so that queries differing in one decisive word
+      never share an entry even if embeddings are close:
+        numbers / months / temporal units   ("last month" vs "last week")
+        category terms                      ("groceries" vs "restaurants")
+        direction + aggregation words       ("spend" vs "earn", "total" vs "average")
+        amount qualifiers                   ("large" vs "small")
+    - router prompt hash (namespace), so prompt edits invalidate everything
+
+Only single-turn calls are cached (multi-turn clarifications depend on history),
+and error-recovery outputs are never stored.
+
+Usage:
+    from router_cache import semantic_cache
+
+    @semantic_cache(threshold=0.95, ttl=3600)
+    def router_node(state: GraphState) -> GraphState: ...
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from prompts.llm1_prompt import ROUTER_PROMPT_SHA256, detect_category_terms
+from router_fast_path import _AGGREGATION_RE, _AMOUNT_RE
+from schemas.router_models import ConversationSummary, GraphState, RouterOutput
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════
+
+# Set ROUTER_SEMANTIC_CACHE=0 to bypass the cache (e.g. when evaluating prompts)
+ROUTER_CACHE_ENABLED = os.getenv("ROUTER_SEMANTIC_CACHE", "1") != "0"
+
+DEFAULT_THRESHOLD = 0.95    # Cosine similarity for a hit
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 2048  # Oldest entries are evicted first
+
+# Namespace: any edit to the router prompt invalidates cached outputs
+PROMPT_NAMESPACE = ROUTER_PROMPT_SHA256
+
+# "I am USER_001." prefix is identity, not intent - keep it out of the embedding
+# (the user id goes into the exact-match key instead)
+_USER_PREFIX_RE = re.compile(r"^\s*I am (USER_\d+)\.\s*")
+
+_SALIENT_TOKEN_RE = re.compile(
+    r"\d+(?:\.\d+)?"
+    r"|\b(?:today|yesterday|tomorrow|day|days|week|weeks|month|months|quarter|quarters|year|years"
+    r"|last|this|next|previous|current|recent|ytd"
+    r"|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec"
+    r"|january|february|march|april|june|july|august|september|october|november|december)\b",
+    re.IGNORECASE,
+)
+
+# Money direction words beyond the aggregation verbs (spend / earn / income)
+_DIRECTION_TOKEN_RE = re.compile(
+    r"\b(paid|pay|payments?|purchases?|bought|expenses?|debits?"
+    r"|received|deposits?|salary|refunds?|credits?|earnings)\b",
+    re.IGNORECASE,
+)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# KEY HELPERS
+# ═══════════════════════════════════════════════════════════════════
+
+def _strip_user_prefix(user_query: str) -> str:
+    return _USER_PREFIX_RE.sub("", user_query).strip()
+
+
+def _user_key(user_query: str) -> str:
+    """User id from the "I am USER_xxx." prefix ("" when the query has none)."""
+    match = _USER_PREFIX_RE.match(user_query)
+    return match.group(1) if match else ""
+
+
+def _salient_key(user_query: str) -> Tuple[str, ...]:
+    """
+    Sorted set of the words that decide routing and must match exactly for a hit:
+    numbers / temporal words, category terms, direction / aggregation words and
+    amount qualifiers. A hit returns the stored resolved_trn_categories, direction
+    and threshold, so these can never be left to embedding similarity.
+    """
+    tokens = {t.lower() for t in _SALIENT_TOKEN_RE.findall(user_query)}
+    tokens.update(term for _, term, _ in detect_category_terms(user_query))
+    for pattern in (_AGGREGATION_RE, _AMOUNT_RE, _DIRECTION_TOKEN_RE):
+        # "$1" style amount matches are covered by the number tokens
+        tokens.update(m.group(1).lower() for m in pattern.finditer(user_query) if m.group(1))
+    return tuple(sorted(tokens))
+
+
+def _summary_key(conversation_summary: Optional[ConversationSummary]) -> str:
+    """
+    Hash of preference VALUES only.
+
+    PreferenceEntry metadata (turn_id, original_query, ...) does not change routing,
+    so it's excluded - otherwise every turn would produce a new key.
+    """
+    if conversation_summary is None:
+        return "none"
+
+    values = {
+        "time_window": conversation_summary.time_window.value if conversation_summary.time_window else None,
+        "amount_threshold_large": (
+            conversation_summary.amount_threshold_large.value
+            if conversation_summary.amount_threshold_large else None
+        ),
+        "account_scope": conversation_summary.account_scope.value if conversation_summary.account_scope else None,
+        "category_preferences": {
+            k: v.value for k, v in conversation_summary.category_preferences.items()
+        },
+    }
+    blob = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def _embed(text: str) -> np.ndarray:
+    """Normalized float32 query embedding (reuses the RAG embedding model)."""
+    from rag.trn_category_rag import _get_embedding_model
+
+    vec = _get_embedding_model().encode([text], normalize_embeddings=True)[0]
+    return np.asarray(vec, dtype=np.float32)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════
+
+class RouterSemanticCache:
+    """
+    In-process 1-NN semantic cache for RouterOutput.
+
+    Embeddings are kept in a contiguous float32 matrix; lookup is one matrix-vector
+    product restricted to entries with the same (namespace, user, day, summary,
+    salient) key.
+    A few thousand 768-d rows is well within brute-force range.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clear()
+
+    def clear(self) -> None:
+        self._embeddings: Optional[np.ndarray] = None   # (n, dim) float32
+        self._keys: List[Tuple[str, str, str, str, Tuple[str, ...]]] = []
+        self._outputs: List[RouterOutput] = []
+        self._created_at: List[float] = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def _key(self, user_query: str, conversation_summary: Optional[ConversationSummary]):
+        return (
+            PROMPT_NAMESPACE,
+            _user_key(user_query),
+            date.today().isoformat(),   # dates in cached outputs were resolved on this day
+            _summary_key(conversation_summary),
+            _salient_key(_strip_user_prefix(user_query)),
+        )
+
+    def _expire(self, now: float) -> None:
+        keep = [i for i, t in enumerate(self._created_at) if now - t < self.ttl_seconds]
+        if len(keep) == len(self._created_at):
+            return
+        self._embeddings = self._embeddings[keep] if keep else None
+        self._keys = [self._keys[i] for i in keep]
+        self._outputs = [self._outputs[i] for i in keep]
+        self._created_at = [self._created_at[i] for i in keep]
+
+    def lookup(
+        self,
+        user_query: str,
+        conversation_summary: Optional[ConversationSummary] = None,
+    ) -> Optional[RouterOutput]:
+        """Return a copy of the cached RouterOutput for a near-duplicate query, else None."""
+        self._expire(time.time())
+
+        key = self._key(user_query, conversation_summary)
+        candidates = [i for i, k in enumerate(self._keys) if k == key]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        query_vec = _embed(_strip_user_prefix(user_query))
+        sims = self._embeddings[candidates] @ query_vec
+        best = int(np.argmax(sims))
+
+        if sims[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        print(f"⚡ Router cache hit (cosine={sims[best]:.3f}) - skipping LLM-1 call")
+        return self._outputs[candidates[best]].model_copy(deep=True)
+
+    def store(
+        self,
+        user_query: str,
+        conversation_summary: Optional[ConversationSummary],
+        router_output: RouterOutput,
+    ) -> None:
+        """Insert a RouterOutput (evicts the oldest entry when full)."""
+        if len(self._outputs) >= self.max_entries:
+            self._embeddings = self._embeddings[1:]
+            self._keys.pop(0)
+            self._outputs.pop(0)
+            self._created_at.pop(0)
+
+        vec = _embed(_strip_user_prefix(user_query))[None, :]
+        self._embeddings = vec if self._embeddings is None else np.vstack([self._embeddings, vec])
+        self._keys.append(self._key(user_query, conversation_summary))
+        self._outputs.append(router_output.model_copy(deep=True))
+        self._created_at.append(time.time())
+
+
+def _is_cacheable(router_output: Optional[RouterOutput]) -> bool:
+    """Never cache error-recovery outputs; fast-path outputs are cheaper to rebuild than to embed."""
+    if router_output is None or "error_recovery" in router_output.missing_info:
+        return False
+    return not (router_output.router_notes or "").startswith("fast_path:")
+
+
+# Shared instance used by router_node
+router_cache = RouterSemanticCache()
+
+
+def semantic_cache(
+    threshold: float = DEFAULT_THRESHOLD,
+    ttl: float = DEFAULT_TTL_SECONDS,
+) -> Callable[[Callable[[GraphState], GraphState]], Callable[[GraphState], GraphState]]:
+    """
+    Decorator for the router node: serve RouterOutput from the semantic cache
+    when possible, otherwise call the node and store its output.
+
+    Multi-turn calls (state.raw_messages populated) always go to the LLM.
+    """
+    router_cache.threshold = threshold
+    router_cache.ttl_seconds = ttl
+
+    def decorator(node_fn: Callable[[GraphState], GraphState]) -> Callable[[GraphState], GraphState]:
+        @functools.wraps(node_fn)
+        def wrapper(state: GraphState) -> GraphState:
+            if not ROUTER_CACHE_ENABLED or state.raw_messages:
+                return node_fn(state)
+
+            cached = router_cache.lookup(state.user_query, state.conversation_summary)
+            if cached is not None:
+                state.router_output = cached
+                return state
+
+            state = node_fn(state)
+            if _is_cacheable(state.router_output):
+                router_cache.store(state.user_query, state.conversation_summary, state.router_output)
+            return state
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,136 @@
+"""
+Context-size guard for LLM-1 (Router & Clarifier).
+
+Long clarification chains keep appending to state.raw_messages, and every
+router call re-sends the full history after the system prompt. Before each
+call, the estimated input size is checked against the model's context window:
+
+    ROUTER_PROMPT_TOKENS + tokens(history) + output reserve  >  threshold × window
+
+When over budget, all but the last few messages are condensed by a cheap model
+into ONE summary message; the most recent messages are kept verbatim.
+
+Condensation is memoized on the exact bytes of the condensed messages, so the
+same long history always produces the same (cache-reusable) prefix instead of
+a new summary on every turn.
+
+Usage:
+    from router_context import condense_history
+
+    history = condense_history(state.raw_messages)
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from prompts.llm1_prompt import ROUTER_PROMPT_TOKENS, count_tokens
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════
+
+ROUTER_CONTEXT_WINDOW = int(os.getenv("ROUTER_CONTEXT_WINDOW", "200000"))
+ROUTER_CONDENSE_THRESHOLD = float(os.getenv("ROUTER_CONDENSE_THRESHOLD", "0.9"))
+ROUTER_OUTPUT_RESERVE = 1024     # Tokens kept free for the RouterOutput tool call
+ROUTER_KEEP_VERBATIM = 3         # Most recent messages never condensed
+
+CONDENSE_MODEL = "claude-haiku-4-5-20251001"
+
+SUMMARY_PREFIX = "[Summary of earlier conversation]"
+
+_CONDENSE_INSTRUCTIONS = (
+    "Summarize the following conversation between a user and a banking assistant "
+    "in a few short bullet points. Keep every stated preference (time window, "
+    "amount threshold, account, categories), every open question and the user's "
+    "original request. Do not add new information."
+)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════════════════
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, default=str)
+
+
+def history_tokens(raw_messages: List[Dict[str, Any]]) -> int:
+    """Estimated tokens of the conversation history."""
+    return sum(count_tokens(_message_text(m)) for m in raw_messages)
+
+
+def needs_condensing(
+    raw_messages: List[Dict[str, Any]],
+    payload_tokens: int = 0,
+    context_window: int = ROUTER_CONTEXT_WINDOW,
+    threshold: float = ROUTER_CONDENSE_THRESHOLD,
+) -> bool:
+    total = ROUTER_PROMPT_TOKENS + history_tokens(raw_messages) + payload_tokens + ROUTER_OUTPUT_RESERVE
+    return total > threshold * context_window
+
+
+@lru_cache(maxsize=1)
+def _get_condense_llm():
+    """Cheap summarization model, created on first use."""
+    from langchain_anthropic import ChatAnthropic
+
+    return ChatAnthropic(model=CONDENSE_MODEL, temperature=0, max_tokens=512)
+
+
+@lru_cache(maxsize=64)
+def _condense(transcript: str) -> str:
+    response = _get_condense_llm().invoke([
+        {"role": "system", "content": _CONDENSE_INSTRUCTIONS},
+        {"role": "user", "content": transcript},
+    ])
+    content = response.content
+    if isinstance(content, list):
+        content = "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return content.strip()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CONDENSE
+# ═══════════════════════════════════════════════════════════════════
+
+def condense_history(
+    raw_messages: Optional[List[Dict[str, Any]]],
+    payload_tokens: int = 0,
+    keep_last: int = ROUTER_KEEP_VERBATIM,
+) -> List[Dict[str, Any]]:
+    """
+    Return the history to send to LLM-1, condensed only when over budget.
+
+    Args:
+        raw_messages: Conversation history ({"role", "content"}); never mutated
+        payload_tokens: Estimated tokens of the final user payload message
+        keep_last: Number of most recent messages kept verbatim
+
+    Returns:
+        raw_messages unchanged, or [summary message] + last keep_last messages.
+        On summarization failure the full history is returned.
+    """
+    if not raw_messages or len(raw_messages) <= keep_last:
+        return list(raw_messages or [])
+    if not needs_condensing(raw_messages, payload_tokens):
+        return list(raw_messages)
+
+    older, recent = raw_messages[:-keep_last], raw_messages[-keep_last:]
+    transcript = "\n".join(f"{m.get('role', 'user')}: {_message_text(m)}" for m in older)
+
+    try:
+        summary = _condense(transcript)
+    except Exception as e:
+        print(f"⚠️  History condensing failed, sending full history: {e}")
+        return list(raw_messages)
+
+    print(f"⚡ Condensed {len(older)} older message(s) into one summary ({history_tokens(raw_messages)} tokens before)")
+    return [{"role": "user", "content": f"{SUMMARY_PREFIX}\n{summary}"}] + list(recent)
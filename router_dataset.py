@@ -0,0 +1,88 @@
+"""
+Router training-data capture for a future local LLM-1 classifier.
+
+The routing decision (CLEAR/VAGUE × UC-01..UC-05 × operation subtypes) is a
+low-cardinality classification problem that a small fine-tuned encoder could
+serve in milliseconds. Training it needs labelled (query, RouterOutput) pairs,
+which this module records from live LLM-1 calls.
+
+Capture is opt-in: set ROUTER_DATASET_PATH to a .jsonl file. Each LLM-1
+routing decision is appended as one JSON line:
+    {"user_query": ..., "conversation_summary": ..., "is_multiturn": ...,
+     "prompt_sha": ..., "router_output": {...}}
+
+Fast-path and error-recovery outputs are skipped - they are not LLM labels.
+
+Usage:
+    from router_dataset import log_router_example, load_router_examples
+
+    examples = load_router_examples("data/router_dataset.jsonl")
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from schemas.router_models import ConversationSummary, RouterOutput
+
+
+# Set ROUTER_DATASET_PATH=data/router_dataset.jsonl to enable capture
+ROUTER_DATASET_PATH = os.getenv("ROUTER_DATASET_PATH")
+
+
+def log_router_example(
+    user_query: str,
+    conversation_summary: Optional[ConversationSummary],
+    router_output: RouterOutput,
+    is_multiturn: bool = False,
+    prompt_sha: Optional[str] = None,
+    path: Optional[str] = ROUTER_DATASET_PATH,
+) -> bool:
+    """
+    Append one labelled routing example to the dataset file.
+
+    Returns:
+        True if written, False if capture is disabled or the output is not a label
+    """
+    if not path:
+        return False
+    if "error_recovery" in router_output.missing_info:
+        return False
+    if (router_output.router_notes or "").startswith("fast_path:"):
+        return False
+
+    record = {
+        "user_query": user_query,
+        "conversation_summary": (
+            conversation_summary.model_dump(mode="json") if conversation_summary is not None else None
+        ),
+        "is_multiturn": is_multiturn,
+        "prompt_sha": prompt_sha,
+        "router_output": router_output.model_dump(mode="json"),
+    }
+
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️  Could not write router example to {path}: {e}")
+        return False
+
+    return True
+
+
+def load_router_examples(path: str) -> List[Dict[str, Any]]:
+    """Read all captured examples (skips malformed lines)."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                examples.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return examples
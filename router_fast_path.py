@@ -0,0 +1,132 @@
+"""
+Pre-LLM fast path for LLM-1 (Router & Clarifier).
+
+Some queries are fully determined by their wording - the router prompt itself
+lists them as canonical UC-01 examples ("What is my current balance?",
+"Show me my last transaction"). For those, build the RouterOutput in Python
+and skip the LLM-1 call entirely.
+
+Scope is deliberately narrow: a template only fires when the query has
+NO category term, NO aggregation verb, NO temporal filter and NO amount
+qualifier, on the first turn of a conversation. Anything else returns None
+and goes to LLM-1 as before.
+
+Usage:
+    from router_fast_path import fast_route
+
+    router_output = fast_route(state.user_query, state.conversation_summary, state.raw_messages)
+    if router_output is not None:
+        ...  # skip LLM-1
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from prompts.llm1_prompt import detect_category_terms
+from schemas.router_models import ConversationSummary, RouterOutput
+
+
+# ═══════════════════════════════════════════════════════════════════
+# PATTERNS (compiled once at import)
+# ═══════════════════════════════════════════════════════════════════
+
+# "I am USER_001." prefix is identity, not intent
+_USER_PREFIX_RE = re.compile(r"^\s*I am USER_\d+\.\s*")
+
+# Any of these means the query is not a plain lookup → LLM-1 decides
+_AGGREGATION_RE = re.compile(
+    r"\b(how much|how many|total|sum|average|avg|count|spend|spent|spending|earn|earned|income|compare|vs)\b",
+    re.IGNORECASE,
+)
+_TEMPORAL_RE = re.compile(
+    r"\b(today|yesterday|week|weeks|month|months|quarter|year|years|days|since|from|between|ago"
+    r"|january|february|march|april|may|june|july|august|september|october|november|december)\b"
+    r"|\b\d{4}\b",
+    re.IGNORECASE,
+)
+_AMOUNT_RE = re.compile(
+    r"\b(large|big|small|expensive|cheap|above|over|under|below|more than|less than)\b|\$\s?\d",
+    re.IGNORECASE,
+)
+
+# Direct-lookup templates: (pattern, uc_operation, clarity_reason)
+_DIRECT_LOOKUP_TEMPLATES = [
+    (
+        re.compile(r"^(what(?:'s| is) )?my (current )?(account )?balance\??$", re.IGNORECASE),
+        "get_current_balance",
+        "Direct lookup of the current account balance",
+    ),
+    (
+        re.compile(r"^(show|give|tell|what(?:'s| is| was))( me)? my (last|latest|most recent) transaction\??$", re.IGNORECASE),
+        "get_last_transaction",
+        "Direct retrieval of the single most recent transaction",
+    ),
+    (
+        re.compile(r"^what (type|kind) of account (is this|do i have)\??$|^(what(?:'s| is) )?my account type\??$", re.IGNORECASE),
+        "get_account_type",
+        "Direct lookup of the account type",
+    ),
+]
+
+
+# ═══════════════════════════════════════════════════════════════════
+# FAST PATH
+# ═══════════════════════════════════════════════════════════════════
+
+def fast_route(
+    user_query: str,
+    conversation_summary: Optional[ConversationSummary] = None,
+    raw_messages: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[RouterOutput]:
+    """
+    Return a RouterOutput for trivially classifiable queries, else None.
+
+    Args:
+        user_query: Current user query (may start with "I am USER_XXX.")
+        conversation_summary: Session preferences; an account_scope preference
+                              changes lookup semantics, so it defers to LLM-1
+        raw_messages: Conversation history; any prior assistant turn means this
+                      is a clarification answer, which always goes to LLM-1
+
+    Returns:
+        RouterOutput (CLEAR, UC-01) or None to fall through to LLM-1
+    """
+    if raw_messages and any(m.get("role") == "assistant" for m in raw_messages):
+        return None
+    if conversation_summary is not None and conversation_summary.account_scope is not None:
+        return None
+
+    query = _USER_PREFIX_RE.sub("", user_query).strip()
+
+    if (
+        detect_category_terms(query)
+        or _AGGREGATION_RE.search(query)
+        or _TEMPORAL_RE.search(query)
+        or _AMOUNT_RE.search(query)
+    ):
+        return None
+
+    for pattern, operation, reason in _DIRECT_LOOKUP_TEMPLATES:
+        if pattern.match(query):
+            return RouterOutput(
+                clarity="CLEAR",
+                core_use_cases=["UC-01"],
+                uc_operations={
+                    "UC-01": [operation],
+                    "UC-02": [],
+                    "UC-03": [],
+                    "UC-04": [],
+                    "UC-05": [],
+                },
+                primary_use_case="UC-01",
+                complexity_axes=[],
+                needed_tools=["query_transactions"],
+                clarifying_question=None,
+                missing_info=[],
+                summary_update=None,
+                uc_confidence="high",
+                clarity_reason=reason,
+                router_notes=f"fast_path: {operation} (LLM-1 not called)",
+            )
+
+    return None
@@ -0,0 +1,201 @@
+"""
+Deterministic post-processing of LLM-1 RouterOutput.
+
+Some resolved_* fields are plain lookups that don't need an LLM:
+- resolved_amount_threshold: copy conversation_summary.amount_threshold_large
+- resolved_dates: turn a stored time_window token ("last_30_days") into dates
+- resolved_trn_categories: category IDs must come from the RAG tool results
+
+resolve_router_output() runs after LLM-1 returns and fills/validates these
+fields, so they are never left to LLM recall (e.g. "pharmacy" = C803, which
+is actually Restaurants).
+
+Values the LLM already set are kept - resolvers only fill gaps, except for
+category IDs that RAG never returned, which are replaced or dropped.
+
+Usage:
+    from router_resolvers import resolve_router_output
+
+    router_output = resolve_router_output(
+        router_output, state.conversation_summary, user_text, rag_matches
+    )
+"""
+
+import re
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from prompts.llm1_prompt import REFERENCE_DATE, mentions_amount_qualifier
+from schemas.router_models import ConversationSummary, ResolvedCategory, ResolvedDates, RouterOutput
+
+
+_LAST_N_DAYS_RE = re.compile(r"^last_(\d+)_days?$")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════════════════
+
+def _preference_value(data: Any) -> Any:
+    """summary_update / PreferenceEntry values may be wrapped as {"value": ...}."""
+    if isinstance(data, dict) and "value" in data:
+        return data["value"]
+    if hasattr(data, "value"):
+        return data.value
+    return data
+
+
+def _lookup_preference(
+    field: str,
+    router_output: RouterOutput,
+    conversation_summary: Optional[ConversationSummary],
+) -> Any:
+    """This turn's summary_update wins over the stored conversation_summary."""
+    if router_output.summary_update and router_output.summary_update.get(field) is not None:
+        return _preference_value(router_output.summary_update[field])
+    if conversation_summary is not None:
+        entry = getattr(conversation_summary, field, None)
+        if entry is not None:
+            return _preference_value(entry)
+    return None
+
+
+def resolve_time_window(token: str, today: Optional[date] = None) -> Optional[ResolvedDates]:
+    """
+    Convert a normalized time_window token to an inclusive date range.
+
+    Follows the CALCULATION RULES in the router prompt ("last 14 days" on Nov 22
+    → Nov 9-22). Returns None for tokens it does not know.
+    """
+    today = today or date.fromisoformat(REFERENCE_DATE)
+    token = str(token).strip().lower().replace(" ", "_")
+
+    match = _LAST_N_DAYS_RE.match(token)
+    if match:
+        n_days = int(match.group(1))
+        start, end = today - timedelta(days=n_days - 1), today
+    elif token == "today":
+        start = end = today
+    elif token == "yesterday":
+        start = end = today - timedelta(days=1)
+    elif token == "this_week":
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+    elif token == "last_week":
+        end = today - timedelta(days=today.weekday() + 1)
+        start = end - timedelta(days=6)
+    elif token == "this_month":
+        start = today.replace(day=1)
+        end = today.replace(day=monthrange(today.year, today.month)[1])
+    elif token == "last_month":
+        end = today.replace(day=1) - timedelta(days=1)
+        start = end.replace(day=1)
+    elif token == "this_year":
+        start, end = date(today.year, 1, 1), date(today.year, 12, 31)
+    elif token == "last_year":
+        start, end = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    else:
+        return None
+
+    return ResolvedDates(
+        start_date=start,
+        end_date=end,
+        interpretation=f"{token} resolved deterministically from {today.isoformat()}",
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════
+# RESOLVERS
+# ═══════════════════════════════════════════════════════════════════
+
+def _resolve_amount_threshold(
+    router_output: RouterOutput,
+    conversation_summary: Optional[ConversationSummary],
+    user_text: str,
+) -> None:
+    if router_output.resolved_amount_threshold is not None:
+        return
+    if not mentions_amount_qualifier(user_text):
+        return
+
+    value = _lookup_preference("amount_threshold_large", router_output, conversation_summary)
+    try:
+        router_output.resolved_amount_threshold = float(value) if value is not None else None
+    except (TypeError, ValueError):
+        pass
+
+
+def _resolve_dates(
+    router_output: RouterOutput,
+    conversation_summary: Optional[ConversationSummary],
+) -> None:
+    if router_output.resolved_dates is not None:
+        return
+    if "temporal" not in router_output.complexity_axes and "UC-03" not in router_output.core_use_cases:
+        return
+
+    token = _lookup_preference("time_window", router_output, conversation_summary)
+    if token is not None:
+        router_output.resolved_dates = resolve_time_window(token)
+
+
+def _validate_categories(
+    router_output: RouterOutput,
+    rag_matches: List[Dict[str, Any]],
+) -> None:
+    """
+    Keep only category IDs that RAG actually returned.
+
+    An unknown ID is replaced by the closest RAG match for the same user_term,
+    or dropped if RAG returned nothing for that term.
+    """
+    if not router_output.resolved_trn_categories or not rag_matches:
+        return
+
+    rag_by_id = {m["category_id"]: m for m in rag_matches}
+    best_by_term: Dict[str, Dict[str, Any]] = {}
+    for m in sorted(rag_matches, key=lambda m: m.get("distance", float("inf"))):
+        best_by_term.setdefault(str(m.get("user_term", "")).lower(), m)
+
+    validated = []
+    for cat in router_output.resolved_trn_categories:
+        if cat.category_id in rag_by_id:
+            validated.append(cat)
+            continue
+        replacement = best_by_term.get(cat.user_term.lower())
+        if replacement is not None:
+            print(f"⚠️  Replacing non-RAG category {cat.category_id} with {replacement['category_id']}")
+            validated.append(ResolvedCategory.model_validate(replacement))
+        else:
+            print(f"⚠️  Dropping non-RAG category {cat.category_id}")
+
+    router_output.resolved_trn_categories = validated or None
+
+
+def resolve_router_output(
+    router_output: RouterOutput,
+    conversation_summary: Optional[ConversationSummary] = None,
+    user_text: str = "",
+    rag_matches: Optional[List[Dict[str, Any]]] = None,
+) -> RouterOutput:
+    """
+    Fill / validate resolved_* fields of a CLEAR RouterOutput in place.
+
+    Args:
+        router_output: Parsed LLM-1 output
+        conversation_summary: Current session preferences (before this turn's merge)
+        user_text: User query text (plus earlier user turns for clarifications)
+        rag_matches: CategoryMatch dicts returned by search_transaction_categories this turn
+
+    Returns:
+        The same RouterOutput (mutated)
+    """
+    if router_output.clarity != "CLEAR":
+        return router_output
+
+    _resolve_amount_threshold(router_output, conversation_summary, user_text)
+    _resolve_dates(router_output, conversation_summary)
+    _validate_categories(router_output, rag_matches or [])
+
+    return router_output
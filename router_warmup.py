@@ -0,0 +1,82 @@
+"""
+Background warm-up of LLM-1 (Router & Clarifier) resources.
+
+Everything the router needs is loaded lazily, so the first user request after
+process start pays for all of it: embedding model load, ChromaDB client and
+collection, the first encode() call, prompt tokenization. warm_router() does
+that work up front; start_router_warmup() runs it in a daemon thread so
+startup is not blocked.
+
+Warm-up steps:
+    1. Count router prompt tokens (tiktoken encoding init)
+    2. Load the embedding model and the category vector store
+    3. Run category RAG for a few common terms (first inference + in-process index)
+    4. Run fast_route() / detect_category_terms() on common queries
+
+Off by default (like RAG_EAGER_LOAD, so tests/CI never load the model):
+set ROUTER_WARMUP=1 (or RAG_EAGER_LOAD=1) to enable. build_graph() starts it.
+
+Usage:
+    from router_warmup import start_router_warmup
+
+    start_router_warmup()
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from prompts.llm1_prompt import OPTIMIZED_ROUTER_SYSTEM_PROMPT, count_tokens, detect_category_terms
+from router_fast_path import fast_route
+
+
+ROUTER_WARMUP_ENABLED = os.getenv("ROUTER_WARMUP", os.getenv("RAG_EAGER_LOAD", "0")) == "1"
+
+# Frequent category terms - primes the first embedding call and the RAG term cache
+WARMUP_CATEGORY_TERMS = ["groceries", "restaurants", "coffee", "transport", "salary"]
+
+WARMUP_QUERIES = [
+    "What is my current balance?",
+    "Show me my last transaction",
+    "How much did I spend on groceries last month?",
+    "Show me my recent transactions",
+]
+
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def warm_router() -> None:
+    """Load and exercise router resources once. Failures are logged, never raised."""
+    start = time.perf_counter()
+
+    count_tokens(OPTIMIZED_ROUTER_SYSTEM_PROMPT)
+
+    for query in WARMUP_QUERIES:
+        fast_route(query)
+        detect_category_terms(query)
+
+    try:
+        from rag.trn_category_rag import _get_embedding_model, load_category_vector_store, query_categories
+
+        _get_embedding_model()
+        load_category_vector_store()
+        for term in WARMUP_CATEGORY_TERMS:
+            query_categories(term)
+    except Exception as e:
+        print(f"⚠️  Router warm-up skipped RAG: {e}")
+        return
+
+    print(f"✅ Router warm-up done in {time.perf_counter() - start:.1f}s")
+
+
+def start_router_warmup() -> Optional[threading.Thread]:
+    """Start warm_router() in a daemon thread (once per process)."""
+    global _warmup_thread
+
+    if not ROUTER_WARMUP_ENABLED:
+        return None
+    if _warmup_thread is None:
+        _warmup_thread = threading.Thread(target=warm_router, name="router-warmup", daemon=True)
+        _warmup_thread.start()
+    return _warmup_thread
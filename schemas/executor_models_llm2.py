@@ -2,9 +2,12 @@
 Pydantic models for LLM-2 (Executor) data access over transactions.csv.
 
 These models are used to:
-- Describe HOW LLM-2 wants to filter transactions (TransactionQuerySpec).
+- Describe HOW LLM-2 wants to filter transactions (TransactionQuerySpec;
+  TransactionQuerySpecFast is its validation-free dataclass twin).
 - Represent individual transactions (TransactionRecord).
+- Carry matched transactions column-wise (TransactionColumns).
 - Return both raw transactions and basic aggregates (TransactionQueryResult).
+- Batch several specs of one LLM-2 response into one execution (QueryPlan).
 
 All "intelligence" about WHICH filters to use is in LLM-2 prompts.
 Python code will only apply these filters deterministically.
@@ -12,9 +15,40 @@ Python code will only apply these filters deterministically.
 
 from __future__ import annotations
 
+import datetime
+import hashlib
+from dataclasses import dataclass
 from datetime import date
-from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from enum import StrEnum
+from functools import cached_property
+from typing import TYPE_CHECKING, FrozenSet, Iterator, List, Optional, Literal
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+###########################################################################################
+# ENUMS
+###########################################################################################
+# Validated by a single value lookup (no Literal union scan). Fields keep the plain
+# string values (use_enum_values), so JSON / string comparisons are unchanged.
+
+class Direction(StrEnum):
+    DEBIT = "D"
+    CREDIT = "C"
+
+
+class DirectionFilter(StrEnum):
+    DEBIT = "D"
+    CREDIT = "C"
+    BOTH = "BOTH"
+
+
+# int8 direction codes stored next to the string column in the transactions frame
+DIRECTION_CODES = {Direction.DEBIT.value: 0, Direction.CREDIT.value: 1}
 
 
 ###########################################################################################
@@ -29,15 +63,19 @@ class TransactionRecord(BaseModel):
     - list transactions (e.g. "show dining transactions"),
     - inspect dates, amounts, categories,
     - use them to build explanations and back-office logs.
+
+    Built only by our own code from transactions.csv, and never modified.
     """
 
+    model_config = ConfigDict(frozen=True, extra="forbid", use_enum_values=True)
+
     transaction_id: str
     user_id: str
     account_id: str
     account_type: Optional[str] = None
 
     amount: float
-    direction: Literal["D", "C"] = Field(
+    direction: Direction = Field(
         description='"D" = debit (spending), "C" = credit (income)'
     )
 
@@ -52,6 +90,58 @@ class TransactionRecord(BaseModel):
     subCategoryName: Optional[str] = None
 
 
+# Max TransactionRecord objects returned per query (for LLM-2 display / logs)
+SAMPLE_RECORDS_MAX = 20
+
+
+class TransactionColumns(BaseModel):
+    """
+    Matched transactions in column-oriented form (one list per field).
+
+    One validated list per column instead of one TransactionRecord per row:
+    - N x fields fewer Python objects for large results,
+    - columns map straight to/from pandas/NumPy (no row reconstruction).
+
+    All lists have length n_rows; index i across the lists is one transaction.
+    Use to_records() when row objects are really needed.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    n_rows: int = 0
+
+    transaction_id: List[str] = Field(default_factory=list)
+    user_id: List[str] = Field(default_factory=list)
+    account_id: List[str] = Field(default_factory=list)
+    account_type: List[Optional[str]] = Field(default_factory=list)
+
+    amount: List[float] = Field(default_factory=list)
+    direction: List[str] = Field(default_factory=list)
+
+    date: List[datetime.date] = Field(default_factory=list)  # module path: `date` is the field name
+    month: List[Optional[int]] = Field(default_factory=list)
+    year: List[Optional[int]] = Field(default_factory=list)
+    dayOfWeek: List[Optional[str]] = Field(default_factory=list)
+
+    categoryGroupId: List[Optional[str]] = Field(default_factory=list)
+    categoryName: List[Optional[str]] = Field(default_factory=list)
+    subCategoryId: List[Optional[str]] = Field(default_factory=list)
+    subCategoryName: List[Optional[str]] = Field(default_factory=list)
+
+    def to_records(self, n: Optional[int] = None) -> Iterator[TransactionRecord]:
+        """Lazily zip the columns into TransactionRecord objects (first n rows)."""
+        names = TRANSACTION_FIELDS
+        columns = [getattr(self, name) for name in names]
+        for i, values in enumerate(zip(*columns)):
+            if n is not None and i >= n:
+                return
+            yield TransactionRecord.model_construct(**dict(zip(names, values)))
+
+
+# TransactionRecord fields, in column order (shared by TransactionColumns and the tool)
+TRANSACTION_FIELDS = tuple(TransactionRecord.model_fields)
+
+
 class TransactionQuerySpec(BaseModel):
     """
     Generic, typed filter specification for querying transactions.
@@ -65,8 +155,13 @@ class TransactionQuerySpec(BaseModel):
     - load transactions.csv,
     - apply these filters deterministically (no extra "smart" logic),
     - return a TransactionQueryResult.
+
+    Read-only once parsed. Unknown keys from LLM-2 tool calls are ignored
+    (not forbidden) so a stray argument doesn't fail the whole execution.
     """
 
+    model_config = ConfigDict(frozen=True, use_enum_values=True)
+
     # Which end user we are querying transactions for (mandatory)
     user_id: str = Field(
         description="Logical end-user identifier (e.g. USER_001)."
@@ -111,7 +206,7 @@ class TransactionQuerySpec(BaseModel):
     )
 
     # Direction: spending vs income vs both.
-    direction: Optional[Literal["D", "C", "BOTH"]] = Field(
+    direction: Optional[DirectionFilter] = Field(
         default=None,
         description='"D" = debit (spending), "C" = credit (income), "BOTH" = no direction filter.',
     )
@@ -126,20 +221,165 @@ class TransactionQuerySpec(BaseModel):
         description='Optional sort order for date (e.g. "date_desc" for last transaction).',
     )
 
+    def to_mask(self, df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Boolean mask of the rows of `df` matching every filter set on this spec.
+
+        One vectorized comparison per filter over the column arrays, ANDed
+        into a single mask buffer - no Python loop over rows.
+        If `rows` (row positions) is given, only those rows are tested and the
+        mask is aligned with `rows` instead of the whole frame.
+        Sorting and limit are NOT applied here (they work on the matched rows).
+        `df` is the frame from the transactions loader (needs its derived
+        `direction_code` / `amount_abs` columns).
+        """
+        return _spec_mask(self, df, rows)
+
+    # Id filters as frozensets - built on first use, then reused (not serialized)
+    @cached_property
+    def account_id_set(self) -> Optional[FrozenSet[str]]:
+        return frozenset(self.account_ids) if self.account_ids else None
+
+    @cached_property
+    def category_group_id_set(self) -> Optional[FrozenSet[str]]:
+        return frozenset(self.category_group_ids) if self.category_group_ids else None
+
+    @cached_property
+    def sub_category_id_set(self) -> Optional[FrozenSet[str]]:
+        return frozenset(self.sub_category_ids) if self.sub_category_ids else None
+
+
+@dataclass(slots=True, frozen=True)
+class TransactionQuerySpecFast:
+    """
+    Validation-free twin of TransactionQuerySpec for specs built by our own code
+    (defaults, retries) and for the executor's internal hand-offs.
+
+    Same fields, native types (id filters as frozensets, so they are hashable
+    cache keys); convert once with from_spec() and only go back to pydantic
+    (to_spec) when a spec has to be logged or serialized.
+    """
+
+    user_id: str
+    account_ids: Optional[FrozenSet[str]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    category_group_ids: Optional[FrozenSet[str]] = None
+    sub_category_ids: Optional[FrozenSet[str]] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    direction: Optional[str] = None
+    limit: Optional[int] = None
+    sort_by: Optional[str] = None
+
+    @classmethod
+    def from_spec(cls, spec: TransactionQuerySpec) -> TransactionQuerySpecFast:
+        values = {name: getattr(spec, name) for name in TRANSACTION_QUERY_SPEC_FIELDS}
+        values.update(
+            account_ids=spec.account_id_set,
+            category_group_ids=spec.category_group_id_set,
+            sub_category_ids=spec.sub_category_id_set,
+        )
+        return cls(**values)
+
+    def to_spec(self) -> TransactionQuerySpec:
+        values = {name: getattr(self, name) for name in TRANSACTION_QUERY_SPEC_FIELDS}
+        for name in ("account_ids", "category_group_ids", "sub_category_ids"):
+            if values[name] is not None:
+                values[name] = sorted(values[name])
+        return TransactionQuerySpec(**values)
+
+    def to_mask(self, df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Same as TransactionQuerySpec.to_mask."""
+        return _spec_mask(self, df, rows)
+
+
+TRANSACTION_QUERY_SPEC_FIELDS = tuple(TransactionQuerySpec.model_fields)
+
+
+def _isin(column: pd.Series, values) -> np.ndarray:
+    """column.isin(values) as a NumPy mask; categoricals compare integer codes."""
+    if column.dtype == "category":
+        # Wanted values -> codes once (-1 = not a category, can never match)
+        wanted = column.cat.categories.get_indexer(list(values))
+        return np.isin(column.cat.codes.to_numpy(), wanted[wanted >= 0])
+    return column.isin(values).to_numpy()
+
+
+def _spec_mask(spec, df: pd.DataFrame, rows: Optional[np.ndarray]) -> np.ndarray:
+    """TransactionQuerySpec.to_mask for any object with the spec's attributes."""
+    def column(name: str) -> pd.Series:
+        return df[name] if rows is None else df[name].iloc[rows]
+
+    # One mask buffer, ANDed in place per filter (no intermediate frames)
+    mask = np.ones(len(df) if rows is None else len(rows), dtype=bool)
+
+    # Categorical columns compare on their integer codes
+    mask &= (column("user_id") == spec.user_id).to_numpy()
+
+    if spec.account_ids:
+        mask &= _isin(column("account_id"), spec.account_ids)
+
+    # Date range filters: native datetime64 compares, end_date covers its whole day
+    if spec.start_date is not None or spec.end_date is not None:
+        dates = column("date").to_numpy()
+        if spec.start_date is not None:
+            mask &= dates >= np.datetime64(spec.start_date, "D")
+        if spec.end_date is not None:
+            mask &= dates < np.datetime64(spec.end_date, "D") + np.timedelta64(1, "D")
+
+    # Category group / subcategory filters
+    if spec.category_group_ids:
+        mask &= _isin(column("categoryGroupId"), spec.category_group_ids)
+    if spec.sub_category_ids:
+        mask &= _isin(column("subCategoryId"), spec.sub_category_ids)
+
+    # Amount filters (absolute value)
+    if spec.min_amount is not None or spec.max_amount is not None:
+        abs_amounts = column("amount_abs").to_numpy()
+        if spec.min_amount is not None:
+            mask &= abs_amounts >= spec.min_amount
+        if spec.max_amount is not None:
+            mask &= abs_amounts <= spec.max_amount
+
+    # Direction filter ("BOTH" or None -> no direction filter) on the int8 codes
+    if spec.direction in DIRECTION_CODES:
+        mask &= column("direction_code").to_numpy() == DIRECTION_CODES[spec.direction]
+
+    return mask
+
 
 class TransactionQueryResult(BaseModel):
     """
     Result of applying a TransactionQuerySpec to transactions.csv.
 
     Contains:
-    - The matching transactions (as records) for detailed reasoning and logging.
+    - The matching transactions (column-wise) for detailed reasoning and logging.
+    - A few of them as records (sample_records) for easy display.
     - Basic aggregates that are cheap to compute in Python and common across many UCs.
     """
 
-    # Raw rows after filtering
-    transactions: List[TransactionRecord] = Field(
+    # Raw rows after filtering (column-oriented)
+    transactions: Optional[TransactionColumns] = Field(
+        default=None,
+        description="Transactions matching the filter spec, as parallel column lists.",
+    )
+    sample_records: List[TransactionRecord] = Field(
+        default_factory=list,
+        max_length=SAMPLE_RECORDS_MAX,
+        description=f"First matched transactions as records (at most {SAMPLE_RECORDS_MAX}).",
+    )
+
+    # Late materialization handles (not serialized - internal to the executor)
+    matched_indices: List[int] = Field(
         default_factory=list,
-        description="List of transactions matching the filter spec.",
+        exclude=True,
+        description="Row positions of the matched transactions in the source frame (sorted + limited).",
+    )
+    source_frame_id: Optional[str] = Field(
+        default=None,
+        exclude=True,
+        description="Id of the cached source DataFrame the indices refer to.",
     )
 
     # Basic aggregates over the matched transactions
@@ -169,6 +409,62 @@ class TransactionQueryResult(BaseModel):
         description="Minimum absolute transaction amount over all matched transactions (optional).",
     )
 
+    def materialize(self, n: Optional[int] = None) -> List[TransactionRecord]:
+        """
+        Build TransactionRecord objects for the first n matched rows only.
+
+        Rows are pulled from the cached source frame by position, so records are
+        created for what is actually displayed/logged, not for every match.
+        """
+        if self.source_frame_id is None:
+            return list(self.sample_records[:n] if n is not None else self.sample_records)
+
+        from schemas.transactions_tool import records_from_frame
+
+        indices = self.matched_indices if n is None else self.matched_indices[:n]
+        return records_from_frame(self.source_frame_id, indices)
+
+    def transactions_digest(self) -> Optional[str]:
+        """
+        sha256 over the sorted transaction_ids of the matched rows.
+
+        Lets a back-office log identify exactly which transactions were analyzed
+        without storing them (see BackofficeLog.transactions_digest).
+        """
+        if self.transactions is None:
+            return None
+        ids = sorted(tid.encode("utf-8") for tid in self.transactions.transaction_id)
+        return hashlib.sha256(b"\n".join(ids)).hexdigest()
+
+    @cached_property
+    def tool_json(self) -> str:
+        """
+        The result as the tool_result text sent back to LLM-2.
+
+        Encoded by pydantic-core's serializer (same text as
+        json.dumps(model_dump(), indent=2, default=str), without building the
+        intermediate dicts), once per result - cached results reuse it.
+        """
+        return self.model_dump_json(indent=2)
+
+
+class QueryPlan(BaseModel):
+    """
+    All query_transactions specs LLM-2 requested in one response.
+
+    Executed together (run_query_plan): duplicate specs run once and the frame
+    rows all specs can touch are gathered in a single pass, instead of one
+    independent scan per tool call.
+    """
+
+    specs: List[TransactionQuerySpec] = Field(default_factory=list)
+
+    def execute(self) -> List[TransactionQueryResult]:
+        """One TransactionQueryResult per spec, in order."""
+        from schemas.transactions_tool import run_query_plan
+
+        return run_query_plan(self.specs)
+
 
 ###########################################################################################
 # DATE RANGE MODELS
@@ -2,15 +2,162 @@
 Core Pydantic models for routing, preferences, and execution logs in the financial AI agent.
 """
 from datetime import date
+from enum import StrEnum
 from typing import List, Literal, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, SerializationInfo, model_serializer, model_validator, with_config
 from typing import Any, Dict, List, Optional
+from typing_extensions import TypedDict
+
+from schemas.executor_models_llm2 import SAMPLE_RECORDS_MAX, TransactionRecord
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#############################################################################################
+# Enums - validated by one value lookup instead of a Literal union scan.
+# Models store the plain string values (use_enum_values), so "UC-01" / "CLEAR"
+# comparisons and JSON output are unchanged.
+
+class Clarity(StrEnum):
+    CLEAR = "CLEAR"
+    VAGUE = "VAGUE"
+
+
+class UseCase(StrEnum):
+    UC_01 = "UC-01"
+    UC_02 = "UC-02"
+    UC_03 = "UC-03"
+    UC_04 = "UC-04"
+    UC_05 = "UC-05"
+
+
+class ComplexityAxis(StrEnum):
+    TEMPORAL = "temporal"
+    CATEGORY = "category"
+    AMBIGUITY = "ambiguity"
+
+
+class Confidence(StrEnum):
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+
+#############################################################################################
+# Typed replacements for free-form Dict[str, Any] fields. Only keys that were actually
+# given count as present, so the dict-style reads (`key in x`, x[key], x.get(key),
+# x.items(), truthiness) behave exactly like the old dicts.
+
+class _DictView:
+    """Read-only dict view over the explicitly set fields (+ extras) of a model."""
+
+    def _present(self) -> Dict[str, Any]:
+        fields = type(self).model_fields
+        present = {k: getattr(self, k) for k in self.model_fields_set if k in fields}
+        present.update(self.model_extra or {})
+        return present
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._present()
+
+    def __getitem__(self, key: str) -> Any:
+        return self._present()[key]
+
+    def __bool__(self) -> bool:
+        return bool(self._present())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._present().get(key, default)
+
+    def items(self):
+        return self._present().items()
+
+
+class SummaryUpdate(_DictView, BaseModel):
+    """
+    Preference delta written by LLM-1 (merged by summary_update_node).
+
+    Each value is a simple value ("last_month", 100) or a PreferenceEntry-like
+    {"value": ...} dict; an explicit null clears that preference.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    time_window: Optional[Any] = None
+    amount_threshold_large: Optional[Any] = None
+    account_scope: Optional[Any] = None
+    category_preferences: Optional[Dict[str, Any]] = None
+
+
+#############################################################################################
+
+class ResolvedCategory(BaseModel):
+    """
+    One category selected by LLM-1 from the RAG results (CategoryMatch fields).
+
+    get() mirrors the old dict entries for callers that still read keys.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="ignore", use_enum_values=True)
+
+    user_term: str = ""
+    category_id: str
+    category_name: Optional[str] = None
+    category_type: Optional[Literal["group", "subcategory"]] = None
+    group_id: Optional[str] = None
+    group_name: Optional[str] = None
+    distance: Optional[float] = None
+    confidence: Optional[Confidence] = None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+
+class UCOperations(BaseModel):
+    """
+    Operations (subtypes) per UC category - fixed five-slot shape.
+
+    Read and written under the wire keys "UC-01".."UC-05" (aliases), so LLM-1
+    output, router_fast_path and the LLM-2 payload keep the dict layout.
+    get() / items() mirror the old Dict[str, List[str]] for prompt builders.
+    """
+
+    model_config = ConfigDict(
+        frozen=True,
+        validate_by_name=True,
+        validate_by_alias=True,
+        serialize_by_alias=True,
+    )
+
+    uc_01: List[str] = Field(default_factory=list, alias="UC-01")
+    uc_02: List[str] = Field(default_factory=list, alias="UC-02")
+    uc_03: List[str] = Field(default_factory=list, alias="UC-03")
+    uc_04: List[str] = Field(default_factory=list, alias="UC-04")
+    uc_05: List[str] = Field(default_factory=list, alias="UC-05")
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        """{"UC-01": [...], ..., "UC-05": [...]} (back-compat view)."""
+        return {
+            "UC-01": self.uc_01,
+            "UC-02": self.uc_02,
+            "UC-03": self.uc_03,
+            "UC-04": self.uc_04,
+            "UC-05": self.uc_05,
+        }
+
+    def items(self):
+        return self.as_dict().items()
+
+    def get(self, uc: str, default=None):
+        return self.as_dict().get(uc, default)
 
 
 class RouterOutput(BaseModel):
     """
-    Single preference entry (value + source/turn/query metadata) used inside ConversationSummary
-    
     Structured output of LLM-1 (Router & Clarifier).
     This object drives:
     - CLEAR vs VAGUE branching in LangGraph
@@ -20,8 +167,11 @@ class RouterOutput(BaseModel):
     
     UPDATED: Now supports multi-category queries with both old and new fields for compatibility.
     """
+
+    model_config = ConfigDict(use_enum_values=True)
+
     # --- Core routing fields (UPDATED for multi-category support) ---
-    clarity: Literal["CLEAR", "VAGUE"] = Field(
+    clarity: Clarity = Field(
         ...,
         description="Whether the query can be executed as-is (CLEAR) or needs clarification (VAGUE).",
     )
@@ -29,18 +179,12 @@ class RouterOutput(BaseModel):
 
     
     # multi-category support
-    core_use_cases: List[Literal["UC-01", "UC-02", "UC-03", "UC-04", "UC-05"]] = Field(
+    core_use_cases: List[UseCase] = Field(
         default_factory=list,
         description="List of all UC categories involved in this query (e.g., ['UC-02', 'UC-03', 'UC-04']).",
     )
-    uc_operations: Dict[str, List[str]] = Field(
-        default_factory=lambda: {
-            "UC-01": [],
-            "UC-02": [], 
-            "UC-03": [],
-            "UC-04": [],
-            "UC-05": []
-        },
+    uc_operations: UCOperations = Field(
+        default_factory=UCOperations,
         description=(
             "Nested structure with all UC categories as keys and their subtypes as arrays. "
             "Empty arrays for unused categories. Example: "
@@ -48,12 +192,12 @@ class RouterOutput(BaseModel):
             "'UC-04': ['category_mapping'], 'UC-05': []}"
         ),
     )
-    primary_use_case: Optional[Literal["UC-01", "UC-02", "UC-03", "UC-04", "UC-05"]] = Field(
+    primary_use_case: Optional[UseCase] = Field(
         None,
         description="The dominant/primary UC category that should drive execution logic.",
     )
     
-    complexity_axes: List[Literal["temporal", "category", "ambiguity"]] = Field(
+    complexity_axes: List[ComplexityAxis] = Field(
         default_factory=list,
         description="Which complexity dimensions are involved in this query.",
     )
@@ -75,7 +219,7 @@ class RouterOutput(BaseModel):
         ),
     )
     # --- Preference updates (for conversation_summary, applied in a separate node) ---
-    summary_update: Optional[Dict[str, Any]] = Field(
+    summary_update: Optional[SummaryUpdate] = Field(
         None,
         description=(
             "Optional structured update describing new/overridden user preferences "
@@ -83,7 +227,7 @@ class RouterOutput(BaseModel):
         ),
     )
     # --- Debug / observability metadata ---
-    uc_confidence: Literal["high", "medium", "low"] = Field(
+    uc_confidence: Confidence = Field(
         "medium",
         description="Router's confidence in core_query_type and overall interpretation.",
     )
@@ -108,13 +252,13 @@ class RouterOutput(BaseModel):
     )
 
     # --- NEW: RAG lookup => retrieve Transaction Category resolution
-    resolved_trn_categories: Optional[List[Dict[str, Any]]] = Field(
+    resolved_trn_categories: Optional[List[ResolvedCategory]] = Field(
         None,
         description=(
             "Pre-resolved transaction categories from map_category_from_kb_with_rag_lookup. "
             "LLM-2 should use these category IDs directly in query_transactions. "
-            "Example: [{'user_term': 'dining', 'categoryGroupId': 'CG800', "
-            "'categoryGroupName': 'Dining', 'confidence': 0.95}]"
+            "Example: [{'user_term': 'dining', 'category_id': 'CG800', "
+            "'category_name': 'Dining', 'category_type': 'group', 'confidence': 'high'}]"
         ),
     )
 
@@ -136,6 +280,8 @@ class PreferenceEntry(BaseModel):
     Used for time windows, thresholds, scopes, and category-specific settings.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     value: Any = Field(
         ...,
         description="The actual preference value, e.g. 'last_30_days', 1000, "
@@ -176,6 +322,8 @@ class ResolvedDates(BaseModel):
     Pre-calculated date ranges resolved by LLM-1 for temporal queries.
     LLM-2 uses these directly instead of interpreting temporal phrases.
     """
+
+    model_config = ConfigDict(frozen=True)
     
     start_date: Optional[date] = Field(
         None,
@@ -192,6 +340,105 @@ class ResolvedDates(BaseModel):
 
 #############################################################################################
 
+class PreferenceStore(BaseModel):
+    """
+    Category-specific preferences stored column-wise (one list per PreferenceEntry field).
+
+    Behaves like the Dict[str, PreferenceEntry] it replaces: store[key],
+    store[key] = entry, del store[key], `key in store`, get(), items(), len().
+    PreferenceEntry objects are only built when an entry is read. Accepts and
+    serializes the {key: entry} mapping, so prompts and payloads are unchanged.
+    """
+
+    keys: List[str] = Field(default_factory=list)
+    values: List[Any] = Field(default_factory=list)
+    sources: List[Literal["system_default", "user_defined", "user_override"]] = Field(default_factory=list)
+    turn_ids: List[Optional[int]] = Field(default_factory=list)
+    original_queries: List[Optional[str]] = Field(default_factory=list)
+    previous_values: List[Any] = Field(default_factory=list)
+    previous_turn_ids: List[Optional[int]] = Field(default_factory=list)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_mapping(cls, data: Any) -> Any:
+        """{key: PreferenceEntry | dict} -> parallel columns (validated in bulk)."""
+        if not isinstance(data, dict) or not all(isinstance(v, (PreferenceEntry, dict)) for v in data.values()):
+            return data
+        entries = [
+            v if isinstance(v, PreferenceEntry) else PreferenceEntry.model_validate(v)
+            for v in data.values()
+        ]
+        return {
+            "keys": list(data),
+            "values": [e.value for e in entries],
+            "sources": [e.source for e in entries],
+            "turn_ids": [e.turn_id for e in entries],
+            "original_queries": [e.original_query for e in entries],
+            "previous_values": [e.previous_value for e in entries],
+            "previous_turn_ids": [e.previous_turn_id for e in entries],
+        }
+
+    @model_serializer
+    def _to_mapping(self, info: SerializationInfo) -> Dict[str, Any]:
+        return {key: entry.model_dump(mode=info.mode) for key, entry in self.items()}
+
+    def _entry(self, i: int) -> PreferenceEntry:
+        return PreferenceEntry.model_construct(
+            value=self.values[i],
+            source=self.sources[i],
+            turn_id=self.turn_ids[i],
+            original_query=self.original_queries[i],
+            previous_value=self.previous_values[i],
+            previous_turn_id=self.previous_turn_ids[i],
+        )
+
+    def get(self, key: str, default: Optional[PreferenceEntry] = None) -> Optional[PreferenceEntry]:
+        return self[key] if key in self else default
+
+    def set(self, key: str, entry: PreferenceEntry) -> None:
+        self[key] = entry
+
+    def items(self):
+        return [(key, self._entry(i)) for i, key in enumerate(self.keys)]
+
+    def as_dict(self) -> Dict[str, PreferenceEntry]:
+        return dict(self.items())
+
+    def __getitem__(self, key: str) -> PreferenceEntry:
+        return self._entry(self.keys.index(key))
+
+    def __setitem__(self, key: str, entry: PreferenceEntry) -> None:
+        row = (entry.value, entry.source, entry.turn_id, entry.original_query,
+               entry.previous_value, entry.previous_turn_id)
+        columns = (self.values, self.sources, self.turn_ids, self.original_queries,
+                   self.previous_values, self.previous_turn_ids)
+        if key in self.keys:
+            i = self.keys.index(key)
+            for column, value in zip(columns, row):
+                column[i] = value
+        else:
+            self.keys.append(key)
+            for column, value in zip(columns, row):
+                column.append(value)
+
+    def __delitem__(self, key: str) -> None:
+        i = self.keys.index(key)
+        for column in (self.keys, self.values, self.sources, self.turn_ids,
+                       self.original_queries, self.previous_values, self.previous_turn_ids):
+            del column[i]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
+
+
+#############################################################################################
+
 class ConversationSummary(BaseModel):
     """
     Session-scoped summary of user preferences shared by LLM-1 (router) and LLM-2 (executor).
@@ -210,8 +457,8 @@ class ConversationSummary(BaseModel):
         None,
         description="Which accounts to consider by default, e.g. 'all_accounts', 'primary_account_only'.",
     )
-    category_preferences: Dict[str, PreferenceEntry] = Field(
-        default_factory=dict,
+    category_preferences: PreferenceStore = Field(
+        default_factory=PreferenceStore,
         description=(
             "Category-specific preferences, keyed by a descriptive name, e.g.: "
             "'coffee_spending_scope' -> cafes_only, "
@@ -225,6 +472,8 @@ class ConversationSummary(BaseModel):
 class DataSources(BaseModel):
     """Structured description of which data was used to answer the query."""
 
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     tables_used: List[str] = Field(
         default_factory=list,
         description="Logical table names used in this answer, e.g. ['transactions'].",
@@ -254,6 +503,8 @@ class DataSources(BaseModel):
 class ClarificationStep(BaseModel):
     """One clarification question/answer pair used as part of UC-05."""
 
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     question: str = Field(
         ...,
         description="Clarifying question shown to the user.",
@@ -268,6 +519,73 @@ class ClarificationStep(BaseModel):
     )
 
 
+#############################################################################################
+
+class ResolvedQuery(_DictView, BaseModel):
+    """How LLM-2 interpreted the query (extra keys such as parameters_used are kept)."""
+
+    model_config = ConfigDict(frozen=True, extra="allow")
+
+    original: Optional[str] = None
+    resolved_intent: Optional[str] = None
+    interpretations: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _metric_number(value: Any, kind: type) -> Any:
+    """Coerce one LLM-2 metric value ("$1,234.50", 3.0, "12") to float / int, else raise."""
+    if isinstance(value, bool) or value is None:
+        raise TypeError(value)
+    if isinstance(value, str):
+        value = value.replace("$", "").replace(",", "").strip()
+    number = float(value)
+    if kind is int:
+        if not number.is_integer():
+            raise ValueError(value)
+        return int(number)
+    return number
+
+
+class AnalysisMetrics(_DictView, BaseModel):
+    """
+    Key metrics reported by LLM-2 (free-form metric keys are kept as extras).
+
+    LLM-2 output is free-form, so the typed fields never reject a log: values
+    that coerce to numbers are kept, and a value of any other shape is also
+    stored untouched as the extra "<field>_raw".
+    """
+
+    model_config = ConfigDict(frozen=True, extra="allow")
+
+    totals: Dict[str, float] = Field(default_factory=dict)
+    counts: Dict[str, int] = Field(default_factory=dict)
+    per_category: Dict[str, float] = Field(default_factory=dict)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _tolerate_llm_shapes(cls, data: Any) -> Any:
+        if isinstance(data, AnalysisMetrics):
+            return data
+        if not isinstance(data, dict):
+            return {"key_metrics": data}
+
+        data = dict(data)
+        for name, kind in (("totals", float), ("counts", int), ("per_category", float)):
+            if name not in data:
+                continue
+            value = data[name]
+            typed: Dict[str, Any] = {}
+            clean = isinstance(value, dict)
+            for key, item in (value.items() if clean else ()):
+                try:
+                    typed[str(key)] = _metric_number(item, kind)
+                except (TypeError, ValueError):
+                    clean = False
+            data[name] = typed
+            if not clean:
+                data[f"{name}_raw"] = value
+        return data
+
+
 #############################################################################################
 
 class BackofficeLog(BaseModel):
@@ -276,13 +594,16 @@ class BackofficeLog(BaseModel):
     Designed for compliance, observability, and debugging.
     """
 
+    # Built once per CLEAR execution - schema is compiled on first use, not at import
+    model_config = ConfigDict(frozen=True, defer_build=True, use_enum_values=True)
+
     # Core identification
     user_query: str = Field(
         ...,
         description="Original user query that triggered this execution.",
     )
 
-    resolved_query: Optional[Dict[str, Any]] = Field(
+    resolved_query: Optional[ResolvedQuery] = Field(
         None,
         description=(
             "Human-readable resolved query showing how ambiguities were interpreted. "
@@ -298,8 +619,8 @@ class BackofficeLog(BaseModel):
     )
 
     # Analysis & reasoning
-    analysis: Dict[str, Any] = Field(
-        default_factory=dict,
+    analysis: AnalysisMetrics = Field(
+        default_factory=AnalysisMetrics,
         description="Key metrics and breakdowns (totals, comparisons, per-category amounts, etc.).",
     )
     reasoning_steps: List[str] = Field(
@@ -316,6 +637,16 @@ class BackofficeLog(BaseModel):
         0,
         description="Number of transaction rows analyzed after applying all filters.",
     )
+    # Compact evidence only - never the full matched list (keeps log size O(1))
+    sample_transactions: List[TransactionRecord] = Field(
+        default_factory=list,
+        max_length=SAMPLE_RECORDS_MAX,
+        description=f"First matched transactions of the last query (at most {SAMPLE_RECORDS_MAX}).",
+    )
+    transactions_digest: Optional[str] = Field(
+        None,
+        description="sha256 over the sorted transaction_ids matched by the last query.",
+    )
 
     # Preferences & clarifications
     preferences_used: Dict[str, "PreferenceEntry"] = Field(
@@ -331,7 +662,7 @@ class BackofficeLog(BaseModel):
     )
 
     # Confidence & RAG flag
-    confidence: Literal["high", "medium", "low"] = Field(
+    confidence: Confidence = Field(
         "medium",
         description="Executor's confidence in the final answer.",
     )
@@ -355,6 +686,8 @@ class ExecutionResult(BaseModel):
     user-facing answer + rich back-office log.
     """
 
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     final_answer: str = Field(
         ...,
         description="Plain, friendly text returned to the end user.",
@@ -366,6 +699,18 @@ class ExecutionResult(BaseModel):
 
 #############################################################################################
 
+@with_config(ConfigDict(extra="allow"))
+class ChatMessage(TypedDict):
+    """
+    One raw conversation message. A TypedDict, so entries stay plain dicts
+    (m["content"], m.get("role")). Extra keys (name, tool_call_id, tool_calls, ...)
+    are kept as-is.
+    """
+
+    role: Literal["user", "assistant", "system", "tool"]
+    content: Any  # usually str; LangChain content blocks / None are kept as-is
+
+
 # Central state object passed between LangGraph nodes
 class GraphState(BaseModel):
     """
@@ -406,10 +751,38 @@ class GraphState(BaseModel):
         None,
         description="Optional session identifier to group turns together.",
     )
-    raw_messages: List[Dict[str, Any]] = Field(
+    raw_messages: List[ChatMessage] = Field(
         default_factory=list,
         description=(
             "Low-level conversation history, e.g. [{'role': 'user', 'content': '...'}, "
-            "{'role': 'assistant', 'content': '...'}], mainly for debugging or prompt context."
+            "{'role': 'assistant', 'content': '...'}], mainly for debugging or prompt context. "
+            "Kept in full: router_context.condense_history() summarizes older turns for LLM-1."
         ),
-    )
\ No newline at end of file
+    )
+
+
+#############################################################################################
+
+# RouterOutput forward-references ResolvedDates (defined below it). Resolve it once
+# here, in this module's namespace, instead of lazily on first validation in a caller.
+RouterOutput.model_rebuild()
+
+
+#############################################################################################
+# Log serialization (one BackofficeLog / ExecutionResult written per CLEAR turn)
+
+def dump_log(log: BaseModel, compact: bool = False) -> bytes:
+    """
+    Serialize a BackofficeLog / ExecutionResult to JSON bytes.
+
+    Uses orjson when installed (dates, floats and numpy values encoded in C),
+    else pydantic's model_dump_json. compact=True drops None / default-valued
+    fields (empty preferences, clarifications, ...) for hot-path logging.
+    """
+    if orjson is None:
+        return log.model_dump_json(exclude_none=compact, exclude_defaults=compact).encode("utf-8")
+    return orjson.dumps(
+        log.model_dump(mode="python", exclude_none=compact, exclude_defaults=compact),
+        default=str,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC,
+    )
@@ -14,116 +14,444 @@ This module only:
 
 from __future__ import annotations
 
+import os
 from functools import lru_cache
-from typing import List
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import pyarrow  # noqa: F401 - parquet engine for the typed snapshot
+except ImportError:
+    pyarrow = None
+
 from langchain_core.tools import StructuredTool
 from schemas.executor_models_llm2 import (
+    DIRECTION_CODES,
+    SAMPLE_RECORDS_MAX,
+    TRANSACTION_FIELDS,
+    TransactionColumns,
     TransactionQuerySpec,
+    TransactionQuerySpecFast,
     TransactionQueryResult,
     TransactionRecord,
 )
 
+TRANSACTIONS_CSV_PATH = "data/transactions.csv"
+
 
 # --------------------------------------------------------------------------------------
 # Internal helpers
 # --------------------------------------------------------------------------------------
 
 
+# Column dtypes at load time (so records can be built without re-validation).
+# Low-cardinality id/code columns are categorical: equality and isin filters
+# then run on integer codes. amount stays float64 - float32 would show up as
+# rounding noise in the sums returned to LLM-2.
+_CSV_DTYPES = {
+    "transaction_id": str,
+    "user_id": "category",
+    "account_id": "category",
+    "account_type": "category",
+    "amount": float,
+    "direction": "category",
+    "month": "Int64",
+    "year": "Int64",
+    "dayOfWeek": "category",
+    "categoryGroupId": "category",
+    "categoryName": str,
+    "subCategoryId": "category",
+    "subCategoryName": str,
+}
+
+# Only the columns TransactionRecord needs (dateInUserLocalTime / day are not read)
+_CSV_COLUMNS = list(_CSV_DTYPES) + ["date"]
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+# numexpr's fused kernel only beats plain NumPy on larger arrays
+NUMEXPR_MIN_ROWS = 10_000
+
+# Users with at least this many rows are filtered by the numba kernel (if installed)
+NUMBA_MIN_ROWS = 100_000
+
+# Distinct specs whose results query_transactions_tool keeps (see _cached_query)
+QUERY_CACHE_SIZE = 512
+
+_INT64_MIN = np.iinfo(np.int64).min
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def _read_csv(csv_path: str) -> pd.DataFrame:
+    """Parse transactions.csv into the typed frame (+ derived columns)."""
+    df = pd.read_csv(
+        csv_path,
+        usecols=_CSV_COLUMNS,
+        dtype=_CSV_DTYPES,
+        parse_dates=["date"],
+        date_format="%d/%m/%Y",
+    )
+
+    # int8 direction codes for the filter / aggregate / kernel paths (-1 = missing);
+    # the string column stays for building records
+    df["direction_code"] = (
+        df["direction"].astype(object).map(DIRECTION_CODES).fillna(-1).astype(np.int8)
+    )
+    return df
+
+
+def _snapshot_path(csv_path: str) -> Path:
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def _ensure_parquet(csv_path: str) -> Optional[Path]:
+    """
+    Typed parquet snapshot of transactions.csv (written on first run, rewritten
+    when the CSV is newer). Dtypes - categoricals, nullable ints, datetime64 -
+    round-trip, so loading skips CSV parsing and date parsing entirely.
+
+    Returns None if pyarrow is not installed or the snapshot cannot be written.
+    """
+    if pyarrow is None:
+        return None
+
+    parquet_path = _snapshot_path(csv_path)
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= os.path.getmtime(csv_path):
+        return parquet_path
+
+    try:
+        _read_csv(csv_path).to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+    except Exception as e:
+        print(f"⚠️  Could not write transactions snapshot {parquet_path}: {e}")
+        return None
+    print(f"✅ Wrote transactions snapshot {parquet_path}")
+    return parquet_path
+
+
 @lru_cache(maxsize=1)
-def _load_transactions(csv_path: str = "data/transactions.csv") -> pd.DataFrame:
-    
+def _load_transactions(csv_path: str = TRANSACTIONS_CSV_PATH) -> pd.DataFrame:
     """
     Load transactions.csv once and cache it.
 
+    - Reads the typed parquet snapshot when pyarrow is available
+      (see _ensure_parquet), else parses the CSV.
     - Parses 'date' column as datetime.
-    - Leaves other columns as-is.
+    - Casts the other record columns to their native types (month/year as
+      nullable ints, id/code columns as categoricals), so
+      TransactionRecord.model_construct() gets typed values.
+    - Adds amount_abs (|amount|) shared by filtering and aggregates.
+    - Validates the first row once against TransactionRecord; rows built
+      later skip validation.
     """
-    df = pd.read_csv(csv_path)
-    df['date'] = pd.to_datetime(df['date'], format='%d/%m/%Y', dayfirst=True)
+    parquet_path = _ensure_parquet(csv_path)
+    if parquet_path is not None:
+        df = pd.read_parquet(parquet_path, engine="pyarrow")
+    else:
+        df = _read_csv(csv_path)
+
+    # |amount| once, for the amount filters (mask + kernel) and avg/min/max.
+    # Derived here rather than in _read_csv so existing snapshots stay valid;
+    # float64 like amount (float32 would drift in the returned aggregates)
+    df["amount_abs"] = np.abs(df["amount"].to_numpy(np.float64))
+
+    if len(df):
+        first_row = df.iloc[:1]
+        TransactionRecord.model_validate(
+            {name: _column_values(first_row, name)[0] for name in TRANSACTION_FIELDS}
+        )
+
     return df
 
 
-def _nan_to_none(value):
-    """Convert pandas NaN to Python None for optional fields."""
-    if pd.isna(value):
-        return None
-    return value
+@lru_cache(maxsize=1)
+def _user_row_index(csv_path: str = TRANSACTIONS_CSV_PATH) -> Dict[str, np.ndarray]:
+    """user_id -> sorted row positions of that user in the cached frame."""
+    df = _load_transactions(csv_path)
+    return {
+        user_id: np.asarray(positions, dtype=np.intp)
+        for user_id, positions in df.groupby("user_id", sort=False, observed=True).indices.items()
+    }
+
+
+@lru_cache(maxsize=4)
+def _user_column_row_index(column: str, csv_path: str = TRANSACTIONS_CSV_PATH) -> Dict[tuple, np.ndarray]:
+    """(user_id, value of `column`) -> sorted row positions (inverted index for id filters)."""
+    df = _load_transactions(csv_path)
+    groups = df.groupby(["user_id", column], sort=False, observed=True)
+    return {key: np.asarray(positions, dtype=np.intp) for key, positions in groups.indices.items()}
+
+
+def _bucket_rows(column: str, user_id: str, values) -> np.ndarray:
+    """Sorted row positions of `user_id` whose `column` is one of `values`."""
+    index = _user_column_row_index(column)
+    buckets = [index[key] for key in ((user_id, value) for value in values) if key in index]
+    if not buckets:
+        return _NO_ROWS
+    # Buckets are disjoint; sorting restores frame order
+    return buckets[0] if len(buckets) == 1 else np.sort(np.concatenate(buckets))
+
+
+def _candidate_rows(spec: TransactionQuerySpecFast) -> np.ndarray:
+    """
+    Row positions that can possibly match `spec`: the user's rows, narrowed to
+    the (user, category group) and/or (user, subcategory) buckets when those
+    filters are set. Hash lookups + one intersection - no full-frame scan.
+    """
+    narrowed = [
+        _bucket_rows(column, spec.user_id, values)
+        for column, values in (
+            ("categoryGroupId", spec.category_group_ids),
+            ("subCategoryId", spec.sub_category_ids),
+        )
+        if values
+    ]
+    if not narrowed:
+        return _user_row_index().get(spec.user_id, _NO_ROWS)
+    if len(narrowed) == 1:
+        return narrowed[0]
+    return np.intersect1d(narrowed[0], narrowed[1], assume_unique=True)
+
+
+def _column_values(df: pd.DataFrame, name: str) -> list:
+    """One DataFrame column as a Python list (NaN -> None, Timestamp -> date)."""
+    col = df[name]
+    if name == "date":
+        # NumPy's C conversion to datetime.date (NaT -> None), no per-row Timestamp
+        return col.to_numpy().astype("datetime64[D]").tolist()
+    if name == "amount":
+        return col.astype(float).tolist()
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # Values looked up by category code; code -1 (missing) hits the trailing None
+        lookup = np.append(col.cat.categories.to_numpy(dtype=object), None)
+        return lookup[col.cat.codes.to_numpy()].tolist()
+    return col.to_numpy(dtype=object, na_value=None).tolist()
+
+
+# Every record gets every field - model_construct then skips working out the set
+# (a fresh set per record: model_copy(update=...) mutates it)
+_RECORD_FIELDS_SET = frozenset(TRANSACTION_FIELDS)
+
+
+def records_from_frame(frame_id: str, indices: Sequence[int]) -> List[TransactionRecord]:
+    """
+    TransactionRecord objects for the given row positions of a cached frame.
+
+    frame_id is the csv path passed to _load_transactions (cached, so this
+    never re-reads the file). Rows come from trusted CSV data, so
+    validation is skipped (model_construct).
+    """
+    if len(indices) == 0:
+        return []
+    rows = _load_transactions(frame_id).iloc[np.asarray(indices, dtype=np.intp)]
+    columns = [_column_values(rows, name) for name in TRANSACTION_FIELDS]
+    construct = TransactionRecord.model_construct
+    return [
+        construct(set(_RECORD_FIELDS_SET), **dict(zip(TRANSACTION_FIELDS, values)))
+        for values in zip(*columns)
+    ]
 
 
 # --------------------------------------------------------------------------------------
-# Core tool function
+# Numba filter kernel (large users only)
 # --------------------------------------------------------------------------------------
 
 
-def query_transactions_tool(spec: TransactionQuerySpec) -> TransactionQueryResult:
+def _in_sorted(values, v):
+    """Binary-search membership test in a sorted int32 array."""
+    i = np.searchsorted(values, v)
+    return i < values.shape[0] and values[i] == v
+
+
+def _filter_kernel(rows, acct_codes, dates, amt_abs, dir_codes, cat_codes, sub_codes,
+                   acct_set, d0, d1, amin, amax, dfilt, cat_set, sub_set):
     """
-    Apply a TransactionQuerySpec to transactions.csv and return TransactionQueryResult.
+    One fused pass over `rows` testing every predicate; returns a uint8 mask
+    aligned with `rows`. Empty code sets / NaN amount bounds / dfilt < 0 mean
+    "no filter"; date bounds are int64 (same unit as `dates`).
+    """
+    n = rows.shape[0]
+    out = np.zeros(n, dtype=np.uint8)
+    for i in prange(n):
+        r = rows[i]
+        if acct_set.shape[0] and not _in_sorted(acct_set, acct_codes[r]):
+            continue
+        if dates[r] < d0 or dates[r] > d1:
+            continue
+        if cat_set.shape[0] and not _in_sorted(cat_set, cat_codes[r]):
+            continue
+        if sub_set.shape[0] and not _in_sorted(sub_set, sub_codes[r]):
+            continue
+        a = amt_abs[r]
+        if not np.isnan(amin) and not a >= amin:
+            continue
+        if not np.isnan(amax) and not a <= amax:
+            continue
+        if dfilt >= 0 and dir_codes[r] != dfilt:
+            continue
+        out[i] = 1
+    return out
+
+
+if numba is not None:
+    prange = numba.prange
+    _in_sorted = numba.njit(cache=True)(_in_sorted)
+    _filter_kernel = numba.njit(cache=True, parallel=True)(_filter_kernel)
+else:
+    prange = range
 
-    This function is intentionally dumb:
-    - No understanding of "recent", "large", "coffee", etc.
-    - It only respects the explicit filters in `spec`.
-    All semantics (how to fill spec) come from LLM-2.
+
+@lru_cache(maxsize=1)
+def _kernel_arrays(csv_path: str = TRANSACTIONS_CSV_PATH) -> Dict[str, np.ndarray]:
+    """Contiguous NumPy arrays of the filtered columns, extracted once per frame."""
+    df = _load_transactions(csv_path)
+    return {
+        "acct_codes": df["account_id"].cat.codes.to_numpy(np.int32),
+        "dates": df["date"].to_numpy().view(np.int64),
+        "amt_abs": df["amount_abs"].to_numpy(),
+        "dir_codes": df["direction_code"].to_numpy(),
+        "cat_codes": df["categoryGroupId"].cat.codes.to_numpy(np.int32),
+        "sub_codes": df["subCategoryId"].cat.codes.to_numpy(np.int32),
+    }
+
+
+@lru_cache(maxsize=256)
+def _code_set(column: str, values: Optional[FrozenSet[str]], csv_path: str = TRANSACTIONS_CSV_PATH) -> np.ndarray:
     """
-    df = _load_transactions()
+    Sorted int32 codes of `values` in a categorical column (unknown values -> -2).
+
+    Cached per (column, id set): repeated filters resolve their codes once.
+    Read-only - the array is shared between calls.
+    """
+    if not values:
+        codes = np.empty(0, dtype=np.int32)
+    else:
+        codes = _load_transactions(csv_path)[column].cat.categories.get_indexer(list(values))
+        codes = np.sort(np.where(codes < 0, -2, codes).astype(np.int32))
+    codes.flags.writeable = False
+    return codes
+
+
+def _date_bound(df: pd.DataFrame, value, default: int, end_of_day: bool = False) -> int:
+    """Date filter as an int64 tick in the date column's unit (end_of_day: last tick of that day)."""
+    if value is None:
+        return default
+    bound = np.datetime64(value, "D")
+    if end_of_day:
+        bound = bound + np.timedelta64(1, "D")
+    ticks = int(bound.astype(df["date"].dtype).view(np.int64))
+    return ticks - 1 if end_of_day else ticks
+
+
+def _kernel_mask(df: pd.DataFrame, spec: TransactionQuerySpecFast, rows: np.ndarray) -> np.ndarray:
+    """spec.to_mask(df, rows) computed by the numba kernel (rows belong to spec.user_id)."""
+    arrays = _kernel_arrays()
+    dfilt = DIRECTION_CODES.get(spec.direction, -1)
+    mask = _filter_kernel(
+        rows,
+        arrays["acct_codes"], arrays["dates"], arrays["amt_abs"], arrays["dir_codes"],
+        arrays["cat_codes"], arrays["sub_codes"],
+        _code_set("account_id", spec.account_ids),
+        _date_bound(df, spec.start_date, _INT64_MIN),
+        _date_bound(df, spec.end_date, _INT64_MAX, end_of_day=True),
+        np.nan if spec.min_amount is None else float(spec.min_amount),
+        np.nan if spec.max_amount is None else float(spec.max_amount),
+        dfilt,
+        _code_set("categoryGroupId", spec.category_group_ids),
+        _code_set("subCategoryId", spec.sub_category_ids),
+    )
+    return mask.view(bool)
+
+
+def _build_columns(df: pd.DataFrame) -> TransactionColumns:
+    """Columnar payload straight from the filtered DataFrame (no per-row objects)."""
+    # Column types are fixed at load time (first row validated there)
+    return TransactionColumns.model_construct(
+        n_rows=len(df),
+        **{name: _column_values(df, name) for name in TRANSACTION_FIELDS},
+    )
+
+
+def _date_order(dates: np.ndarray, ascending: bool, limit: Optional[int]) -> np.ndarray:
+    """
+    Positions into `dates` in date order (NaT last, ties keep position order).
+
+    With a small limit only the top `limit` candidates are sorted: one
+    np.partition finds the k-th key, then just the rows at or before it are
+    argsorted. Same result as the full stable sort truncated to `limit`.
+    """
+    ticks = dates.view(np.int64)
+    # NaT is int64 min: keep it last in both directions (~x reverses order, no overflow)
+    key = np.where(ticks == _INT64_MIN, _INT64_MAX, ticks) if ascending else ~ticks
+
+    if limit is not None and 0 < limit < len(key) // 4:
+        kth = np.partition(key, limit - 1)[limit - 1]
+        candidates = np.flatnonzero(key <= kth)
+        return candidates[np.argsort(key[candidates], kind="stable")[:limit]]
+    return np.argsort(key, kind="stable")
+
+
+def _direction_sums(amounts: np.ndarray, codes: np.ndarray, debit_code: int, credit_code: int):
+    """(debit total, credit total) of `amounts` split by direction code."""
+    if ne is not None and len(amounts) >= NUMEXPR_MIN_ROWS:
+        local_dict = {"amt": amounts, "dirn": codes, "D": debit_code, "C": credit_code}
+        debits = ne.evaluate("sum(where(dirn == D, amt, 0.0))", local_dict=local_dict)
+        credits = ne.evaluate("sum(where(dirn == C, amt, 0.0))", local_dict=local_dict)
+        return float(debits), float(credits)
+    # One pass: codes are -1 (missing) / 0 / 1, shifted to bincount bins 0..2
+    sums = np.bincount(codes.astype(np.intp) + 1, weights=amounts, minlength=3)
+    return float(sums[debit_code + 1]), float(sums[credit_code + 1])
+
+
+# --------------------------------------------------------------------------------------
+# Core tool function
+# --------------------------------------------------------------------------------------
+
+
+def _match_rows(df: pd.DataFrame, spec: TransactionQuerySpecFast, rows: np.ndarray) -> np.ndarray:
+    """Positions in `rows` matching `spec` - no row data touched yet."""
+    if numba is not None and len(rows) >= NUMBA_MIN_ROWS:
+        return rows[_kernel_mask(df, spec, rows)]
+    return rows[spec.to_mask(df, rows)]
 
-    # Filter by user_id (mandatory)
-    df_f = df[df["user_id"] == spec.user_id].copy()
-
-    # Optional account_ids filter
-    if spec.account_ids:
-        df_f = df_f[df_f["account_id"].isin(spec.account_ids)]
-
-    # Date range filters (inclusive)
-    if spec.start_date is not None:
-        df_f = df_f[df_f["date"].dt.date >= spec.start_date]
-    if spec.end_date is not None:
-        df_f = df_f[df_f["date"].dt.date <= spec.end_date]
-
-    # Category group / subcategory filters
-    if spec.category_group_ids:
-        df_f = df_f[df_f["categoryGroupId"].isin(spec.category_group_ids)]
-    if spec.sub_category_ids:
-        df_f = df_f[df_f["subCategoryId"].isin(spec.sub_category_ids)]
-
-    # Amount filters (absolute value)
-    if spec.min_amount is not None:
-        df_f = df_f[df_f["amount"].abs() >= spec.min_amount]
-    if spec.max_amount is not None:
-        df_f = df_f[df_f["amount"].abs() <= spec.max_amount]
-
-    # Direction filter
-    if spec.direction == "D":
-        df_f = df_f[df_f["direction"] == "D"]
-    elif spec.direction == "C":
-        df_f = df_f[df_f["direction"] == "C"]
-    # "BOTH" or None -> no direction filter
-
-    # Sorting
-    if spec.sort_by == "date_asc":
-        df_f = df_f.sort_values("date", ascending=True)
-    elif spec.sort_by == "date_desc":
-        df_f = df_f.sort_values("date", ascending=False)
+
+def _build_result(df: pd.DataFrame, spec: TransactionQuerySpecFast, idx: np.ndarray) -> TransactionQueryResult:
+    """Sort + limit the matched positions, then aggregate and materialize them."""
+    # Sorting (on the matched dates only; top-K when the limit is small)
+    if spec.sort_by in ("date_asc", "date_desc"):
+        dates = df["date"].to_numpy()[idx]
+        idx = idx[_date_order(dates, spec.sort_by == "date_asc", spec.limit)]
 
     # Limit
     if spec.limit is not None and spec.limit > 0:
-        df_f = df_f.head(spec.limit)
+        idx = idx[:spec.limit]
 
-    # Compute aggregates
-    total_count = int(len(df_f))
+    # Compute aggregates on NumPy views of the matched rows
+    total_count = int(len(idx))
 
     if total_count > 0:
-        # Debit and credit sums
-        debits = df_f[df_f["direction"] == "D"]["amount"].sum()
-        credits = df_f[df_f["direction"] == "C"]["amount"].sum()
+        amounts = df["amount"].to_numpy()[idx]
+        abs_amounts = df["amount_abs"].to_numpy()[idx]
+        codes = df["direction_code"].to_numpy()[idx]
 
-        total_debit_amount = float(debits)
-        total_credit_amount = float(credits)
+        # Debit and credit sums
+        total_debit_amount, total_credit_amount = _direction_sums(
+            amounts, codes, DIRECTION_CODES["D"], DIRECTION_CODES["C"]
+        )
         net_amount = float(total_credit_amount - total_debit_amount)
 
-        abs_amounts = df_f["amount"].abs()
         avg_amount = float(abs_amounts.mean())
         max_amount = float(abs_amounts.max())
         min_amount = float(abs_amounts.min())
@@ -135,30 +463,17 @@ def query_transactions_tool(spec: TransactionQuerySpec) -> TransactionQueryResul
         max_amount = None
         min_amount = None
 
-    # Build TransactionRecord list
-    records: List[TransactionRecord] = []
-    for row in df_f.itertuples(index=False):
-        record = TransactionRecord(
-            transaction_id=row.transaction_id,
-            user_id=row.user_id,
-            account_id=row.account_id,
-            account_type=_nan_to_none(row.account_type),
-            amount=float(row.amount),            
-            direction=row.direction,
-            date=row.date.date(),  # pandas.Timestamp -> date
-            month=_nan_to_none(row.month),        
-            year=_nan_to_none(row.year),
-            dayOfWeek=_nan_to_none(row.dayOfWeek),
-            categoryGroupId=_nan_to_none(row.categoryGroupId),
-            categoryName=_nan_to_none(row.categoryName),
-            subCategoryId=_nan_to_none(row.subCategoryId),
-            subCategoryName=_nan_to_none(row.subCategoryName),
-        )
-        records.append(record)
+    # Only the selected rows are materialized from here on
+    df_f = df.iloc[idx]
+
+    # Matched rows column-wise; only the first few become records
+    columns = _build_columns(df_f)
+    sample_records = records_from_frame(TRANSACTIONS_CSV_PATH, idx[:SAMPLE_RECORDS_MAX])
 
-    # Wrap in TransactionQueryResult
-    result = TransactionQueryResult(
-        transactions=records,
+    # Wrap in TransactionQueryResult (all values computed here - no re-validation)
+    result = TransactionQueryResult.model_construct(
+        transactions=columns,
+        sample_records=sample_records,
         total_count=total_count,
         total_debit_amount=total_debit_amount,
         total_credit_amount=total_credit_amount,
@@ -166,11 +481,86 @@ def query_transactions_tool(spec: TransactionQuerySpec) -> TransactionQueryResul
         avg_amount=avg_amount,
         max_amount=max_amount,
         min_amount=min_amount,
+        matched_indices=idx.tolist(),
+        source_frame_id=TRANSACTIONS_CSV_PATH,
     )
 
     return result
 
 
+def query_transactions_tool(spec: TransactionQuerySpec) -> TransactionQueryResult:
+    """
+    Apply a TransactionQuerySpec to transactions.csv and return TransactionQueryResult.
+
+    This function is intentionally dumb:
+    - No understanding of "recent", "large", "coffee", etc.
+    - It only respects the explicit filters in `spec`.
+    All semantics (how to fill spec) come from LLM-2.
+    """
+    # Validated once by pydantic; the frozen slots dataclass is the cache key
+    return _cached_query(TransactionQuerySpecFast.from_spec(spec))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_query(spec: TransactionQuerySpecFast) -> TransactionQueryResult:
+    """
+    query_transactions_tool body, memoized per spec.
+
+    Repeated identical tool calls (LLM-2 retries / re-plans) reuse the
+    result. Results are read-only downstream; reload_transactions() drops them.
+    """
+    df = _load_transactions()
+
+    # Matching row positions - only candidate rows are tested
+    idx = _match_rows(df, spec, _candidate_rows(spec))
+    return _build_result(df, spec, idx)
+
+
+def reload_transactions() -> None:
+    """Drop the cached frame, its indexes and all cached query results."""
+    for cached in (
+        _load_transactions,
+        _user_row_index,
+        _user_column_row_index,
+        _kernel_arrays,
+        _code_set,
+        _cached_query,
+    ):
+        cached.cache_clear()
+    print("✅ Transactions cache cleared")
+
+
+def run_query_plan(specs: Sequence[TransactionQuerySpec]) -> List[TransactionQueryResult]:
+    """
+    Execute several specs (one LLM-2 turn) with a single gather over the frame.
+
+    - identical specs are executed once,
+    - the union of all specs' candidate rows is gathered ONCE into a compact
+      sub-frame, and every spec's predicates run on that sub-frame,
+    - each spec then gets its own sorted / limited result (same as
+      query_transactions_tool).
+    Results are returned in the order of `specs`.
+    """
+    df = _load_transactions()
+    fast_specs = [TransactionQuerySpecFast.from_spec(spec) for spec in specs]
+    unique_specs = list(dict.fromkeys(fast_specs))
+
+    candidates = [_candidate_rows(spec) for spec in unique_specs]
+    shared = np.unique(np.concatenate(candidates)) if candidates else _NO_ROWS
+
+    if numba is not None and len(shared) >= NUMBA_MIN_ROWS:
+        # The kernel has no user test: each spec runs on its own candidate rows
+        matched = [_match_rows(df, spec, rows) for spec, rows in zip(unique_specs, candidates)]
+    else:
+        sub = df.iloc[shared]
+        matched = [shared[spec.to_mask(sub)] for spec in unique_specs]
+
+    results = {
+        spec: _build_result(df, spec, idx) for spec, idx in zip(unique_specs, matched)
+    }
+    return [results[spec] for spec in fast_specs]
+
+
 # --------------------------------------------------------------------------------------
 # LangChain StructuredTool wrapper
 # --------------------------------------------------------------------------------------
@@ -182,6 +572,7 @@ query_transactions_lc_tool = StructuredTool.from_function(
     description=(
         "Filter financial transactions for a single user by date range, "
         "categories, direction (spend vs income), accounts, and amount thresholds. "
-        "Returns both matching transactions and basic aggregates."
+        "Returns basic aggregates, matching transactions as column lists, "
+        "and the first matches as sample records."
     ),
 )
@@ -7,21 +7,25 @@ This module exposes:
 - search_trans_categories_lc_tool: LangChain StructuredTool for LLM-1 Router
 
 Purpose:
-- Wrap the Category RAG system (query_categories) as a LangChain tool
+- Wrap the Category RAG system (query_categories_batch) as a LangChain tool
 - Transform RAG output into structured CategoryMatch objects
 - Enable LLM-1 to resolve natural language category phrases to category IDs
 
 Architecture Position:
 - Called by: LLM-1 Router (for UC-04 category-based queries)
-- Calls: query_categories() from rag.trn_category_rag
+- Calls: query_categories_batch() / embed_terms() from rag.trn_category_rag
 - Output used in: RouterOutput.resolved_trn_categories
 """
 
-from typing import List, Literal, Optional, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, List, Literal, Optional, Dict, Tuple
+
+import numpy as np
 from pydantic import BaseModel, Field
 
 from langchain_core.tools import StructuredTool
-from rag.trn_category_rag import query_categories
+from rag.trn_category_rag import embed_terms, query_categories_batch
 
 
 ###########################################################################################
@@ -113,6 +117,126 @@ def _distance_to_confidence(distance: float) -> Literal["high", "medium", "low"]
         return "low"
 
 
+# Vectorized _distance_to_confidence: bin edges for np.searchsorted(side="right").
+# The medium band includes 0.6, so its upper edge is the next float above 0.6.
+_CONFIDENCE_EDGES = np.array([0.4, np.nextafter(0.6, np.inf)])
+_CONFIDENCE_LABELS = np.array(["high", "medium", "low"], dtype=object)
+
+
+def _distances_to_confidence(distances: np.ndarray) -> np.ndarray:
+    """_distance_to_confidence for a whole array of distances (one searchsorted)."""
+    return _CONFIDENCE_LABELS[np.searchsorted(_CONFIDENCE_EDGES, distances, side="right")]
+
+
+###########################################################################################
+# TERM RESULT CACHE
+###########################################################################################
+
+# Exact level: normalized term -> (query vector, RAG matches), least recently used evicted
+TERM_CACHE_SIZE = 1024
+
+# Semantic level: an uncached term whose embedding has at least this cosine
+# similarity to a cached term reuses that term's matches ("coffee shop" /
+# "coffee shops"). e5 similarities sit in a narrow high band, so this is
+# stricter than the usual ~0.95.
+SEMANTIC_CACHE_MIN_SIMILARITY = 0.97
+
+# RAG parameters of every search made by this tool
+RAG_TOP_K = 3
+RAG_MIN_CONFIDENCE = 1.0
+
+_TERM_CACHE: "OrderedDict[str, Tuple[np.ndarray, List[Dict[str, Any]]]]" = OrderedDict()
+
+# Guards _TERM_CACHE and the matrix below: executor_node_batch runs tool calls
+# in threads. Held only for cache reads/writes, never around embedding or search.
+_TERM_CACHE_LOCK = threading.Lock()
+
+# Cached vectors stacked into one matrix for the semantic lookup (None = rebuild)
+_term_matrix: Optional[np.ndarray] = None
+_term_matrix_keys: List[str] = []
+
+
+def _cache_put(key: str, vector: np.ndarray, matches: List[Dict[str, Any]]) -> None:
+    """Insert / refresh one term (caller holds _TERM_CACHE_LOCK)."""
+    global _term_matrix
+    _TERM_CACHE[key] = (vector, matches)
+    _TERM_CACHE.move_to_end(key)
+    if len(_TERM_CACHE) > TERM_CACHE_SIZE:
+        _TERM_CACHE.popitem(last=False)
+    _term_matrix = None
+
+
+def _semantic_lookup(vector: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+    """Matches of the most similar cached term, if it is similar enough (caller holds _TERM_CACHE_LOCK)."""
+    global _term_matrix, _term_matrix_keys
+    if not _TERM_CACHE:
+        return None
+    if _term_matrix is None:
+        _term_matrix_keys = list(_TERM_CACHE)
+        _term_matrix = np.stack([_TERM_CACHE[key][0] for key in _term_matrix_keys])
+
+    similarities = _term_matrix @ vector
+    best = int(np.argmax(similarities))
+    if similarities[best] < SEMANTIC_CACHE_MIN_SIMILARITY:
+        return None
+    return _TERM_CACHE[_term_matrix_keys[best]][1]
+
+
+def _cached_rag_results(terms: List[str]) -> List[List[Dict[str, Any]]]:
+    """
+    RAG matches per term (same order as `terms`) behind a two-level cache.
+
+    1. Exact: a term seen before (case-insensitive) returns its stored matches.
+    2. Semantic: new terms are embedded in one call; a term close enough to a
+       cached one reuses that term's matches without a search.
+    Only the remaining terms go to query_categories_batch (embeddings are
+    already cached by then, so that is just the matmul).
+    The returned match dicts are shared with the cache - read them only.
+    """
+    keys = [term.lower() for term in terms]
+    found: Dict[str, List[Dict[str, Any]]] = {}
+
+    with _TERM_CACHE_LOCK:
+        for key in dict.fromkeys(keys):
+            entry = _TERM_CACHE.get(key)
+            if entry is not None:
+                _TERM_CACHE.move_to_end(key)
+                found[key] = entry[1]
+
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing:
+        vectors = embed_terms(missing)
+
+        to_search = []
+        with _TERM_CACHE_LOCK:
+            for key, vector in zip(missing, vectors):
+                matches = _semantic_lookup(vector)
+                if matches is None:
+                    to_search.append((key, vector))
+                else:
+                    found[key] = matches
+                    _cache_put(key, vector, matches)
+
+        if to_search:
+            searched = query_categories_batch(
+                [key for key, _ in to_search], top_k=RAG_TOP_K, min_confidence=RAG_MIN_CONFIDENCE
+            )
+            with _TERM_CACHE_LOCK:
+                for (key, vector), matches in zip(to_search, searched):
+                    found[key] = matches
+                    _cache_put(key, vector, matches)
+
+    return [found[key] for key in keys]
+
+
+def clear_term_cache() -> None:
+    """Forget cached term results (e.g. after rebuilding the category index)."""
+    global _term_matrix
+    with _TERM_CACHE_LOCK:
+        _TERM_CACHE.clear()
+        _term_matrix = None
+
+
 ###########################################################################################
 # CORE TOOL FUNCTION
 ###########################################################################################
@@ -121,7 +245,7 @@ def search_transaction_categories(terms: List[str]) -> List[CategoryMatch]:
     """
     Search for transaction categories matching natural language terms.
     
-    This function wraps the Category RAG system (query_categories) and transforms
+    This function wraps the Category RAG system (query_categories_batch) and transforms
     the output into structured CategoryMatch objects that LLM-1 can use to populate
     RouterOutput.resolved_trn_categories.
     
@@ -165,8 +289,10 @@ def search_transaction_categories(terms: List[str]) -> List[CategoryMatch]:
         - RAG error: Returns empty list (logs error internally)
         
     Performance:
-        - ~10ms per term (cached embedding model and vector store)
-        - Batch processing more efficient than multiple single calls
+        - All terms embedded in one batched forward pass (cached terms skip it)
+          and scored with one matmul against the category index
+        - Repeated and near-identical terms are answered from the term cache
+          (see _cached_rag_results)
         - Uses default threshold 0.6 from RAG configuration
     """
     
@@ -181,41 +307,43 @@ def search_transaction_categories(terms: List[str]) -> List[CategoryMatch]:
         return []
     
     try:
-        # Collect all matches from all terms
-        all_matches: List[CategoryMatch] = []
+        # Query RAG once for all uncached terms (top_k=3 per term, loose threshold 1.0)
+        results_per_term = _cached_rag_results(valid_terms)
         
-        # Query RAG for each term
-        for term in valid_terms:
-            # Query RAG system (uses default threshold 0.6, top_k=3)
-            rag_results = query_categories(term=term, top_k=3, min_confidence=1.0)
-            
-            # Transform RAG output to CategoryMatch objects
-            for result in rag_results:
-                match = CategoryMatch(
-                    user_term=term,  # Track which term produced this match
-                    category_id=result['id'],
-                    category_name=result['name'],
-                    category_type=result['type'],  # "group" or "subcategory"
-                    group_id=result.get('group_id'),  # None for groups
-                    group_name=result.get('group_name'),  # None for groups
-                    distance=result['score'],
-                    confidence=_distance_to_confidence(result['score'])
-                )
-                all_matches.append(match)
+        # Flatten: one (term, RAG match) pair per row
+        flat = [
+            (term, result)
+            for term, rag_results in zip(valid_terms, results_per_term)
+            for result in rag_results
+        ]
+        if not flat:
+            return []
         
-        # Deduplicate: If multiple terms match the same category,
-        # keep the match with the best (lowest) distance
-        seen: Dict[str, CategoryMatch] = {}
+        # Deduplicate: If multiple terms match the same category, keep the match
+        # with the best (lowest) distance. Stable sort by distance, then the first
+        # row per category_id - ties keep the earlier term.
+        distances = np.array([result['score'] for _, result in flat], dtype=np.float64)
+        category_ids = np.array([result['id'] for _, result in flat])
         
-        for match in all_matches:
-            category_id = match.category_id
-            
-            if category_id not in seen or match.distance < seen[category_id].distance:
-                seen[category_id] = match  # Keep best match for this category
+        order = np.argsort(distances, kind="stable")
+        _, first = np.unique(category_ids[order], return_index=True)
+        keep = order[np.sort(first)]  # best first
+        confidences = _distances_to_confidence(distances[keep]).tolist()
         
-        # Convert back to list and sort by distance (best first)
-        final_matches = list(seen.values())
-        final_matches.sort(key=lambda m: m.distance)
+        # Transform the kept RAG rows to CategoryMatch objects (trusted RAG output)
+        final_matches = []
+        for i, confidence in zip(keep.tolist(), confidences):
+            term, result = flat[i]
+            final_matches.append(CategoryMatch.model_construct(
+                user_term=term,  # Track which term produced this match
+                category_id=result['id'],
+                category_name=result['name'],
+                category_type=result['type'],  # "group" or "subcategory"
+                group_id=result.get('group_id'),  # None for groups
+                group_name=result.get('group_name'),  # None for groups
+                distance=float(distances[i]),
+                confidence=confidence
+            ))
         
         return final_matches
     
@@ -293,7 +293,7 @@ def print_llm1_output(router_output, expected_data: Dict) -> Dict[str, bool]:
     if has_categories:
         print(f"\n      Full content:")
         for cat in resolved_cats:
-            print(f"      {json.dumps(cat, indent=8, default=str)}")
+            print(f"      {json.dumps(cat.model_dump(), indent=8, default=str)}")
     
     # Resolved dates (if temporal query)
     if router_output.resolved_dates:
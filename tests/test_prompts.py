@@ -0,0 +1,182 @@
+"""
+Prompt Size & Structure Tests
+=============================
+
+Guards the LLM-1 router system prompt against token bloat.
+The prompt is sent (and cached) on every router call, so its size is a
+direct latency/cost budget - NOT functional testing of routing quality.
+
+Usage:
+    import tests.test_prompts as tp
+    tp.test_router_prompt()
+    tp.test_executor_prompt_batch()
+"""
+
+import re
+
+
+# Token budget for OPTIMIZED_ROUTER_SYSTEM_PROMPT (cl100k_base tokens)
+ROUTER_PROMPT_TOKEN_BUDGET = 8500
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, else the ~4 chars/token estimate."""
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except ImportError:
+        return len(text) // 4
+
+
+def test_router_prompt():
+    """Run all router prompt checks."""
+
+    print("=" * 80)
+    print("🧪 ROUTER PROMPT TESTS")
+    print("=" * 80)
+
+    from prompts.llm1_prompt import OPTIMIZED_ROUTER_SYSTEM_PROMPT
+
+    results = []
+
+    # ─────────────────────────────────────────────────────────────────
+    # Test 1: Token budget
+    # ─────────────────────────────────────────────────────────────────
+    n_tokens = count_tokens(OPTIMIZED_ROUTER_SYSTEM_PROMPT)
+    ok = n_tokens <= ROUTER_PROMPT_TOKEN_BUDGET
+    results.append(("Token budget", ok, f"{n_tokens} > {ROUTER_PROMPT_TOKEN_BUDGET}"))
+    print(f"{'✅' if ok else '❌'} Token budget: {n_tokens} / {ROUTER_PROMPT_TOKEN_BUDGET}")
+
+    # ─────────────────────────────────────────────────────────────────
+    # Test 2: No decorative banners / emoji
+    # ─────────────────────────────────────────────────────────────────
+    decorations = re.findall(r"={10,}|[🚨❌✅□]", OPTIMIZED_ROUTER_SYSTEM_PROMPT)
+    ok = not decorations
+    results.append(("No decorations", ok, f"found {sorted(set(decorations))}"))
+    print(f"{'✅' if ok else '❌'} No banners/emoji: {len(decorations)} found")
+
+    # ─────────────────────────────────────────────────────────────────
+    # Test 3: Each rule stated once
+    # ─────────────────────────────────────────────────────────────────
+    n_never_guess = OPTIMIZED_ROUTER_SYSTEM_PROMPT.lower().count("never guess category ids")
+    ok = n_never_guess == 1
+    results.append(("NEVER GUESS rule once", ok, f"appears {n_never_guess}x"))
+    print(f"{'✅' if ok else '❌'} 'Never guess category IDs' appears {n_never_guess}x")
+
+    # ─────────────────────────────────────────────────────────────────
+    # Summary
+    # ─────────────────────────────────────────────────────────────────
+    print("=" * 80)
+    failed = [(name, error) for name, ok, error in results if not ok]
+    for name, error in failed:
+        print(f"   • {name}: {error}")
+
+    assert len(results) == 3 and all(ok for _, ok, _ in results), f"Router prompt checks failed: {failed}"
+
+
+def test_router_message_layout():
+    """Only the last router message may change between calls of a conversation."""
+
+    import json
+    from prompts.llm1_prompt import build_router_messages
+
+    history = [
+        {"role": "user", "content": "How much on groceries?"},
+        {"role": "assistant", "content": "For what time period?"},
+        {"role": "user", "content": "Last month"},
+    ]
+    history_before = json.dumps(history)
+
+    call_1 = build_router_messages(
+        {"user_query": "Last month", "conversation_summary": None},
+        raw_messages=history,
+    )
+    call_2 = build_router_messages(
+        {"conversation_summary": {"time_window": {"value": "last_month"}}, "user_query": "Last month"},
+        raw_messages=history,
+        examples_block="## RELEVANT EXAMPLES\n...",
+    )
+
+    # Stable prefix: system + history serialize to identical bytes
+    prefix_1 = json.dumps(call_1[:-1], sort_keys=True).encode("utf-8")
+    prefix_2 = json.dumps(call_2[:-1], sort_keys=True).encode("utf-8")
+    assert prefix_1 == prefix_2
+    assert len(call_1) == len(history) + 2
+
+    # Volatile suffix: payload is the last message, key order independent
+    assert json.loads(call_2[-1]["content"].split("\n\n")[0])["user_query"] == "Last month"
+
+    # Caller's history is not mutated by the cache breakpoint
+    assert json.dumps(history) == history_before
+    print("✅ Router message layout: stable prefix, volatile suffix")
+
+
+def test_terse_router_prompt():
+    """Terse rendering keeps every rule section and the tool vocabulary, only smaller."""
+
+    from prompts.llm1_prompt import render_router_prompt
+
+    verbose = render_router_prompt("verbose")
+    terse = render_router_prompt("terse")
+
+    sections = re.compile(r"^## .*$", re.MULTILINE)
+    assert sections.findall(terse) == sections.findall(verbose)
+    for tool_name in ("query_transactions", "search_transaction_categories", "RouterOutput"):
+        assert (tool_name in terse) == (tool_name in verbose), tool_name
+    assert terse.lower().count("never guess category ids") == 1
+    assert count_tokens(terse) < count_tokens(verbose)
+    print(f"✅ Terse router prompt: {count_tokens(terse)} vs {count_tokens(verbose)} tokens")
+
+
+def test_executor_prompt_layout():
+    """LLM-2 system blocks depend only on the routing shape, never on the query."""
+
+    from prompts.llm2_prompt import llm2_system_blocks, build_dynamic_context
+    from schemas.router_models import RouterOutput
+
+    def router_output(subtypes):
+        return RouterOutput(
+            clarity="CLEAR",
+            core_use_cases=["UC-04", "UC-02", "UC-03"],
+            primary_use_case="UC-02",
+            uc_operations={"UC-02": subtypes, "UC-03": ["temporal_filter_last_month"], "UC-04": []},
+            resolved_amount_threshold=100.0,
+            uc_confidence="high",
+            clarity_reason="test",
+        )
+
+    call_1 = llm2_system_blocks(router_output(["sum_spending_single_period", "count_transactions_single_period"]))
+    call_2 = llm2_system_blocks(router_output(["count_transactions_single_period", "sum_spending_single_period"]))
+    assert call_1 == call_2
+    assert all(block["cache_control"] == {"type": "ephemeral"} for block in call_1)
+
+    summary = build_dynamic_context("How much on groceries last month?", router_output([]))
+    assert "How much on groceries last month?" in summary
+    assert not any("How much on groceries" in block["text"] for block in call_1)
+    print("✅ Executor prompt layout: static system blocks, per-query summary")
+
+
+def test_executor_prompt_batch():
+    """Batch builder matches the single builder, also when primary_use_case is None."""
+
+    from prompts.llm2_prompt import llm2_prompt_builder, llm2_prompt_builder_batch
+    from schemas.router_models import RouterOutput
+
+    def router_output(primary):
+        return RouterOutput(
+            clarity="CLEAR",
+            core_use_cases=["UC-02", "UC-03"],
+            primary_use_case=primary,
+            uc_operations={"UC-02": ["sum_spending_single_period"], "UC-03": []},
+            uc_confidence="high",
+            clarity_reason="test",
+        )
+
+    items = [
+        ("How much did I spend?", router_output("UC-02"), None),
+        ("How much last month?", router_output(None), None),
+        ("Total spending?", router_output("UC-02"), None),
+    ]
+    prompts = llm2_prompt_builder_batch(items)
+    assert prompts == [llm2_prompt_builder(*item) for item in items]
+    print(f"✅ Executor prompt batch: {len(prompts)} prompts, None primary grouped")
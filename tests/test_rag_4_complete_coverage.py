@@ -43,7 +43,7 @@ USAGE:
 from typing import Dict, Any, List
 
 # Import RAG components
-from rag.trn_category_rag import query_categories
+from rag.trn_category_rag import query_categories_batch
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -294,7 +294,14 @@ def test_complete_category_coverage(similarity_distance_threshold: float = 0.6)
     
     current_group = None
     
-    for term, expected_id, expected_name, category_type in all_tests:
+    # Execute all queries in one batch - USE the threshold parameter!
+    batch_matches = query_categories_batch(
+        [term for term, _, _, _ in all_tests],
+        top_k=3,
+        min_confidence=similarity_distance_threshold,
+    )
+    
+    for (term, expected_id, expected_name, category_type), matches in zip(all_tests, batch_matches):
         # Print group headers for readability
         if category_type == "group":
             if current_group is not None:
@@ -304,9 +311,6 @@ def test_complete_category_coverage(similarity_distance_threshold: float = 0.6)
             print(f"   {expected_name} ({expected_id})")
             print(f"   {'─' * 76}")
         
-        # Execute query - USE the threshold parameter!
-        matches = query_categories(term, top_k=3, min_confidence=similarity_distance_threshold)
-        
         # Check if expected category in top 3
         found = False
         if matches:
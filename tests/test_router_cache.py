@@ -0,0 +1,78 @@
+"""
+Router Semantic Cache Tests
+===========================
+
+Near-paraphrases that differ in one decisive word (category, direction,
+amount qualifier, period, user) must never share a cached RouterOutput -
+the exact-match key has to separate them before embedding similarity is
+even consulted.
+
+Usage:
+    import tests.test_router_cache as trc
+    trc.test_decisive_words_never_hit()
+"""
+
+import numpy as np
+
+
+MUST_MISS = [
+    ("How much did I spend on groceries last month?", "How much did I spend on restaurants last month?"),
+    ("How much did I spend last month?", "How much did I earn last month?"),
+    ("Show my payments last month", "Show my deposits last month"),
+    ("Show large transactions this year", "Show small transactions this year"),
+    ("Show transactions above $100", "Show transactions below $100"),
+    ("How much did I spend last month?", "How much did I spend last week?"),
+    ("I am USER_001. How much did I spend last month?", "I am USER_002. How much did I spend last month?"),
+]
+
+
+def _router_output():
+    from schemas.router_models import RouterOutput
+
+    return RouterOutput(
+        clarity="CLEAR",
+        core_use_cases=["UC-02"],
+        primary_use_case="UC-02",
+        uc_operations={"UC-02": ["sum_spending_single_period"]},
+        uc_confidence="high",
+        clarity_reason="test",
+    )
+
+
+def _with_constant_embedding(fn):
+    """Run fn with every query embedded to the same vector (cosine 1.0 everywhere)."""
+    import router_cache
+
+    saved = router_cache._embed
+    router_cache._embed = lambda text: np.ones(8, dtype=np.float32) / np.sqrt(8)
+    try:
+        return fn(router_cache)
+    finally:
+        router_cache._embed = saved
+
+
+def test_decisive_words_never_hit():
+    """Identical embeddings still miss when category / direction / amount / period / user differ."""
+
+    def run(router_cache):
+        for stored, asked in MUST_MISS:
+            cache = router_cache.RouterSemanticCache(threshold=0.95)
+            cache.store(stored, None, _router_output())
+            assert cache.lookup(asked) is None, (stored, asked)
+            assert cache.lookup(stored) is not None, stored
+
+    _with_constant_embedding(run)
+    print(f"✅ Router cache: {len(MUST_MISS)} near-paraphrase pairs kept apart")
+
+
+def test_same_key_paraphrase_hits():
+    """Wording changes outside the decisive words can still hit."""
+
+    def run(router_cache):
+        cache = router_cache.RouterSemanticCache(threshold=0.95)
+        cache.store("How much did I spend on groceries last month?", None, _router_output())
+        hit = cache.lookup("how much did i spend on groceries last month")
+        assert hit is not None and hit.primary_use_case == "UC-02"
+
+    _with_constant_embedding(run)
+    print("✅ Router cache: paraphrase with the same decisive words hits")
@@ -0,0 +1,82 @@
+"""
+Router Fast Path Tests
+======================
+
+fast_route() must answer the canonical UC-01 lookups without LLM-1 and
+return None for anything with a category, aggregation, period or amount,
+and for clarification turns.
+
+Usage:
+    import tests.test_router_fast_path as tfp
+    tfp.test_fast_route_accepts_direct_lookups()
+    tfp.test_fast_route_rejects_everything_else()
+"""
+
+ACCEPTED = [
+    ("What is my current balance?", "get_current_balance"),
+    ("my balance", "get_current_balance"),
+    ("I am USER_001. What's my account balance?", "get_current_balance"),
+    ("Show me my last transaction", "get_last_transaction"),
+    ("Show me my most recent transaction", "get_last_transaction"),
+    ("What was my latest transaction?", "get_last_transaction"),
+    ("What type of account do I have?", "get_account_type"),
+    ("What is my account type?", "get_account_type"),
+]
+
+REJECTED = [
+    "How much did I spend on groceries last month?",   # category + aggregation + period
+    "Show me my last transaction at restaurants",       # category
+    "How many transactions do I have?",                 # aggregation
+    "What was my balance last week?",                   # period
+    "Show me my last transaction since March",          # period
+    "Show me my recent transactions",                   # no template (plural list)
+    "Show me my last large transaction",                # amount qualifier
+    "Show me my last transaction over $100",            # amount qualifier
+    "Tell me a joke",                                   # no template
+]
+
+
+def test_fast_route_accepts_direct_lookups():
+    """Canonical lookups become a CLEAR UC-01 RouterOutput with the right operation."""
+    from router_fast_path import fast_route
+
+    for query, operation in ACCEPTED:
+        output = fast_route(query)
+        assert output is not None, query
+        assert output.clarity == "CLEAR" and output.primary_use_case == "UC-01", query
+        assert list(output.uc_operations.get("UC-01")) == [operation], query
+        assert output.router_notes.startswith("fast_path:"), query
+
+    print(f"✅ Fast path: {len(ACCEPTED)} direct lookups routed without LLM-1")
+
+
+def test_fast_route_rejects_everything_else():
+    """Anything beyond a plain lookup, and any clarification turn, falls through to LLM-1."""
+    from router_fast_path import fast_route
+    from schemas.router_models import ConversationSummary
+
+    for query in REJECTED:
+        assert fast_route(query) is None, query
+
+    history = [
+        {"role": "user", "content": "Show me my transactions"},
+        {"role": "assistant", "content": "Which period?"},
+    ]
+    assert fast_route("Show me my last transaction", raw_messages=history) is None
+
+    summary = ConversationSummary(account_scope={"value": "all_accounts", "source": "user_defined"})
+    assert fast_route("What is my current balance?", conversation_summary=summary) is None
+
+    print(f"✅ Fast path: {len(REJECTED) + 2} queries deferred to LLM-1")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# USAGE
+# ═══════════════════════════════════════════════════════════════════
+"""
+USAGE IN JUPYTER:
+
+import tests.test_router_fast_path as tfp
+tfp.test_fast_route_accepts_direct_lookups()
+tfp.test_fast_route_rejects_everything_else()
+"""
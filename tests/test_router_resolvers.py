@@ -0,0 +1,124 @@
+"""
+Router Resolver Tests
+=====================
+
+Table-driven checks for the deterministic LLM-1 post-processing in
+router_resolvers: time_window tokens → inclusive date ranges (incl. month
+and year boundaries), and replacement / dropping of category IDs that RAG
+never returned.
+
+Usage:
+    import tests.test_router_resolvers as trr
+    trr.test_resolve_time_window()
+    trr.test_validate_categories()
+"""
+
+from datetime import date
+
+
+# (token, today, expected start, expected end)
+TIME_WINDOW_CASES = [
+    ("last_7_days", date(2025, 11, 22), date(2025, 11, 16), date(2025, 11, 22)),
+    ("last_14_days", date(2025, 11, 22), date(2025, 11, 9), date(2025, 11, 22)),
+    ("last_1_day", date(2025, 11, 22), date(2025, 11, 22), date(2025, 11, 22)),
+    ("last_30_days", date(2025, 3, 10), date(2025, 2, 9), date(2025, 3, 10)),
+    ("last 7 days", date(2025, 1, 3), date(2024, 12, 28), date(2025, 1, 3)),
+    ("this_week", date(2025, 11, 22), date(2025, 11, 17), date(2025, 11, 23)),      # Saturday
+    ("this_week", date(2025, 12, 31), date(2025, 12, 29), date(2026, 1, 4)),        # crosses new year
+    ("last_week", date(2025, 11, 17), date(2025, 11, 10), date(2025, 11, 16)),      # Monday
+    ("last_week", date(2025, 11, 23), date(2025, 11, 10), date(2025, 11, 16)),      # Sunday
+    ("last_week", date(2026, 1, 2), date(2025, 12, 22), date(2025, 12, 28)),        # crosses new year
+    ("last_week", date(2025, 3, 5), date(2025, 2, 24), date(2025, 3, 2)),           # crosses month end
+    ("last_month", date(2025, 11, 22), date(2025, 10, 1), date(2025, 10, 31)),
+    ("last_month", date(2025, 3, 31), date(2025, 2, 1), date(2025, 2, 28)),
+    ("last_month", date(2024, 3, 1), date(2024, 2, 1), date(2024, 2, 29)),          # leap year
+    ("last_month", date(2026, 1, 15), date(2025, 12, 1), date(2025, 12, 31)),       # crosses new year
+    ("this_month", date(2025, 2, 10), date(2025, 2, 1), date(2025, 2, 28)),
+    ("yesterday", date(2026, 1, 1), date(2025, 12, 31), date(2025, 12, 31)),
+    ("last_year", date(2025, 6, 1), date(2024, 1, 1), date(2024, 12, 31)),
+]
+
+UNKNOWN_TOKENS = ["next_month", "last_fortnight", "last_days", ""]
+
+
+def test_resolve_time_window():
+    """Every known token resolves to the expected inclusive range; unknown ones to None."""
+    from router_resolvers import resolve_time_window
+
+    for token, today, start, end in TIME_WINDOW_CASES:
+        resolved = resolve_time_window(token, today=today)
+        assert resolved is not None, (token, today)
+        assert (resolved.start_date, resolved.end_date) == (start, end), (token, today, resolved)
+
+    for token in UNKNOWN_TOKENS:
+        assert resolve_time_window(token, today=date(2025, 11, 22)) is None, token
+
+    print(f"✅ resolve_time_window: {len(TIME_WINDOW_CASES)} ranges, {len(UNKNOWN_TOKENS)} unknown tokens")
+
+
+RAG_MATCHES = [
+    {"user_term": "groceries", "category_id": "C501", "category_name": "Groceries", "distance": 0.12},
+    {"user_term": "groceries", "category_id": "C502", "category_name": "Supermarkets", "distance": 0.30},
+    {"user_term": "coffee", "category_id": "C805", "category_name": "Coffee Shops", "distance": 0.20},
+]
+
+# (LLM-1 categories as (user_term, category_id), expected IDs after validation)
+CATEGORY_CASES = [
+    ([("groceries", "C501")], ["C501"]),                           # RAG ID kept
+    ([("groceries", "C502")], ["C502"]),                           # non-best RAG ID still kept
+    ([("groceries", "C803")], ["C501"]),                           # replaced by best match for term
+    ([("Coffee", "C999")], ["C805"]),                              # term match is case-insensitive
+    ([("pharmacy", "C803")], None),                                # no RAG match for term → dropped
+    ([("groceries", "C803"), ("pharmacy", "C804")], ["C501"]),     # one replaced, one dropped
+    ([("groceries", "C501"), ("coffee", "C805")], ["C501", "C805"]),
+]
+
+
+def _router_output(categories):
+    from schemas.router_models import RouterOutput
+
+    return RouterOutput(
+        clarity="CLEAR",
+        core_use_cases=["UC-02"],
+        primary_use_case="UC-02",
+        uc_operations={"UC-02": ["sum_spending_single_period"]},
+        uc_confidence="high",
+        clarity_reason="test",
+        resolved_trn_categories=[
+            {"user_term": term, "category_id": category_id} for term, category_id in categories
+        ],
+    )
+
+
+def test_validate_categories():
+    """Non-RAG category IDs are replaced by the closest RAG match for the term, or dropped."""
+    from router_resolvers import _validate_categories
+
+    for categories, expected in CATEGORY_CASES:
+        router_output = _router_output(categories)
+        _validate_categories(router_output, RAG_MATCHES)
+        ids = (
+            [c.category_id for c in router_output.resolved_trn_categories]
+            if router_output.resolved_trn_categories is not None
+            else None
+        )
+        assert ids == expected, (categories, ids)
+
+    # No RAG results this turn → nothing to validate against, LLM-1 output kept
+    router_output = _router_output([("groceries", "C803")])
+    _validate_categories(router_output, [])
+    assert [c.category_id for c in router_output.resolved_trn_categories] == ["C803"]
+
+    print(f"✅ _validate_categories: {len(CATEGORY_CASES) + 1} cases")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# USAGE
+# ═══════════════════════════════════════════════════════════════════
+"""
+USAGE IN JUPYTER:
+
+import tests.test_router_resolvers as trr
+trr.test_resolve_time_window()
+trr.test_validate_categories()
+"""
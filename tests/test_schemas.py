@@ -314,6 +314,47 @@ def test_all_schemas():
     return results
 
 
+def test_backoffice_log_tolerates_llm2_analysis():
+    """Scalar / string / fractional metrics from LLM-2 never reject the BackofficeLog."""
+    from schemas.router_models import BackofficeLog
+
+    cases = [
+        ({"totals": 1234.5}, {}, {"totals_raw": 1234.5}),
+        ({"totals": {"spend": "$1,234.50"}}, {"spend": 1234.5}, {}),
+        ({"counts": {"n": 3.5}}, {}, {"counts_raw": {"n": 3.5}}),
+        ({"per_category": "groceries dominate"}, {}, {"per_category_raw": "groceries dominate"}),
+        ("Spent $1,234 in total", {}, {"key_metrics": "Spent $1,234 in total"}),
+    ]
+    for analysis, totals, extras in cases:
+        log = BackofficeLog(user_query="How much did I spend?", answer="You spent $1,234.", analysis=analysis)
+        assert log.answer == "You spent $1,234."
+        assert log.analysis.totals == totals, analysis
+        for key, value in extras.items():
+            assert log.analysis.get(key) == value, (analysis, key)
+
+    counts = BackofficeLog(user_query="q", answer="a", analysis={"counts": {"n": "3"}}).analysis.counts
+    assert counts == {"n": 3}
+    print(f"✅ BackofficeLog analysis: {len(cases)} free-form LLM-2 shapes accepted")
+
+
+def test_graph_state_keeps_full_message_history():
+    """raw_messages keeps tool turns, extra keys and every message (no silent trimming)."""
+    from schemas.router_models import GraphState
+
+    history = [{"role": "user", "content": "How much did I spend on groceries?"}]
+    for i in range(20):
+        history.append({"role": "assistant", "content": None, "tool_calls": [{"id": f"call_{i}"}]})
+        history.append({"role": "tool", "content": "[]", "tool_call_id": f"call_{i}", "name": "get_transactions"})
+    history.append({"role": "user", "content": "last month"})
+
+    state = GraphState(user_query="last month", raw_messages=history)
+    assert state.raw_messages == history
+    assert state.raw_messages[0]["content"] == "How much did I spend on groceries?"
+    assert state.raw_messages[2]["tool_call_id"] == "call_0"
+    assert state.raw_messages[2]["name"] == "get_transactions"
+    print(f"✅ GraphState.raw_messages: {len(history)} messages kept with tool roles and extra keys")
+
+
 # ═══════════════════════════════════════════════════════════════════
 # USAGE
 # ═══════════════════════════════════════════════════════════════════
@@ -322,4 +363,6 @@ USAGE IN JUPYTER:
 
 import tests.test_schemas as ts
 ts.test_all_schemas()
+ts.test_backoffice_log_tolerates_llm2_analysis()
+ts.test_graph_state_keeps_full_message_history()
 """
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Transactions Tool Tests
+=======================
+
+Checks query_transactions / run_query_plan results against the bundled
+data/transactions.csv - the fast paths (query plan, numba kernel) must
+return exactly what a single query_transactions call returns.
+
+Usage:
+    import tests.test_transactions_tool as tt
+    tt.test_query_plan_mixed_users_kernel_path()
+"""
+
+
+def test_query_plan_mixed_users_kernel_path():
+    """A plan mixing users never leaks one user's rows into another's result (kernel path)."""
+
+    import schemas.transactions_tool as tool
+    from schemas.executor_models_llm2 import TransactionQuerySpec
+
+    specs = [
+        TransactionQuerySpec(user_id="USER_001"),
+        TransactionQuerySpec(user_id="USER_002"),
+    ]
+    expected = [tool.query_transactions_tool(spec).total_count for spec in specs]
+    assert expected[0] > 0 and expected[1] == 0
+
+    # Force the kernel branch (pure-Python kernel when numba is not installed)
+    saved = tool.numba, tool.NUMBA_MIN_ROWS
+    tool.numba, tool.NUMBA_MIN_ROWS = object(), 1
+    try:
+        results = tool.run_query_plan(specs)
+    finally:
+        tool.numba, tool.NUMBA_MIN_ROWS = saved
+
+    assert [result.total_count for result in results] == expected
+    assert set(results[0].transactions.user_id) == {"USER_001"}
+    print(f"✅ Query plan, kernel path: {expected} rows per user")